@@ -0,0 +1,5 @@
+"""Python helpers shared by the dashboards and graph scripts.
+
+Entry points run from the `simulation` directory (`python3 dashboard/...`), so
+they add this directory's parent to `sys.path` before importing `analysis`.
+"""
@@ -0,0 +1,140 @@
+"""Box plots from precomputed statistics.
+
+`px.box` sends every run to the browser, with its label, and lets plotly.js
+compute the boxes. Here the quartiles and the Tukey fences are computed on the
+server and only a bounded number of points is sent per box: the outliers, or a
+random sample of the runs when every point is asked for.
+"""
+
+import math
+from itertools import cycle
+
+import pandas as pd
+import plotly_express as px
+import plotly.graph_objs as go
+
+from analysis import jobs
+
+# Points sent per box at most
+BOX_MAX_POINTS = 200
+
+
+def box_statistics(df, x, y):
+    """Quartiles and Tukey fences of `y` per value of `x`.
+
+    Returns the statistics, one row per box, and the mask of the rows whose
+    value lies outside of the fences.
+    """
+    values = df[y]
+    groups = values.groupby(df[x], observed=True, sort=True)
+    q1 = groups.transform("quantile", 0.25)
+    q3 = groups.transform("quantile", 0.75)
+    inside = values.between(q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1))
+
+    quartiles = groups.quantile([0.25, 0.5, 0.75]).unstack()
+    # Without any run there are no quantiles to unstack into columns
+    quartiles = quartiles.reindex(columns=[0.25, 0.5, 0.75])
+    quartiles.columns = ["q1", "median", "q3"]
+    # Whiskers end at the most extreme values within 1.5 IQR of the box
+    fences = values[inside].groupby(df[x][inside], observed=True).agg(["min", "max"])
+    fences.columns = ["lowerfence", "upperfence"]
+
+    return (quartiles.join(fences), values.notna() & ~inside)
+
+
+def box(
+    data,
+    x,
+    y,
+    color=None,
+    hover_name=None,
+    points="outliers",
+    max_points=BOX_MAX_POINTS,
+    title=None,
+    log_x=False,
+    log_y=False,
+    range_x=None,
+    range_y=None,
+):
+    """Drop-in replacement for `px.box` sending precomputed boxes.
+
+    `points` is "outliers", "all" or False like in `px.box`, but at most
+    `max_points` points are sent per box: a random sample of the outliers or of
+    all the runs. The `hover_name` column labels the points sent only.
+    """
+    # A step of the drawing when run by a background job
+    jobs.step()
+    colors = cycle(px.colors.qualitative.Plotly)
+    traces = []
+    for name in pd.unique(data[color]) if color else [None]:
+        df = data if name is None else data[data[color] == name]
+        label = None if name is None else str(name)
+        style = dict(
+            name=label,
+            legendgroup=label,
+            offsetgroup=label,
+            marker_color=next(colors),
+        )
+
+        statistics, outliers = box_statistics(df, x, y)
+        traces.append(
+            go.Box(
+                x=statistics.index,
+                q1=statistics["q1"],
+                median=statistics["median"],
+                q3=statistics["q3"],
+                lowerfence=statistics["lowerfence"],
+                upperfence=statistics["upperfence"],
+                boxpoints=False,
+                showlegend=name is not None,
+                **style,
+            )
+        )
+
+        if not points:
+            continue
+        shown = df[df[y].notna()] if points == "all" else df[outliers]
+        # Same seed every time, the points do not move when the figure is redrawn
+        shown = (
+            shown.sample(frac=1, random_state=0)
+            .groupby(x, observed=True)
+            .head(max_points)
+        )
+        # The points go in a trace of their own, over the box, whose box is hidden
+        traces.append(
+            go.Box(
+                x=shown[x],
+                y=shown[y],
+                hovertext=shown[hover_name] if hover_name else None,
+                boxpoints="all",
+                jitter=0.3 if points == "all" else 0,
+                pointpos=0,
+                line_width=0,
+                fillcolor="rgba(0,0,0,0)",
+                hoveron="points",
+                showlegend=False,
+                **style,
+            )
+        )
+
+    return go.Figure(
+        traces,
+        layout=dict(
+            title=title,
+            boxmode="group",
+            legend_title_text=color,
+            xaxis=_axis(x, log_x, range_x),
+            yaxis=_axis(y, log_y, range_y),
+        ),
+    )
+
+
+def _axis(title, log, range):
+    # Like plotly express, ranges are given in data units on log axes too
+    if log:
+        return dict(
+            title=title,
+            type="log",
+            range=[math.log(r, 10) for r in range] if range else None,
+        )
+    return dict(title=title, range=range)
@@ -0,0 +1,114 @@
+"""On-disk cache of normalized DataFrames.
+
+Entries are keyed by the source file (absolute path, size and modification
+time) plus whatever the caller adds to the key, typically the loader version
+and its options. They are written as Feather files when pyarrow is available,
+as pickles otherwise. The cache directory is bounded in size: the least
+recently used entries are evicted first.
+"""
+
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+
+    CACHE_FORMAT = "feather"
+except ImportError:
+    CACHE_FORMAT = "pickle"
+
+CACHE_DIR = os.environ.get("DISSEC_CACHE_DIR", "./outputs/.cache")
+CACHE_MAX_BYTES = int(os.environ.get("DISSEC_CACHE_MAX_MB", 4096)) * 1024**2
+
+# Feather only stores a default index, the original one is kept as a column
+# whose name is this prefix followed by the name of the index
+_INDEX_COLUMN = "__index__"
+
+
+def frame_key(path, *parts):
+    """Key of the entry caching `path`, `parts` must be JSON serializable"""
+    stat = os.stat(path)
+    description = json.dumps(
+        [os.path.abspath(path), stat.st_size, stat.st_mtime_ns, *parts]
+    )
+    return hashlib.sha1(description.encode()).hexdigest()
+
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.{CACHE_FORMAT}")
+
+
+def load_frame(key):
+    """Return the cached DataFrame for `key`, or None on a cache miss"""
+    entry = _entry_path(key)
+    if not os.path.exists(entry):
+        return None
+
+    try:
+        if CACHE_FORMAT == "feather":
+            df = pd.read_feather(entry)
+            index = next(c for c in df.columns if c.startswith(_INDEX_COLUMN))
+            df = df.set_index(index).rename_axis(index[len(_INDEX_COLUMN) :] or None)
+        else:
+            df = pd.read_pickle(entry)
+    except Exception as e:
+        print("Dropping unreadable cache entry", entry, e)
+        os.remove(entry)
+        return None
+
+    # The modification time tracks the last use for the eviction
+    os.utime(entry)
+    return df
+
+
+def store_frame(key, df):
+    """Write `df` in the cache, then evict old entries if it grew too large"""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    entry = _entry_path(key)
+    # Dashboards may run concurrently, only complete files are made visible
+    tmp = f"{entry}.{os.getpid()}.tmp"
+    try:
+        if CACHE_FORMAT == "feather":
+            index = _INDEX_COLUMN + (df.index.name or "")
+            df.rename_axis(index).reset_index().to_feather(tmp)
+        else:
+            df.to_pickle(tmp)
+        os.replace(tmp, entry)
+    except (ValueError, TypeError, OSError) as e:
+        # Typically columns mixing strings and numbers, which Arrow rejects
+        print("Could not cache the frame:", e)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return
+
+    evict()
+
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    """Remove the least recently used entries until the cache fits `max_bytes`"""
+    if not os.path.isdir(CACHE_DIR):
+        return
+
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if name.endswith(".tmp"):
+            continue
+        try:
+            stat = os.stat(os.path.join(CACHE_DIR, name))
+        except FileNotFoundError:
+            # Evicted by another process in the meantime
+            continue
+        entries.append((stat.st_mtime, stat.st_size, name))
+
+    total = sum(size for (_, size, _) in entries)
+    for (_, size, name) in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(os.path.join(CACHE_DIR, name))
+        except FileNotFoundError:
+            pass
+        total -= size
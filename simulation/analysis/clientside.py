@@ -0,0 +1,86 @@
+"""Filtering small datasets in the browser.
+
+A file of a few thousand runs, such as an aggregated one, fits in the page.
+Its columns are then sent once, and the summary and the sections of raw runs
+are filtered and aggregated again by clientside callbacks (see
+`dashboard/assets/clientside.js`) when a slider moves, without a request to
+the server. Larger files keep being filtered on the server, including a large
+file selected on a dashboard whose default file is small: its columns are not
+sent, and the clientside callbacks show what the server draws instead.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from dash import ClientsideFunction, dash
+
+# Files of more runs are filtered on the server, 0 to always filter there
+CLIENTSIDE_MAX_ROWS = int(os.environ.get("DISSEC_CLIENTSIDE_MAX_ROWS", 5000))
+
+
+def fits(df):
+    """Whether `df` is small enough to be filtered in the browser"""
+    return len(df) <= CLIENTSIDE_MAX_ROWS
+
+
+def encode(df, filters, columns, **specs):
+    """Data of the clientside callbacks, the columns of `df` and the `filters`.
+
+    `filters` are the columns filtered by the sliders, in the order of their
+    inputs. Numbers are sent as arrays, with null for missing values, and the
+    other columns as the codes of their distinct values, in order of
+    appearance. Columns missing from `df` are left out. `specs` describe the
+    figures of the clientside sections.
+    """
+    encoded = dict()
+    for column in dict.fromkeys(filters + columns):
+        if column not in df:
+            continue
+        values = df[column]
+        if pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(
+            values
+        ):
+            values = values.to_numpy(dtype=np.float64)
+            encoded[column] = np.where(np.isnan(values), None, values).tolist()
+        else:
+            codes, uniques = pd.factorize(values)
+            encoded[column] = dict(codes=codes.tolist(), values=list(uniques))
+
+    return dict(rows=len(df), filters=filters, columns=encoded, **specs)
+
+
+def register_clientside(
+    app,
+    output,
+    function,
+    inputs,
+    columns,
+    drawn,
+    fallback=None,
+    state=None,
+    source=None,
+):
+    """Computes `output` with `dash_clientside.dissec[function]` in the browser.
+
+    The function is called with the values of `inputs`, the `columns` sent by
+    `encode`, None when the file is too large, and the data of the `drawn`
+    store. `fallback` fills that store on the server: it is called with the
+    values of `inputs` then `state` whenever they or the `source` input, which
+    changes with the selected file, change, and raises `PreventUpdate` when the
+    columns are sent.
+    """
+    app.clientside_callback(
+        ClientsideFunction("dissec", function),
+        output,
+        inputs + [columns, dash.Input(drawn, "data")],
+    )
+    if fallback is None:
+        return
+
+    @app.callback(dash.Output(drawn, "data"), inputs + [source], state or [])
+    def draw_on_server(*values):
+        values = list(values)
+        # The fallback reads the selected file from its state
+        del values[len(inputs)]
+        return fallback(*values)
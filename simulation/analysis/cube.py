@@ -0,0 +1,213 @@
+"""Pre-aggregated parameter cube.
+
+Runs are grouped once per combination of the experiment parameters, and every
+metric is reduced in each cell to its count, sum, sum of squares, minimum and
+maximum. The statistics of any set of cells are then recovered by rolling the
+cells up, so filters and summaries cost as much as the number of cells rather
+than the number of runs.
+
+Distributions cannot be rolled up from sums, so each cell also keeps a
+mergeable quantile sketch of a few metrics (see `analysis.sketch` for its
+error bound), from which box plots are drawn over any set of cells.
+"""
+
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from analysis.sketch import QuantileSketch
+
+# Experiment parameters, those present in the frame index the cells
+CUBE_DIMENSIONS = [
+    "strategy",
+    "status",
+    "failure_probability",
+    "failure_window",
+    "depth",
+    "group_size",
+    "fanout",
+    "model_size",
+]
+
+# Metrics whose distribution is sketched, those present in the frame are kept
+SKETCH_METRICS = [
+    "work_total",
+    "simulation_length",
+    "completeness",
+    "bandwidth_total",
+    "inbound_bandwidth_total",
+    "outbound_bandwidth_total",
+]
+
+# Minimum, quartiles and maximum, as drawn by box plots
+BOX_QUANTILES = [0, 0.25, 0.5, 0.75, 1]
+
+
+def _cell_keys(df, dimensions):
+    dimensions = [d for d in dimensions if d in df.columns]
+    # Probabilities are computed, equal settings must share a cell
+    return [df[d].round(6) if d == "failure_probability" else df[d] for d in dimensions]
+
+
+def build_cube(df, dimensions=CUBE_DIMENSIONS):
+    """Cells of `df` per combination of `dimensions`.
+
+    Columns are indexed by (statistic, metric), statistic being one of count,
+    sum, sumsq, min and max, and metrics are the numeric columns of the frame.
+    """
+    # Numeric dimensions are metrics too, to summarize them over several cells
+    metrics = list(df.select_dtypes(include=["number", "bool"]).columns)
+
+    keys = _cell_keys(df, dimensions)
+    values = df[metrics].astype(np.float64)
+    groups = values.groupby(keys, observed=True, sort=True)
+    squares = (values**2).groupby(keys, observed=True, sort=True)
+
+    return pd.concat(
+        {
+            "count": groups.count(),
+            "sum": groups.sum(),
+            "sumsq": squares.sum(),
+            "min": groups.min(),
+            "max": groups.max(),
+        },
+        axis=1,
+    )
+
+
+def select(cube, **conditions):
+    """Cells whose dimensions match every condition.
+
+    A condition is a `(low, high)` tuple (bounds included), a list of accepted
+    values, a function returning a mask from the dimension values, or a value.
+    """
+    mask = np.ones(len(cube), dtype=bool)
+    for (dimension, condition) in conditions.items():
+        values = cube.index.get_level_values(dimension)
+        if isinstance(condition, tuple):
+            mask &= np.asarray((values >= condition[0]) & (values <= condition[1]))
+        elif isinstance(condition, list):
+            mask &= np.asarray(values.isin(condition))
+        elif callable(condition):
+            mask &= np.asarray(condition(values))
+        else:
+            mask &= np.asarray(values == condition)
+
+    return cube[mask]
+
+
+def snap(cube, **ranges):
+    """`(low, high)` ranges narrowed to the values present in the cube.
+
+    Each range becomes the smallest and largest values of its dimension within
+    it, or None when there are none, so that ranges selecting the same cells
+    snap to the same bounds. Used to key what is computed from a selection.
+    """
+    snapped = {}
+    for (dimension, (low, high)) in ranges.items():
+        values = cube.index.get_level_values(dimension)
+        values = values[(values >= low) & (values <= high)]
+        snapped[dimension] = (
+            (float(values.min()), float(values.max())) if len(values) else None
+        )
+    return snapped
+
+
+def roll_up(cube, by, statistic="mean"):
+    """Statistic of every metric over the cells grouped by the `by` dimensions.
+
+    The result has the layout of `df.groupby(by, as_index=False).<statistic>()`
+    on the runs, statistic being one of count, sum, mean, std, min and max. An
+    empty `by` rolls every cell up in a single row.
+    """
+    grouping = dict(level=by) if by else dict(by=np.zeros(len(cube), dtype=int))
+
+    def reduce(column, how):
+        return cube[column].groupby(**grouping, sort=True).agg(how)
+
+    if statistic in ["min", "max"]:
+        result = reduce(statistic, statistic)
+    else:
+        count = reduce("count", "sum")
+        total = reduce("sum", "sum")
+        if statistic == "count":
+            result = count
+        elif statistic == "sum":
+            result = total
+        elif statistic == "mean":
+            result = total / count
+        elif statistic == "std":
+            # Sample standard deviation, like pandas
+            variance = (reduce("sumsq", "sum") - total**2 / count) / (count - 1)
+            result = variance.clip(lower=0).where(count > 1) ** 0.5
+        else:
+            raise ValueError(f"Unknown statistic {statistic}")
+
+    if not by:
+        return result.reset_index(drop=True)
+    return result.drop(columns=[c for c in by if c in result.columns]).reset_index()
+
+
+def dense(cube, metric, axes, statistic="mean"):
+    """Statistic of `metric` as an array with one dimension per axis.
+
+    Each axis is a `(dimension, values)` pair, or a `(dimensions, values)` pair
+    whose values are tuples, such as configurations of several dimensions. The
+    cells are rolled up once, combinations without runs are NaN.
+    """
+    names = []
+    for (dimensions, values) in axes:
+        names += list(dimensions) if isinstance(dimensions, tuple) else [dimensions]
+
+    rolled = roll_up(cube, names, statistic).set_index(names)[metric]
+    combinations = [
+        sum((v if isinstance(v, tuple) else (v,) for v in combination), ())
+        for combination in itertools.product(*(values for (_, values) in axes))
+    ]
+    index = pd.MultiIndex.from_tuples(combinations, names=names)
+    return (
+        rolled.reindex(index)
+        .to_numpy(dtype=np.float64)
+        .reshape([len(values) for (_, values) in axes])
+    )
+
+
+def build_sketches(df, dimensions=CUBE_DIMENSIONS, metrics=SKETCH_METRICS):
+    """Quantile sketch of each of `metrics` in the cells of `df`.
+
+    The frame is indexed like the cube, so `select` applies to it, and holds one
+    `QuantileSketch` per cell and metric.
+    """
+    keys = _cell_keys(df, dimensions)
+    metrics = [m for m in metrics if m in df.columns]
+
+    names = []
+    cells = []
+    for (name, group) in df[metrics].groupby(keys, observed=True, sort=True):
+        names.append(name if isinstance(name, tuple) else (name,))
+        cells.append([QuantileSketch.from_values(group[m]) for m in metrics])
+
+    index = pd.MultiIndex.from_tuples(names, names=[k.name for k in keys])
+    return pd.DataFrame(cells, index=index, columns=metrics)
+
+
+def quantiles(cells, metric, q=BOX_QUANTILES):
+    """Quantiles of `metric` over the runs of every cell, NaN without runs"""
+    merged = QuantileSketch()
+    for sketch in cells[metric]:
+        merged.merge(sketch)
+    return merged.quantiles(q)
+
+
+def roll_up_quantiles(cells, by, metric, q=BOX_QUANTILES):
+    """Quantiles of `metric` over the cells grouped by the `by` dimensions.
+
+    One row per group, with the `by` columns followed by one column per
+    quantile.
+    """
+    rows = [
+        [*(name if isinstance(name, tuple) else (name,)), *quantiles(group, metric, q)]
+        for (name, group) in cells.groupby(level=by, sort=True)
+    ]
+    return pd.DataFrame(rows, columns=[*by, *q])
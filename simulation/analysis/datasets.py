@@ -0,0 +1,117 @@
+"""Process-local registry of the frames the dashboards work on.
+
+Callbacks exchange dataset keys, typically the path of the output file kept
+in a `dcc.Store`, and read the frames from here instead of sending them
+through the browser. Frames stay in memory until the registry exceeds its
+budget, the least recently used ones are then dropped and reloaded (usually
+from the disk cache) on their next use.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from analysis import cache
+from analysis.cube import build_cube, build_sketches
+from analysis.loader import LOADER_VERSION, get_data, get_tables
+from analysis.runs import RunIndex
+
+DATASETS_MAX_BYTES = int(os.environ.get("DISSEC_DATASETS_MAX_MB", 1024)) * 1024**2
+# Set when several processes serve the dashboard, see `analysis.shared`
+SHARED = False
+
+_datasets = OrderedDict()
+_lock = threading.Lock()
+
+
+def dataset_key(path, profile="overview", aggregate_message=True):
+    """Key of the dataset in the registry, to key what is derived from it"""
+    # The file modification time is part of the key, a rewritten file is reloaded
+    return cache.frame_key(path, profile, aggregate_message, LOADER_VERSION)
+
+
+def get_dataset(path, profile="overview", aggregate_message=True):
+    """Memoized `get_data`.
+
+    The frame is shared by every callback reading the same dataset, so it must
+    not be modified in place.
+    """
+    key = dataset_key(path, profile, aggregate_message)
+    if SHARED:
+        # Imported here, Arrow is only required to serve with several processes
+        from analysis import shared
+
+        return _memoize(
+            key,
+            lambda: shared.share(
+                key, lambda: get_data(path, profile, aggregate_message)
+            ),
+        )
+    return _memoize(key, lambda: get_data(path, profile, aggregate_message))
+
+
+def get_cube(path, profile="overview", aggregate_message=True):
+    """Parameter cube of the dataset, see `analysis.cube`"""
+    key = cache.frame_key(path, profile, aggregate_message, LOADER_VERSION, "cube")
+    return _memoize(
+        key, lambda: build_cube(get_dataset(path, profile, aggregate_message))
+    )
+
+
+def get_run_index(path, profile="overview", aggregate_message=True):
+    """Runs of the dataset indexed by their parameters, see `analysis.runs`"""
+    key = cache.frame_key(path, profile, aggregate_message, LOADER_VERSION, "runs")
+    return _memoize(
+        key, lambda: RunIndex(get_dataset(path, profile, aggregate_message))
+    )
+
+
+def get_sketches(path, profile="overview", aggregate_message=True):
+    """Quantile sketches of the cells of the dataset, see `analysis.cube`"""
+    key = cache.frame_key(path, profile, aggregate_message, LOADER_VERSION, "sketches")
+    return _memoize(
+        key, lambda: build_sketches(get_dataset(path, profile, aggregate_message))
+    )
+
+
+def get_message_tables(path, profile="messages"):
+    """Memoized `get_tables`, the `(runs, messages)` pair of a full export"""
+    key = cache.frame_key(path, profile, LOADER_VERSION, "tables")
+    return _memoize(key, lambda: get_tables(path, profile))
+
+
+def _memoize(key, load):
+    with _lock:
+        if key in _datasets:
+            _datasets.move_to_end(key)
+            return _datasets[key][0]
+
+    df = load()
+    frames = df if isinstance(df, tuple) else (df,)
+    size = sum(_size(frame) for frame in frames)
+    with _lock:
+        _datasets[key] = (df, size)
+        evict()
+
+    return df
+
+
+def _size(value):
+    if isinstance(value, pd.DataFrame):
+        return value.memory_usage(deep=True).sum()
+    # A run index references the frame of its dataset, counted with it
+    return value.nbytes
+
+
+def evict(max_bytes=DATASETS_MAX_BYTES):
+    """Drop the least recently used frames until the registry fits `max_bytes`.
+
+    The caller holds the lock. The last frame is always kept, even when it is
+    larger than the budget on its own.
+    """
+    total = sum(size for (_, size) in _datasets.values())
+    while total > max_bytes and len(_datasets) > 1:
+        _, (_, size) = _datasets.popitem(last=False)
+        total -= size
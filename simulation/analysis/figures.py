@@ -0,0 +1,128 @@
+"""Memoized sections of figures.
+
+The same filters come back over and over as sliders are dragged back and
+forth, and a section of figures is costly to draw. Drawn sections are kept per
+key, typically the dataset key, the section and its filters with their ranges
+snapped to the values of the dataset (see `analysis.cube.snap`), and shared by
+every browser session of the process.
+
+Sections stay in memory until they exceed their budget, measured as the size
+of their JSON encoding, the least recently used ones are then dropped. When
+DISSEC_FIGURES_ON_DISK is set, sections are also written as JSON in the disk
+cache (see `analysis.cache`) and outlive the process. The modification time of
+the module drawing them is part of their key, so editing a dashboard discards
+its sections, but the cache must be cleared when the code it calls changes.
+
+A section drawn group by group, by a generator, is passed through as it is
+drawn and only kept once every group is drawn.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+from plotly.utils import PlotlyJSONEncoder
+
+from analysis import cache
+
+FIGURES_MAX_BYTES = int(os.environ.get("DISSEC_FIGURES_MAX_MB", 256)) * 1024**2
+FIGURES_ON_DISK = bool(os.environ.get("DISSEC_FIGURES_ON_DISK"))
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_figures(key, draw):
+    """Memoized `draw()`, `key` being JSON serializable.
+
+    When `draw()` returns a generator, so does this function the first time,
+    the children being the groups it yields.
+    """
+    module = sys.modules[draw.__module__]
+    description = json.dumps([key, os.stat(module.__file__).st_mtime_ns])
+    key = hashlib.sha1(description.encode()).hexdigest()
+    with _lock:
+        if key in _figures:
+            _figures.move_to_end(key)
+            return _figures[key][0]
+
+    children = _load(key) if FIGURES_ON_DISK else None
+    if children is not None:
+        _remember(key, children, os.path.getsize(_entry_path(key)))
+        return children
+
+    children = draw()
+    if inspect.isgenerator(children):
+        return _drawn_groups(key, children)
+    _store(key, children)
+    return children
+
+
+def evict(max_bytes=FIGURES_MAX_BYTES):
+    """Drop the least recently used sections until they fit `max_bytes`.
+
+    The caller holds the lock. The last section is always kept.
+    """
+    total = sum(size for (_, size) in _figures.values())
+    while total > max_bytes and len(_figures) > 1:
+        _, (_, size) = _figures.popitem(last=False)
+        total -= size
+
+
+def _drawn_groups(key, groups):
+    drawn = []
+    for group in groups:
+        drawn.append(group)
+        yield group
+    _store(key, drawn)
+
+
+def _store(key, children):
+    encoded = json.dumps(children, cls=PlotlyJSONEncoder)
+    if FIGURES_ON_DISK:
+        _write(key, encoded)
+    _remember(key, children, len(encoded))
+
+
+def _remember(key, children, size):
+    with _lock:
+        _figures[key] = (children, size)
+        evict()
+
+
+def _entry_path(key):
+    return os.path.join(cache.CACHE_DIR, f"{key}.json")
+
+
+def _load(key):
+    entry = _entry_path(key)
+    if not os.path.exists(entry):
+        return None
+
+    try:
+        with open(entry) as f:
+            # Components come back as their JSON form, which Dash accepts too
+            children = json.load(f)
+    except (ValueError, OSError) as e:
+        print("Dropping unreadable cache entry", entry, e)
+        os.remove(entry)
+        return None
+
+    # The modification time tracks the last use for the eviction
+    os.utime(entry)
+    return children
+
+
+def _write(key, encoded):
+    os.makedirs(cache.CACHE_DIR, exist_ok=True)
+    entry = _entry_path(key)
+    # Dashboards may run concurrently, only complete files are made visible
+    tmp = f"{entry}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(encoded)
+    os.replace(tmp, entry)
+    cache.evict()
@@ -0,0 +1,236 @@
+"""Background jobs on a local process pool.
+
+Heavy callbacks submit a job instead of drawing on the request thread, and
+the page polls it until its result is ready. Functions are registered by name:
+the workers are forked from the dashboard and find them, closures included, in
+their copy of the registry. A function registered once the pool is forked,
+by a page set up while another one already draws, gets a new pool forked on
+the next submission, the jobs already submitted finishing on the old one.
+
+Jobs are kept on disk, one JSON file per job holding its status and, once
+done, its result, so that any server process polls any job without a broker.
+A function may also yield its result in parts, a figure group at a time: each
+part is written to a file of its own as soon as it is drawn, and counted in
+the "parts" of the job, so that the page shows the parts drawn so far.
+Status changes are made under a lock shared by every process, so a job
+cancelled while a worker picks it up is never marked running. A worker skips a
+cancelled job that has not started yet, and one already running stops at its
+next `step`, the drawing functions calling it between figures.
+"""
+
+import fcntl
+import inspect
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from plotly.utils import PlotlyJSONEncoder
+
+JOBS_DIR = os.environ.get("DISSEC_JOBS_DIR", "./outputs/.jobs")
+JOBS_WORKERS = int(os.environ.get("DISSEC_JOBS_WORKERS", os.cpu_count()))
+# Job files left behind, by a closed page for instance, are removed after this
+JOBS_MAX_AGE = 3600
+
+_functions = dict()
+_pool = None
+# Set when functions are registered after the pool is forked
+_stale = False
+_lock = threading.Lock()
+# Job run by this worker process, if any, and the steps it has done
+_current = None
+_steps = 0
+
+
+class Cancelled(Exception):
+    """Raised by `step` in a job cancelled while it runs"""
+
+
+def register(name, function):
+    """Make `function` available to the jobs under `name`"""
+    global _stale
+    with _lock:
+        _functions[name] = function
+        _stale = _pool is not None
+
+
+def submit(name, *args):
+    """Run the function registered under `name` on `args`, return the job id"""
+    global _pool, _stale
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    _sweep()
+    job = uuid.uuid4().hex
+    _write(job, dict(status="pending", submitted=time.time()))
+
+    with _lock:
+        if _pool is None or _stale:
+            if _pool is not None:
+                # Its workers run the jobs already submitted, then exit
+                _pool.shutdown(wait=False)
+            # Workers must inherit the registered functions, they are forked
+            _pool = ProcessPoolExecutor(
+                JOBS_WORKERS, mp_context=multiprocessing.get_context("fork")
+            )
+            _stale = False
+        _pool.submit(_run, job, name, args)
+    return job
+
+
+def poll(job):
+    """Status of `job`, as a dict.
+
+    Its "status" is one of pending, running, done, error and cancelled, unknown
+    jobs being reported as cancelled. It holds the "result" when done and the
+    "error" on failure. The result of a function yielding parts is read with
+    `parts` instead, the number of parts drawn being reported as its "parts".
+    """
+    status = _read(job)
+    return status if status is not None else dict(status="cancelled")
+
+
+def parts(job, count):
+    """The first `count` parts drawn by `job`"""
+    return [_read_json(_part_path(job, part)) for part in range(count)]
+
+
+def cancel(job):
+    """Cancel `job` unless it is already finished"""
+    _update(job, ["pending", "running"], status="cancelled")
+
+
+def step():
+    """Count a step of the job running in this process, stop it if cancelled.
+
+    Drawing functions call it between figures, it does nothing outside of a
+    job. The number of steps done is reported as the "steps" of the job.
+    """
+    global _steps
+    if _current is None:
+        return
+    _steps += 1
+    status = _update(_current, ["running"], steps=_steps)
+    if status is None or status["status"] != "running":
+        raise Cancelled
+
+
+def forget(job):
+    """Remove the files of a finished job"""
+    for name in os.listdir(JOBS_DIR):
+        if name.startswith(f"{job}."):
+            try:
+                os.remove(os.path.join(JOBS_DIR, name))
+            except FileNotFoundError:
+                pass
+
+
+def _run(job, name, args):
+    global _current, _steps
+    status = _update(job, ["pending"], status="running", started=time.time(), steps=0)
+    if status is None or status["status"] != "running":
+        return
+
+    _current = job
+    _steps = 0
+    try:
+        result = _functions[name](*args)
+        if inspect.isgenerator(result):
+            finished = dict(status="done", parts=_run_parts(job, result))
+        else:
+            encoded = json.dumps(result, cls=PlotlyJSONEncoder)
+            finished = dict(status="done", result=json.loads(encoded))
+    except Cancelled:
+        finished = None
+    except Exception as e:
+        traceback.print_exc()
+        finished = dict(status="error", error=repr(e))
+    finally:
+        _current = None
+
+    # Superseded while running, nobody waits for the result anymore
+    status = _update(job, ["running"], **finished) if finished else None
+    if status is None or status["status"] == "cancelled":
+        forget(job)
+
+
+def _run_parts(job, result):
+    """Write each part yielded by `result` as soon as it is drawn"""
+    count = 0
+    for part in result:
+        _write_json(_part_path(job, count), part)
+        count += 1
+        status = _update(job, ["running"], parts=count)
+        if status is None or status["status"] != "running":
+            raise Cancelled
+    return count
+
+
+def _job_path(job):
+    return os.path.join(JOBS_DIR, f"{job}.json")
+
+
+def _part_path(job, part):
+    return os.path.join(JOBS_DIR, f"{job}.{part}.json")
+
+
+def _read(job):
+    return _read_json(_job_path(job))
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+@contextmanager
+def _locked():
+    # Serializes the status changes of the server and worker processes
+    os.makedirs(JOBS_DIR, exist_ok=True)
+    with open(os.path.join(JOBS_DIR, ".lock"), "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+
+def _update(job, allowed, **changes):
+    """Apply `changes` to the status of `job` if it is one of `allowed`.
+
+    Returns the status of the job after the update, None if it is unknown.
+    """
+    with _locked():
+        status = _read(job)
+        if status is not None and status["status"] in allowed:
+            status = dict(status, **changes)
+            _write(job, status)
+        return status
+
+
+def _write(job, status):
+    _write_json(_job_path(job), status)
+
+
+def _write_json(path, value):
+    # Pollers run concurrently, only complete files are made visible
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(value, f, cls=PlotlyJSONEncoder)
+    os.replace(tmp, path)
+
+
+def _sweep():
+    now = time.time()
+    for name in os.listdir(JOBS_DIR):
+        if name == ".lock":
+            continue
+        try:
+            if now - os.stat(os.path.join(JOBS_DIR, name)).st_mtime > JOBS_MAX_AGE:
+                os.remove(os.path.join(JOBS_DIR, name))
+        except FileNotFoundError:
+            # Removed by another process in the meantime
+            pass
@@ -0,0 +1,593 @@
+"""Shared loader for the simulation outputs.
+
+Every dashboard and graph script reads the CSV files written by
+`ExperimentRunner.writeResults` through `get_data`. The separator, decimal
+mark and column types are sniffed from the head of the file so that the CSV
+is parsed exactly once, then the profile of the caller decides how columns are
+renamed and which derived statistics are added.
+"""
+
+import csv
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from analysis import cache
+
+# Bump whenever the normalization changes, so cached frames are rebuilt
+LOADER_VERSION = 5
+
+# Bytes read from the head of a CSV to guess its format
+SNIFF_BYTES = 64 * 1024
+
+# Rows parsed at once when streaming full exports
+CHUNK_ROWS = 100_000
+# Labels repeated on every message row of a full export
+CATEGORICAL_COLUMNS = ["type", "run_id", "strategy", "status"]
+
+# Columns that are never numbers, even when the sampled values look like ones
+STRING_COLUMNS = [
+    "name",
+    "seed",
+    "status",
+    "strategy",
+    "buildingBlocks",
+    "type",
+]
+
+# Statistics computed per role from the others, never summed over the workers
+_DERIVED_STATISTICS = ["work_per_node", "bandwidth_per_node", "delta_nodes"]
+# Per role statistics the derived ones are computed from
+_DERIVATION_INPUTS = ["work", "final_nodes", "initial_nodes", "inbound_bandwidth"]
+
+# Renaming shared by the recent exports, the legacy one differs on a few keys
+RENAME = {
+    "name": "run_id",
+    "buildingBlocks": "strategy",
+    "failureRate": "failure_probability",
+    "observedFailureRate": "failure_rate",
+    "emissionTime": "emitter_time",
+    "receptionTime": "receiver_time",
+    "emitterId": "emitter_id",
+    "receiverId": "receiver_id",
+    "latency": "simulation_length",
+    "work": "total_work",
+    "groupSize": "group_size",
+    "circulatingAggregateIds": "circulating_aggregate_ids",
+    "currentlyCirculatingVersions": "currently_circulating_ids",
+    "inboundBandwidth": "inbound_bandwidth",
+    "outboundBandwidth": "outbound_bandwidth",
+    "finalInboundBandwidth": "final_inbound_bandwidth",
+    "finalOutboundBandwidth": "final_outbound_bandwidth",
+    "finalUsedBandwidth": "final_bandwidth",
+}
+
+ROLES = ["Aggregator", "LeafAggregator", "Contributor", "Backup", "Querier"]
+# Roles summed into the virtual "Worker" role
+WORKER_ROLES = ["Aggregator", "LeafAggregator", "Querier"]
+
+STRATEGIES_TRANSLATION = {
+    "FFP,Drop,Stop,1,None": "LowCost",
+    "LFP,Replace,Stay,1,NonBlocking": "HighCmpl",
+    "LFP,Drop,Stop,1,FullSync": "S&P",
+    "LFP,Replace,0Resync,1,NonBlocking": "Hybrid",
+    "LFP,Replace,0Resync,1,Leaves": "HyBlock",
+}
+
+# Run names written by `writeResults`, `<blocks>-m<modelSize>-f<failureRate>-
+# d<depth>-s<seed>`, with the `-g<groupSize>` suffix of the paper profile
+RUN_ID_PATTERN = (
+    r"^(?P<blocks>.+?)-(?P<settings>m(?P<model_size>\d+)-f(?P<failure_window>\d+)"
+    r"-d(?P<depth>\d+)-s(?P<seed>.+?)(?:-g(?P<group_size>\d+)(?:\.0*)?)?)$"
+)
+# Full exports name their runs `<blocks>-m<modelSize>-d<depth>-m<failureRate>-
+# s<seed>` instead, the failure rate in a second `m` block
+FULL_RUN_ID_PATTERN = (
+    r"^(?P<blocks>.+?)-(?P<settings>m(?P<model_size>\d+)-d(?P<depth>\d+)"
+    r"-m(?P<failure_window>\d+)-s(?P<seed>.+?)(?:-g(?P<group_size>\d+)(?:\.0*)?)?)$"
+)
+# Factors of the run names, parsed once at load time, see `parse_run_ids`
+RUN_LABEL_FACTORS = ["blocks", "seed"]
+RUN_NUMBER_FACTORS = ["model_size", "failure_window", "depth", "group_size"]
+
+# Runs excluded from the paper figures
+PAPER_EXCLUDED_STRATEGIES = ["LFP,Replace,0Resync,3,NonBlocking"]
+PAPER_EXCLUDED_RUNS = [
+    {"seed": "2-3", "depth": 4, "model_size": 1024, "group_size": 5},
+    {"seed": "3-6", "depth": 4, "model_size": 1024, "group_size": 5},
+]
+
+
+def _per_run_id(df, parse):
+    """`parse` applied to the distinct run ids, then spread to every row.
+
+    Returns the frame of `parse` indexed like `df`, its rows without a run id
+    missing. Full exports repeat each run id on every message, it is parsed
+    once rather than per row.
+    """
+    codes, run_ids = pd.factorize(df["run_id"])
+    parsed = parse(pd.Series(np.asarray(run_ids, dtype=object), dtype=object))
+    # Rows without a run id take the trailing missing row
+    parsed = parsed.reindex(range(len(run_ids) + 1))
+    return parsed.iloc[np.where(codes < 0, len(run_ids), codes)].set_index(df.index)
+
+
+def _prepare_overview(df):
+    leaders = dict(OPTI="O_LEADER", EAGER="E_LEADER")
+    leader = _per_run_id(df, lambda ids: ids.str.extract(r"^(OPTI|EAGER)-leader"))[0]
+    is_leader = leader.notna().to_numpy()
+    df.loc[is_leader, "strategy"] = leader[is_leader].map(leaders)
+    return df
+
+
+def _prepare_paper(df):
+    df["run_id"] = df["run_id"] + "-g" + df["group_size"].map(str)
+    df.drop(
+        index=df[df["strategy"].isin(PAPER_EXCLUDED_STRATEGIES)].index,
+        inplace=True,
+    )
+    df["strategy"] = df["strategy"].replace(STRATEGIES_TRANSLATION)
+    return df
+
+
+def _prepare_messages(df):
+    df["latency"] = (df["receiver_time"].fillna(0) - df["emitter_time"].fillna(0)).clip(
+        lower=0
+    )
+    return df
+
+
+def _finalize_paper(df):
+    # Read as integers when every window is, which cannot hold inf
+    df["failure_window"] = df["failure_window"].astype(np.float64).replace(0, np.inf)
+    df["failure_probability"] = 100 / df["failure_window"]
+    df["failure_probability"] = df["failure_probability"].round(5)
+
+    df["has_result"] = df["completeness"] > 0
+
+    # Computing % versions per level
+    for level in range(5):
+        c = f"_level_{level}"
+        if "versions" + c not in df.columns:
+            continue
+        df["versions_percent" + c] = df["versions" + c] / df["fanout"] ** (
+            df["depth"] - level
+        )
+        df["work_avg" + c] = df["work" + c] / df["fanout"] ** (df["depth"] - level)
+
+    # Keyed on the factors of the run names, which survive the per run average
+    # unlike the seeds, which are not numbers
+    excluded = np.zeros(len(df), dtype=bool)
+    for run in PAPER_EXCLUDED_RUNS:
+        matches = np.ones(len(df), dtype=bool)
+        for (factor, value) in run.items():
+            matches &= (df[f"run_{factor}"] == value).to_numpy()
+        excluded |= matches
+    df.drop(index=df.index[excluded], inplace=True)
+
+    return df
+
+
+# How each family of entry points names and derives its columns
+PROFILES = {
+    # dashboard.py and scripts/generate_graphs*.py, legacy exports keyed by seed
+    "overview": dict(
+        rename={
+            "seed": "run_id",
+            "failureRate": "failure_probability",
+            "observedFailureRate": "failure_rate",
+            "emissionTime": "emitter_time",
+            "receptionTime": "receiver_time",
+            "emitterId": "emitter_id",
+            "receiverId": "receiver_id",
+            "latency": "simulation_length",
+            "work": "total_work",
+            "groupSize": "group_size",
+            "circulatingAggregateIds": "circulating_aggregate_ids",
+            "currentlyCirculatingVersions": "currently_circulating_ids",
+            "usedBandwidth": "bandwidth",
+            "finalUsedBandwidth": "final_bandwidth",
+        },
+        roles=ROLES,
+        statistics=[
+            "initial_nodes",
+            "final_nodes",
+            "failures",
+            "work",
+            "messages",
+            "work_per_node",
+            "delta_nodes",
+            "bandwidth",
+        ],
+        prepare=_prepare_overview,
+    ),
+    # dashboard_paper.py
+    "paper": dict(
+        rename={
+            **RENAME,
+            "failureRate": "failure_window",
+            "observedContributorsFailureRate": "failure_rate_contributors",
+            "observedWorkersFailureRate": "failure_rate_workers",
+            "modelSize": "model_size",
+        },
+        roles=ROLES + ["Worker"],
+        statistics=[
+            "initial_nodes",
+            "final_nodes",
+            "failures",
+            "work",
+            "messages",
+            "work_per_node",
+            "bandwidth_per_node",
+            "delta_nodes",
+            "inbound_bandwidth",
+            "outbound_bandwidth",
+        ],
+        absolute_delta=True,
+        prepare=_prepare_paper,
+        finalize=_finalize_paper,
+    ),
+    # dashboard_mini.py
+    "mini": dict(
+        rename=RENAME,
+        roles=ROLES,
+        statistics=[
+            "initial_nodes",
+            "final_nodes",
+            "failures",
+            "work",
+            "messages",
+            "work_per_node",
+            "delta_nodes",
+            "bandwidth",
+        ],
+    ),
+    # dashboard_demo.py and dashboard_full.py, one row per message
+    "messages": dict(
+        rename={**RENAME, "circulatingAggregateIds": "circulating_ids"},
+        roles=ROLES,
+        statistics=[
+            "initial_nodes",
+            "final_nodes",
+            "failures",
+            "work",
+            "messages",
+            "work_per_node",
+            "delta_nodes",
+            "inbound_bandwidth",
+            "outbound_bandwidth",
+        ],
+        prepare=_prepare_messages,
+    ),
+}
+
+# Booleans written by the simulator
+_BOOLEANS = ["true", "false", "True", "False"]
+# Tokens pandas reads as missing values
+_MISSING = ["", "NaN", "nan", "NA", "null"]
+_NUMBER = {
+    ".": re.compile(r"^[-+]?(\d+(\.\d*)?|\.\d+)([eE][-+]?\d+)?$|^[-+]?Infinity$"),
+    ",": re.compile(r"^[-+]?(\d+(,\d*)?|,\d+)([eE][-+]?\d+)?$|^[-+]?Infinity$"),
+}
+
+
+def sniff_format(path, sample_size=SNIFF_BYTES):
+    """Guess the separator, decimal mark and column dtypes of a CSV file.
+
+    Only the first `sample_size` bytes are read. Columns whose sampled values
+    are all numbers are typed as float64, all booleans as bool, the others are
+    kept as strings. Columns without any sampled value are left to pandas.
+    """
+    with open(path, newline="") as f:
+        sample = f.read(sample_size)
+
+    lines = sample.splitlines()
+    # The last line is likely cut by the sample size
+    if len(lines) > 2 and not sample.endswith("\n"):
+        lines = lines[:-1]
+
+    header = lines[0] if lines else ""
+    sep = ";" if header.count(";") >= header.count(",") else ","
+    rows = list(csv.reader(lines, delimiter=sep))
+    columns = rows[0] if rows else []
+    values = [v for row in rows[1:] for v in row if v not in _MISSING]
+
+    # Numbers are written with a comma by the simulator, older files used dots
+    decimal = "."
+    if sep == ";" and any(_NUMBER[","].match(v) and "," in v for v in values):
+        decimal = ","
+
+    dtypes = {}
+    for (i, column) in enumerate(columns):
+        if column in STRING_COLUMNS:
+            dtypes[column] = str
+            continue
+
+        sampled = [
+            row[i] for row in rows[1:] if i < len(row) and row[i] not in _MISSING
+        ]
+        if len(sampled) == 0:
+            # Full exports fill some columns only further down the file
+            continue
+        if all(_NUMBER[decimal].match(v) for v in sampled):
+            dtypes[column] = np.float64
+        elif all(v in _BOOLEANS for v in sampled):
+            dtypes[column] = bool
+        else:
+            dtypes[column] = str
+
+    return sep, decimal, dtypes
+
+
+def read_table(path):
+    """Parse a simulation output file into a raw DataFrame in a single pass"""
+    if ".json" in path:
+        with open(path) as f:
+            data = json.load(f)
+
+        return pd.concat([pd.DataFrame(i) for i in data])
+
+    sep, decimal, dtypes = sniff_format(path)
+    try:
+        return pd.read_csv(path, sep=sep, decimal=decimal, dtype=dtypes)
+    except ValueError:
+        # A column looked typed in the sample but is not further down the file
+        return pd.read_csv(
+            path,
+            sep=sep,
+            decimal=decimal,
+            dtype={k: v for (k, v) in dtypes.items() if v is str},
+        )
+
+
+def read_chunks(path, chunksize=CHUNK_ROWS):
+    """Parse a simulation output file as a stream of `chunksize` rows frames"""
+    if ".json" in path:
+        yield read_table(path)
+        return
+
+    sep, decimal, dtypes = sniff_format(path)
+    rows = 0
+    try:
+        for chunk in pd.read_csv(
+            path, sep=sep, decimal=decimal, dtype=dtypes, chunksize=chunksize
+        ):
+            rows += len(chunk)
+            yield chunk
+    except ValueError:
+        # Same fallback as read_table, resuming after the rows already read
+        for chunk in pd.read_csv(
+            path,
+            sep=sep,
+            decimal=decimal,
+            dtype={k: v for (k, v) in dtypes.items() if v is str},
+            chunksize=chunksize,
+            skiprows=range(1, rows + 1),
+        ):
+            chunk.index += rows
+            yield chunk
+
+
+def compact(df):
+    """Shrink a frame in place: labels become categories, numbers are downcast"""
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    for col in df.select_dtypes(include="floating").columns:
+        df[col] = df[col].astype(np.float32)
+    for col in df.select_dtypes(include="integer").columns:
+        df[col] = pd.to_numeric(df[col], downcast="integer")
+    return df
+
+
+def concat_compact(chunks):
+    """Concatenate compacted frames, merging the categories of each chunk"""
+    chunks = list(chunks)
+    categorical = [c for c in CATEGORICAL_COLUMNS if c in chunks[0].columns]
+    categories = {
+        col: union_categoricals([chunk[col] for chunk in chunks]) for col in categorical
+    }
+    columns = chunks[0].columns
+
+    df = pd.concat(
+        [chunk.drop(columns=categorical) for chunk in chunks], ignore_index=True
+    )
+    for col in categorical:
+        df[col] = pd.Categorical(categories[col])
+    return df[columns]
+
+
+def split_runs(df):
+    """Split a full export into a run table and a message table.
+
+    Columns holding a single value within each run (its parameters and the
+    `RunResult` fields) move to the run table, indexed by an integer `run`.
+    The message table keeps the `run` key and the columns varying per message.
+    """
+    codes, _ = pd.factorize(df["run_id"])
+    df["run"] = pd.to_numeric(codes, downcast="integer")
+
+    constant = df.groupby("run", sort=False).nunique(dropna=False).le(1).all()
+    run_columns = [c for c in df.columns if c != "run" and constant.get(c, False)]
+    message_columns = [c for c in df.columns if c not in run_columns]
+
+    runs = df.drop_duplicates("run")[["run"] + run_columns].set_index("run")
+    return runs.sort_index(), df[message_columns]
+
+
+def join_runs(messages, runs, columns):
+    """Messages with the requested `columns`, joining those stored per run"""
+    missing = [c for c in columns if c not in messages.columns and c in runs.columns]
+    if not missing:
+        return messages
+    return messages.join(runs[missing], on="run")
+
+
+def derive_statistics(df, profile):
+    """Add the per role and total statistics described by the profile.
+
+    The per role statistics are gathered in a (rows, statistics, roles) block,
+    the derived ones are computed on the whole block at once and the new
+    columns are attached to the frame with a single concat.
+    """
+    roles = profile["roles"]
+    statistics = list(profile["statistics"])
+    for stat in ["work_per_node", "delta_nodes"]:
+        if stat not in statistics:
+            statistics.append(stat)
+    stats = statistics + [s for s in _DERIVATION_INPUTS if s not in statistics]
+    s_idx = {s: i for (i, s) in enumerate(stats)}
+    r_idx = {r: i for (i, r) in enumerate(roles)}
+
+    block = (
+        df.reindex(columns=[f"{s}_{r}" for s in stats for r in roles], fill_value=0)
+        .to_numpy(dtype=np.float64)
+        .reshape(len(df), len(stats), len(roles))
+    )
+    block[np.isnan(block)] = 0
+
+    if "Worker" in roles:
+        summed = [s_idx[s] for s in stats if s not in _DERIVED_STATISTICS]
+        workers = [r_idx[r] for r in WORKER_ROLES if r in r_idx]
+        block[:, summed, r_idx["Worker"]] = block[:, summed][:, :, workers].sum(axis=2)
+
+    final_nodes = block[:, s_idx["final_nodes"]]
+    for (stat, numerator) in [
+        ("work_per_node", "work"),
+        ("bandwidth_per_node", "inbound_bandwidth"),
+    ]:
+        if stat in s_idx:
+            # Per row, roles without any node left get 0
+            block[:, s_idx[stat]] = np.divide(
+                block[:, s_idx[numerator]],
+                final_nodes,
+                out=np.zeros_like(final_nodes),
+                where=final_nodes != 0,
+            )
+    delta = final_nodes - block[:, s_idx["initial_nodes"]]
+    if profile.get("absolute_delta", False):
+        delta = np.abs(delta)
+    block[:, s_idx["delta_nodes"]] = delta
+
+    # New columns: derived statistics, the workers sums and the missing inputs
+    columns = {}
+    for s in statistics:
+        for r in roles:
+            name = f"{s}_{r}"
+            if s in _DERIVED_STATISTICS or r == "Worker" or name not in df.columns:
+                columns[name] = block[:, s_idx[s], r_idx[r]]
+    for s in statistics:
+        columns[f"{s}_total"] = block[:, s_idx[s]].sum(axis=1)
+
+    derived = pd.DataFrame(columns, index=df.index)
+    df = df.drop(columns=[c for c in derived.columns if c in df.columns])
+    return pd.concat([df, derived], axis=1)
+
+
+def parse_run_ids(df):
+    """Add the factors of the run names, `RUN_ID_PATTERN`, as columns.
+
+    Those of full exports follow `FULL_RUN_ID_PATTERN`. The columns are named
+    after the factor with a `run_` prefix: the labels are categories, the
+    numbers integers, -1 when missing. `run_settings` codes every factor but
+    the building blocks, in the order of the names, so that the strategies of
+    the same settings are compared by grouping on it.
+    """
+    if "run_id" not in df.columns:
+        return df
+
+    def parse(run_ids):
+        factors = run_ids.str.extract(RUN_ID_PATTERN).combine_first(
+            run_ids.str.extract(FULL_RUN_ID_PATTERN)
+        )
+        factors["settings"] = pd.factorize(factors["settings"], sort=True)[0]
+        return factors
+
+    factors = _per_run_id(df, parse)
+    columns = {}
+    for factor in RUN_LABEL_FACTORS:
+        columns[f"run_{factor}"] = factors[factor].astype("category")
+    for factor in RUN_NUMBER_FACTORS + ["settings"]:
+        columns[f"run_{factor}"] = (
+            pd.to_numeric(factors[factor]).fillna(-1).astype(np.int32)
+        )
+    return pd.concat([df, pd.DataFrame(columns, index=df.index)], axis=1)
+
+
+def normalize(df, profile):
+    """Rename the raw columns and add the derived statistics of the profile"""
+    df.rename(mapper=profile["rename"], axis=1, inplace=True)
+    if "prepare" in profile:
+        df = profile["prepare"](df)
+    df.reset_index(inplace=True)
+    df.fillna(0, inplace=True)
+
+    return derive_statistics(df, profile)
+
+
+def get_data(
+    path, profile="overview", aggregate_message=True, use_cache=True, chunksize=None
+):
+    """Load and normalize a simulation output for the given profile.
+
+    When `aggregate_message` is set, rows are averaged per run so that full
+    exports (one row per message) collapse to one row per execution. With a
+    `chunksize`, the file is streamed and each chunk is compacted before the
+    next one is read, which bounds the memory needed by large full exports.
+    The normalized frame is cached on disk until the source file changes.
+    """
+    key = None
+    if use_cache and os.path.isfile(path):
+        key = cache.frame_key(
+            path, profile, aggregate_message, chunksize is not None, LOADER_VERSION
+        )
+        df = cache.load_frame(key)
+        if df is not None:
+            return df
+
+    profile = PROFILES[profile]
+    if chunksize is None:
+        df = normalize(read_table(path), profile)
+    else:
+        df = concat_compact(
+            compact(normalize(chunk, profile)) for chunk in read_chunks(path, chunksize)
+        )
+
+    if aggregate_message:
+        df = df.groupby(["run_id", "status", "strategy"], observed=True).mean()
+        df.reset_index(inplace=True)
+
+    # After the average per run, which would drop the categories
+    df = parse_run_ids(df)
+
+    if "finalize" in profile:
+        df = profile["finalize"](df)
+
+    if key is not None:
+        cache.store_frame(key, df)
+
+    return df
+
+
+def get_tables(path, profile="messages", use_cache=True, chunksize=CHUNK_ROWS):
+    """Load a full export as a `(runs, messages)` pair, see `split_runs`"""
+    keys = None
+    if use_cache and os.path.isfile(path):
+        keys = [
+            cache.frame_key(path, profile, table, LOADER_VERSION)
+            for table in ["runs", "messages"]
+        ]
+        tables = [cache.load_frame(key) for key in keys]
+        if all(table is not None for table in tables):
+            return tuple(tables)
+
+    tables = split_runs(get_data(path, profile, False, False, chunksize))
+    if keys is not None:
+        for (key, table) in zip(keys, tables):
+            cache.store_frame(key, table)
+
+    return tables
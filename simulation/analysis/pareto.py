@@ -0,0 +1,71 @@
+"""Pareto fronts of the strategies.
+
+In a parameter cell, a strategy is on the front unless another one is at least
+as good on every objective and better on one. Objectives may be compared with
+a tolerance relative to the value of the strategy: another strategy within the
+tolerance of it is as good, not better, so that a negligible difference does
+not push a strategy off the front. The cells are compared all at once, each
+strategy against every other in turn.
+"""
+
+import numpy as np
+
+from analysis.cube import dense
+
+# Objectives compared by default, each maximized or minimized
+PARETO_OBJECTIVES = [
+    ("completeness", "max"),
+    ("work_per_node_total", "min"),
+    ("simulation_length", "min"),
+    ("bandwidth_per_node_total", "min"),
+]
+
+
+def front(values, senses, tolerances=None):
+    """Whether each strategy is on the Pareto front of its cell.
+
+    The last two dimensions of `values` are the strategies and the objectives,
+    those before index the cells. `senses` are "max" or "min" per objective,
+    and `tolerances` relative margins per objective, none by default. A
+    strategy missing a value, without runs in the cell, is not on the front
+    and does not push others off it.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    signs = np.array([1.0 if sense == "max" else -1.0 for sense in senses])
+    margins = np.zeros(len(senses)) if tolerances is None else np.asarray(tolerances)
+    # Objectives first, each compared over contiguous cells, larger is better
+    oriented = np.moveaxis(values * signs, -1, 0)
+    margins = np.moveaxis(np.abs(values) * margins, -1, 0)
+    low = oriented - margins
+    high = oriented + margins
+    missing = np.isnan(values).any(axis=-1)
+
+    dominated = np.zeros(missing.shape, dtype=bool)
+    present = ~missing.reshape(-1, missing.shape[-1]).all(axis=0)
+    for other in np.flatnonzero(present):
+        candidate = oriented[..., other : other + 1]
+        worse = missing[..., other : other + 1]
+        better = False
+        for (objective, value) in enumerate(candidate):
+            worse = worse | (value < low[objective])
+            better = better | (value > high[objective])
+        dominated |= better & ~worse
+    return ~dominated & ~missing
+
+
+def pareto_fronts(cube, axes, objectives=PARETO_OBJECTIVES, tolerances=None):
+    """Pareto fronts of the strategies in the cells of `cube`.
+
+    `axes` are those of `analysis.cube.dense`, the strategies last. The
+    objectives are compared on their mean, those missing from the cube are
+    left out. `tolerances` are relative margins per objective name. Returns
+    the mask of the strategies on the front of each cell.
+    """
+    objectives = [(name, sense) for (name, sense) in objectives if name in cube["sum"]]
+    tolerances = tolerances or dict()
+    values = np.stack([dense(cube, name, axes) for (name, _) in objectives], axis=-1)
+    return front(
+        values,
+        [sense for (_, sense) in objectives],
+        [tolerances.get(name, 0) for (name, _) in objectives],
+    )
@@ -0,0 +1,147 @@
+"""Compact callback responses.
+
+The figures returned by the callbacks carry every point as JSON text, and the
+labels of the points, such as run ids, once per point, and each one has a
+copy of the same template. Their arrays are encoded once the response is built
+instead: numbers as base64 typed arrays, repeated strings as codes into their
+distinct values, and arrays of rows column by column, while a template is sent
+with its first figure only. The page decodes them back before they reach the
+graphs (see `dashboard/assets/payloads.js`), and the responses are gzipped.
+"""
+
+import base64
+import json
+
+import numpy as np
+from flask import request
+from flask_compress import Compress
+
+# Shorter arrays are left as they are
+PAYLOADS_MIN_LENGTH = 16
+
+# The page decodes the responses of the callbacks before applying them
+RENDERER = """var renderer = new DashRenderer({
+    request_post: (payload, response) => dissec_payloads.decode(response),
+});"""
+
+
+def compact(app):
+    """Encode the figures of the responses of `app` and compress them"""
+    app.renderer = RENDERER
+    server = app.server
+    # Apps sharing a server encode its responses once
+    if "dissec_payloads" in server.extensions:
+        return
+    server.extensions["dissec_payloads"] = True
+
+    Compress(server)
+
+    # Registered after compression, so run before it
+    @server.after_request
+    def compact_response(response):
+        if (
+            not request.path.endswith("_dash-update-component")
+            or response.status_code != 200
+            or response.mimetype != "application/json"
+        ):
+            return response
+
+        body = json.loads(response.get_data())
+        _encode_figures(body, dict())
+        response.set_data(json.dumps(body, separators=(",", ":")))
+        return response
+
+
+def _encode_figures(value, templates):
+    """Encode in place the figures found in `value`.
+
+    `templates` are the ids of the templates already sent, per JSON text.
+    """
+    if isinstance(value, list):
+        for item in value:
+            _encode_figures(item, templates)
+    elif isinstance(value, dict):
+        for (key, item) in value.items():
+            if (
+                key == "figure"
+                and isinstance(item, dict)
+                and isinstance(item.get("data"), list)
+            ):
+                for trace in item["data"]:
+                    _encode_attributes(trace)
+                _share_template(item.get("layout"), templates)
+            else:
+                _encode_figures(item, templates)
+
+
+def _share_template(layout, templates):
+    if not isinstance(layout, dict) or not isinstance(layout.get("template"), dict):
+        return
+    text = json.dumps(layout["template"], sort_keys=True)
+    if text in templates:
+        layout["template"] = dict(dtype="shared", id=templates[text])
+        return
+    templates[text] = len(templates)
+    layout["template"] = dict(
+        dtype="shared", id=templates[text], value=layout["template"]
+    )
+
+
+def _encode_attributes(attributes):
+    for (key, value) in attributes.items():
+        if isinstance(value, list):
+            attributes[key] = encode_array(value)
+        elif isinstance(value, dict):
+            _encode_attributes(value)
+
+
+def _typed(array, dtype):
+    return dict(
+        dtype=dtype,
+        bdata=base64.b64encode(array.astype(f"<{dtype}").tobytes()).decode(),
+    )
+
+
+def encode_array(values):
+    """`values` encoded, or as they are when they would not be shorter.
+
+    Numbers are typed arrays of dtype "i4" or "f8", the latter with NaN for
+    missing values. Strings, None for missing ones, are "codes" into their
+    distinct "values". Arrays of rows of the same length are "columns".
+    """
+    if len(values) < PAYLOADS_MIN_LENGTH:
+        return values
+
+    if all(isinstance(v, list) for v in values):
+        if len(set(map(len, values))) != 1 or not values[0]:
+            return values
+        return dict(
+            dtype="columns",
+            columns=[encode_array(list(column)) for column in zip(*values)],
+        )
+
+    if all(isinstance(v, str) or v is None for v in values):
+        uniques, codes = np.unique(
+            ["" if v is None else v for v in values], return_inverse=True
+        )
+        if len(uniques) > len(values) / 2:
+            return values
+        uniques = uniques.tolist()
+        codes = codes.astype(np.int32)
+        if None in values:
+            codes[[v is None for v in values]] = -1
+        return dict(dtype="codes", codes=_typed(codes, "i4"), values=uniques)
+
+    if not all(
+        v is None or (isinstance(v, (int, float)) and not isinstance(v, bool))
+        for v in values
+    ):
+        return values
+    array = np.array(values, dtype=np.float64)
+    if (
+        None not in values
+        and np.all(np.mod(array, 1) == 0)
+        and np.all(np.abs(array) < 2**31)
+    ):
+        return _typed(array, "i4")
+    return _typed(array, "f8")
@@ -0,0 +1,120 @@
+"""Runs indexed by their parameters.
+
+The runs are sorted once under a MultiIndex of their parameters, so that the
+runs of any value of a parameter, within those of given values of the
+parameters before it, are a contiguous slice found by binary search. A subset
+fixing some parameters is resolved into such slices level by level, rather
+than by comparing every run, and returned in the order of the runs.
+
+The index is built once per dataset, see `analysis.datasets.get_run_index`,
+and narrowed to the ranges of the sliders by `RunIndex.within` rather than
+rebuilt on the runs within them.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+
+# Parameters indexing the runs, those present in the frame, outermost first
+RUN_INDEX_LEVELS = [
+    "strategy",
+    "depth",
+    "group_size",
+    "model_size",
+    "failure_probability",
+    "failure_window",
+    "seed",
+]
+
+
+class RunIndex:
+    """Runs of `df` sorted under a MultiIndex of `levels`"""
+
+    def __init__(self, df, levels=RUN_INDEX_LEVELS):
+        self.df = df
+        # Conditions of `within`, applied to every query
+        self.conditions = []
+        levels = [level for level in levels if level in df.columns]
+        codes = []
+        values = []
+        for level in levels:
+            # Missing values get the code -1, so they are sorted first
+            level_codes, level_values = pd.factorize(df[level], sort=True)
+            codes.append(level_codes)
+            values.append(level_values)
+        # Positions of the runs in the order of the index
+        self.order = np.lexsort(codes[::-1]) if levels else np.arange(len(df))
+        self.index = pd.MultiIndex(
+            levels=values,
+            codes=[level_codes[self.order] for level_codes in codes],
+            names=levels,
+        )
+
+    @property
+    def nbytes(self):
+        """Memory used by the index, the frame is not copied"""
+        return self.order.nbytes + self.index.nbytes
+
+    def within(self, **conditions):
+        """The same index, whose queries only return runs matching `conditions`"""
+        self._check(conditions)
+        narrowed = copy.copy(self)
+        narrowed.conditions = self.conditions + list(conditions.items())
+        return narrowed
+
+    def query(self, **conditions):
+        """Runs whose parameters match every condition, in the order of `df`.
+
+        Like `analysis.cube.select`, a condition is a `(low, high)` tuple
+        (bounds included), a list of accepted values, or a value.
+        """
+        self._check(conditions)
+        conditions = self.conditions + list(conditions.items())
+        depth = max(
+            (self.index.names.index(name) + 1 for (name, _) in conditions), default=0
+        )
+
+        starts = np.array([0])
+        stops = np.array([len(self.order)])
+        for level in range(depth):
+            name = self.index.names[level]
+            accepted = self._codes(level, None)
+            for (condition_name, condition) in conditions:
+                if condition_name == name:
+                    accepted = np.intersect1d(accepted, self._codes(level, condition))
+            codes = self.index.codes[level]
+            # Within a slice the previous levels are fixed, this one is sorted
+            slices = [
+                start + np.searchsorted(codes[start:stop], accepted, side)
+                for side in ("left", "right")
+                for (start, stop) in zip(starts, stops)
+            ]
+            bounds = np.concatenate([[], *slices]).astype(int).reshape(2, -1)
+            kept = bounds[1] > bounds[0]
+            starts, stops = bounds[:, kept]
+
+        positions = [self.order[start:stop] for (start, stop) in zip(starts, stops)]
+        return self.df.iloc[np.sort(np.concatenate([[], *positions]).astype(int))]
+
+    def _check(self, conditions):
+        unknown = set(conditions).difference(self.index.names)
+        if unknown:
+            raise KeyError(f"Runs are not indexed by {', '.join(sorted(unknown))}")
+
+    def _codes(self, level, condition):
+        """Sorted codes of the values of `level` accepted by `condition`"""
+        values = self.index.levels[level]
+        if condition is None:
+            # Missing values included
+            return np.arange(-1, len(values))
+        if isinstance(condition, tuple):
+            low, high = condition
+            return np.arange(
+                values.searchsorted(low, side="left"),
+                values.searchsorted(high, side="right"),
+            )
+        if not isinstance(condition, list):
+            condition = [condition]
+        codes = values.get_indexer(condition)
+        return np.unique(codes[codes >= 0])
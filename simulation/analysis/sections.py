@@ -0,0 +1,178 @@
+"""Collapsible sections of figures.
+
+A section is a titled group of figures drawn by a callback of its own, from
+the inputs it declares only. Changing a filter redraws the open sections that
+use it, and a closed section costs nothing until it is opened.
+
+A section of a small dataset may also be drawn by a clientside callback,
+from the columns sent to the page once (see `analysis.clientside`). When the
+selected file is too large to be sent, the section is drawn on the server
+instead and the clientside callback shows the figures it receives.
+
+A section may be drawn group by group, by a generator yielding its children.
+In background mode a section is drawn by a job of `analysis.jobs` rather than
+on the request thread: the page shows the groups and the steps drawn so far,
+and receives the figures of each group as soon as the group is drawn. A job
+still running when the filters change again is cancelled.
+"""
+
+import inspect
+import time
+
+from dash import callback_context, dash, dcc, html
+from dash.exceptions import PreventUpdate
+
+from analysis import jobs
+from analysis.clientside import register_clientside
+
+# Period at which the page polls the job of a section, in milliseconds
+SECTIONS_POLL_INTERVAL = 500
+
+
+def section(name, title, opened=False):
+    """Layout of the `name` section, a toggle followed by its figures"""
+    return html.Div(
+        children=[
+            dcc.Checklist(
+                id=f"{name}-open",
+                options=[title],
+                value=[title] if opened else [],
+                labelStyle={"fontSize": "2em", "fontWeight": "bold"},
+            ),
+            html.Div(id=f"{name}-progress", children=[]),
+            html.Div(id=f"{name}-figures", children=[]),
+            # Drawn on the server for a clientside section of a large file
+            dcc.Store(id=f"{name}-drawn"),
+            # Used in background mode only, with the number of groups shown
+            dcc.Store(id=f"{name}-job"),
+            dcc.Store(id=f"{name}-shown"),
+            dcc.Interval(
+                id=f"{name}-poll", interval=SECTIONS_POLL_INTERVAL, disabled=True
+            ),
+        ]
+    )
+
+
+def register_section(app, name, generate, inputs, state=None, background=False):
+    """Draws the `name` section with `generate`.
+
+    `generate` is called with the values of `inputs` then `state` and returns
+    the children of the section, or yields them group by group. It runs when
+    the section is opened and when one of `inputs` changes while the section is
+    open, in a background job with `background`.
+    """
+    if background:
+        _register_background_section(app, name, generate, inputs, state)
+        return
+
+    @app.callback(
+        dash.Output(f"{name}-figures", "children"),
+        [dash.Input(f"{name}-open", "value")] + inputs,
+        state or [],
+    )
+    def update_section(opened, *values):
+        if not opened:
+            # Nothing to clear unless the section has just been closed
+            triggers = [t["prop_id"] for t in callback_context.triggered]
+            if f"{name}-open.value" not in triggers:
+                raise PreventUpdate
+            return []
+        return _children(generate(*values))
+
+
+def register_clientside_section(
+    app, name, function, inputs, columns, fallback=None, state=None, source=None
+):
+    """Draws the `name` section with `dash_clientside.dissec[function]`.
+
+    The function is called with whether the section is opened, then like by
+    `analysis.clientside.register_clientside`. `fallback` is called like
+    `generate` by `register_section`, when the section is opened.
+    """
+
+    def draw_on_server(opened, *values):
+        if not opened:
+            raise PreventUpdate
+        return _children(fallback(*values))
+
+    register_clientside(
+        app,
+        dash.Output(f"{name}-figures", "children"),
+        function,
+        [dash.Input(f"{name}-open", "value")] + inputs,
+        columns,
+        f"{name}-drawn",
+        draw_on_server if fallback else None,
+        state,
+        source,
+    )
+
+
+def _register_background_section(app, name, generate, inputs, state):
+    jobs.register(name, generate)
+
+    @app.callback(
+        dash.Output(f"{name}-job", "data"),
+        [dash.Input(f"{name}-open", "value")] + inputs,
+        (state or []) + [dash.State(f"{name}-job", "data")],
+    )
+    def submit_section(opened, *values):
+        *values, previous = values
+        if not opened:
+            triggers = [t["prop_id"] for t in callback_context.triggered]
+            if f"{name}-open.value" not in triggers:
+                raise PreventUpdate
+        if previous:
+            # Superseded, its figures would be replaced right away
+            jobs.cancel(previous)
+        return jobs.submit(name, *values) if opened else None
+
+    @app.callback(
+        [
+            dash.Output(f"{name}-figures", "children"),
+            dash.Output(f"{name}-progress", "children"),
+            dash.Output(f"{name}-poll", "disabled"),
+            dash.Output(f"{name}-shown", "data"),
+        ],
+        [
+            dash.Input(f"{name}-job", "data"),
+            dash.Input(f"{name}-poll", "n_intervals"),
+        ],
+        dash.State(f"{name}-shown", "data"),
+    )
+    def poll_section(job, _, shown):
+        if not job:
+            return [[], [], True, 0]
+        triggers = [t["prop_id"] for t in callback_context.triggered]
+        if f"{name}-job.data" in triggers:
+            # The groups shown are those of the previous job
+            shown = 0
+
+        status = jobs.poll(job)
+        drawn = status.get("parts", 0)
+        # The groups are sent again whenever one more is drawn
+        figures = jobs.parts(job, drawn) if drawn > (shown or 0) else dash.no_update
+        if status["status"] == "pending":
+            return [dash.no_update, "Waiting for a worker...", False, shown]
+        if status["status"] == "running":
+            elapsed = time.time() - status["started"]
+            progress = (
+                f"Drawing... {drawn} figure groups and {status['steps']} steps "
+                f"done in {elapsed:.0f} s"
+            )
+            return [figures, progress, False, max(drawn, shown or 0)]
+        if status["status"] == "cancelled":
+            return [dash.no_update, dash.no_update, True, shown]
+
+        jobs.forget(job)
+        if status["status"] == "error":
+            return [[], f"Could not draw the figures: {status['error']}", True, 0]
+        if "result" in status:
+            return [status["result"], [], True, 0]
+        # Cleared when there is no group at all, shown already otherwise
+        return [figures if drawn else [], [], True, drawn]
+
+
+def _children(drawn):
+    """Children of a section, joining the groups of a generator"""
+    return list(drawn) if inspect.isgenerator(drawn) else drawn
@@ -0,0 +1,75 @@
+"""Serving the dashboards.
+
+By default a dashboard runs on the development server, with the debugger and
+the reloader, and is set up in the background behind a loading page (see
+`analysis.startup`). With the production argument, it is served by several
+worker processes forked once the app is set up, all accepting connections on
+the same socket, each one with a few threads. The datasets are then shared
+between the workers (see `analysis.shared`) rather than loaded by each one.
+"""
+
+import os
+import signal
+import socket
+import sys
+
+from werkzeug.serving import is_running_from_reloader, make_server
+
+from analysis import datasets, startup
+
+SERVING_WORKERS = int(os.environ.get("DISSEC_WORKERS", os.cpu_count()))
+
+
+def serve(app):
+    """Run `app`, on the development server unless asked for production"""
+    if "production" not in sys.argv:
+        # The reloader serves from a child process, only it loads the data
+        if is_running_from_reloader():
+            startup.start()
+        app.run_server(debug=True)
+        return
+
+    serve_production(
+        app,
+        os.environ.get("HOST", "127.0.0.1"),
+        int(os.environ.get("PORT", 8050)),
+        SERVING_WORKERS,
+    )
+
+
+def serve_production(app, host, port, workers=SERVING_WORKERS):
+    """Serve `app` from `workers` processes until interrupted"""
+    # Imported here, Arrow is only required to serve with several processes
+    from analysis import shared
+
+    datasets.SHARED = True
+    # The workers are forked with the dashboard set up and its data shared
+    startup.wait()
+
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind((host, port))
+    listener.listen(128)
+
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            # The parent handles the interruption, workers are terminated
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+            server = make_server(
+                host, port, app.server, threaded=True, fd=listener.fileno()
+            )
+            server.serve_forever()
+            os._exit(0)
+        children.append(pid)
+
+    print(f"Serving on http://{host}:{port} with {workers} workers")
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+    finally:
+        shared.clear()
@@ -0,0 +1,84 @@
+"""Datasets shared by the processes serving a dashboard.
+
+A dataset is published once as an Arrow IPC file in shared memory, and every
+process maps it instead of holding its own copy: numeric columns without
+missing values are read in place, the other ones, such as strings and
+categories, are still materialized by each process. Mapped columns are read
+only, as the frames of the registry must be anyway.
+
+Each server publishes in a directory of its own, named after the process id
+of the server, from which its workers are forked, so that stopping it does not
+remove the datasets of another server running on the same host.
+"""
+
+import os
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+
+SHARED_DIR = os.environ.get(
+    "DISSEC_SHARED_DIR",
+    "/dev/shm/dissec" if os.path.isdir("/dev/shm") else "./outputs/.shared",
+)
+# Imported by the server before it forks, the workers inherit its directory
+SERVER_DIR = os.path.join(SHARED_DIR, str(os.getpid()))
+
+
+def _entry_path(key):
+    return os.path.join(SERVER_DIR, f"{key}.arrow")
+
+
+def attach(key):
+    """Map the dataset published under `key`, None when it is not published"""
+    try:
+        source = pa.memory_map(_entry_path(key))
+    except FileNotFoundError:
+        return None
+    # One block per column, otherwise pandas would copy them into 2D blocks
+    return ipc.open_file(source).read_all().to_pandas(split_blocks=True)
+
+
+def publish(key, df):
+    """Publish `df` under `key`, return whether it could be"""
+    os.makedirs(SERVER_DIR, exist_ok=True)
+    # Processes may publish concurrently, only complete files are made visible
+    tmp = f"{_entry_path(key)}.{os.getpid()}.tmp"
+    try:
+        table = pa.Table.from_pandas(df)
+        with pa.OSFile(tmp, "wb") as f:
+            with ipc.new_file(f, table.schema) as writer:
+                writer.write_table(table)
+        os.replace(tmp, _entry_path(key))
+    except (ValueError, TypeError, OSError) as e:
+        # Typically columns mixing strings and numbers, which Arrow rejects
+        print("Could not share the frame:", e)
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return False
+
+    return True
+
+
+def share(key, load):
+    """Dataset published under `key`, published from `load()` if it is not yet"""
+    df = attach(key)
+    if df is not None:
+        return df
+
+    df = load()
+    if not publish(key, df):
+        return df
+    # Mapped like in the other processes, the loaded copy is released
+    return attach(key)
+
+
+def clear():
+    """Remove the datasets published by this server"""
+    if not os.path.isdir(SERVER_DIR):
+        return
+    for name in os.listdir(SERVER_DIR):
+        try:
+            os.remove(os.path.join(SERVER_DIR, name))
+        except FileNotFoundError:
+            pass
+    os.rmdir(SERVER_DIR)
@@ -0,0 +1,108 @@
+"""Mergeable quantile sketch.
+
+`QuantileSketch` is a KLL sketch (Karnin, Lang and Liberty, "Optimal Quantile
+Approximation in Streams", 2016). It keeps O(k log(n / k)) of the n values it
+is fed, and two sketches merge into the sketch of both streams, so quantiles
+over any set of cells are obtained without going back to the runs.
+
+Error bound: with the default k = 200, the rank of an estimated quantile is
+within about 1.7% of n of the true rank with 99% confidence. Minimum and
+maximum are always exact, and as long as a sketch holds fewer than k values
+nothing is discarded and its quantiles are exact, interpolated like pandas.
+"""
+
+import numpy as np
+
+SKETCH_K = 200
+
+
+class QuantileSketch:
+    def __init__(self, k=SKETCH_K, seed=0):
+        self.k = k
+        self.count = 0
+        self.min = np.inf
+        self.max = -np.inf
+        # Values of level h each stand for 2**h values of the stream
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_values(cls, values, k=SKETCH_K):
+        sketch = cls(k)
+        sketch.update(values)
+        return sketch
+
+    def update(self, values):
+        """Add the non missing `values` to the stream"""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+
+        self.count += len(values)
+        self.min = min(self.min, values.min())
+        self.max = max(self.max, values.max())
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """Fold `other` into this sketch"""
+        if other.count == 0:
+            return self
+
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for (h, values) in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], values])
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def quantiles(self, q):
+        """Estimated quantiles of the stream for each fraction in `q`"""
+        q = np.asarray(q, dtype=np.float64)
+        if self.count == 0:
+            return np.full(len(q), np.nan)
+        if len(self.levels) == 1:
+            # Nothing was compacted yet, the values are all there
+            return np.quantile(self.levels[0], q)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate(
+            [np.full(len(level), 2**h) for (h, level) in enumerate(self.levels)]
+        )
+        order = np.argsort(values, kind="stable")
+        values = values[order]
+        ranks = np.cumsum(weights[order])
+
+        indices = np.searchsorted(ranks, q * self.count, side="left")
+        result = values[np.clip(indices, 0, len(values) - 1)]
+        result[q <= 0] = self.min
+        result[q >= 1] = self.max
+        return result
+
+    def _capacity(self, h):
+        # Lower levels get geometrically smaller, the top one holds k values
+        return max(2, int(np.ceil(self.k * (2 / 3) ** (len(self.levels) - h - 1))))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                # With an odd count, the largest value stays at this level
+                odd = len(level) % 2
+                paired = level[: len(level) - odd]
+                promoted = paired[self._rng.integers(2) :: 2]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                self.levels[h] = level[len(level) - odd :]
+            h += 1
+
+    def __sizeof__(self):
+        return object.__sizeof__(self) + sum(level.nbytes for level in self.levels)
@@ -0,0 +1,125 @@
+"""Deferred startup of the dashboards.
+
+Building a dashboard loads its file, which takes from seconds to minutes. The
+development server rather starts listening at once, with a loading page, while
+the file is loaded and the layout and callbacks of the dashboards are set up in
+a background thread. The loading page polls the server and reloads itself once
+its dashboard is ready, or shows why it could not be set up.
+"""
+
+import threading
+import time
+import traceback
+
+from dash import dash, dcc, html
+from dash.exceptions import PreventUpdate
+
+# Period at which the loading page polls the server, in milliseconds
+STARTUP_POLL_INTERVAL = 500
+
+# Setups of the dashboards per app, not started yet
+_pending = dict()
+# Functions applied to the layout of an app once it is set up
+_decorators = dict()
+_threads = []
+
+
+def defer(app, setup, title):
+    """Serve a loading page titled `title` on `app` until `setup` has run.
+
+    `setup` sets the layout of `app` and registers its callbacks. It runs once
+    `start` or `wait` is called. Returns `app`.
+    """
+    state = dict(ready=False, error=None)
+
+    def run():
+        start = time.time()
+        try:
+            setup()
+        except Exception as e:
+            traceback.print_exc()
+            state["error"] = repr(e)
+            return
+        # The loading components stay, their callbacks would be missing them
+        layout = html.Div(children=[_loading(title, False), app.layout])
+        for decorator in _decorators.get(app, []):
+            layout = decorator(layout)
+        app.layout = layout
+        state["ready"] = True
+        print(f"{title} set up in {time.time() - start:.2f}s")
+
+    app.layout = _loading(title, True)
+    _pending[app] = run
+
+    @app.callback(
+        [
+            dash.Output("startup-ready", "data"),
+            dash.Output("startup-status", "children"),
+            dash.Output("startup-poll", "disabled"),
+        ],
+        dash.Input("startup-poll", "n_intervals"),
+    )
+    def poll_startup(polls):
+        # Not on the initial call, the page of a ready dashboard would reload
+        if not polls:
+            raise PreventUpdate
+        if state["error"]:
+            return [False, f"Could not load the dashboard: {state['error']}", True]
+        if not state["ready"]:
+            raise PreventUpdate
+        return [True, dash.no_update, True]
+
+    app.clientside_callback(
+        "ready => { if (ready) { window.location.reload() } return ready }",
+        dash.Output("startup-ready", "modified_timestamp"),
+        dash.Input("startup-ready", "data"),
+    )
+    return app
+
+
+def _loading(title, loading):
+    """Components of the loading page, idle and empty unless `loading`"""
+    status = []
+    if loading:
+        status = [
+            html.H1(
+                children=title,
+                style={"textAlign": "center", "color": "#7FDBFF"},
+            ),
+            html.P("Loading the data...", style={"textAlign": "center"}),
+        ]
+    return html.Div(
+        children=[
+            dcc.Store(id="startup-ready"),
+            dcc.Interval(
+                id="startup-poll", interval=STARTUP_POLL_INTERVAL, disabled=not loading
+            ),
+            html.Div(id="startup-status", children=status),
+        ]
+    )
+
+
+def decorate(app, decorator):
+    """Replace the layout of `app` by `decorator(layout)`, also once set up"""
+    _decorators.setdefault(app, []).append(decorator)
+    app.layout = decorator(app.layout)
+
+
+def start():
+    """Set up the deferred dashboards in the background.
+
+    They are set up one after the other, so that a file shared by several of
+    them is loaded once.
+    """
+    runs = list(_pending.values())
+    _pending.clear()
+    thread = threading.Thread(target=lambda: [run() for run in runs], daemon=True)
+    thread.start()
+    _threads.append(thread)
+
+
+def wait():
+    """Set up the deferred dashboards, return once they are"""
+    start()
+    for thread in _threads:
+        thread.join()
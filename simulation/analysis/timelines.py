@@ -0,0 +1,199 @@
+"""Downsampled WebGL timelines.
+
+A timeline plots every message of the selected runs, which is more than the
+browser can draw once the runs are large. Only the part of the time axis that
+is visible is sent, downsampled with Largest-Triangle-Three-Buckets (Sveinn
+Steinarsson, 2013) to `TIMELINE_MAX_POINTS` points per figure, and the
+dashboards recompute a figure from its `relayoutData` when it is zoomed, so the
+full detail shows up once the window is small enough.
+
+Replaying a simulation shows the messages up to a time. `TimeIndex` keeps the
+messages sorted by time within each run and type, so that those of any
+selection up to any time are found by binary search rather than by comparing
+the time of every message. Played back, a timeline is extended with the
+messages of each frame only, see `extension`.
+"""
+
+import numpy as np
+import pandas as pd
+import plotly_express as px
+
+# Points sent per figure at most
+TIMELINE_MAX_POINTS = 5000
+# Milliseconds between two frames of a replay, and frames of a whole replay
+PLAYBACK_INTERVAL = 500
+PLAYBACK_FRAMES = 100
+
+
+def lttb(x, y, n):
+    """Positions of the `n` points of the series kept by LTTB.
+
+    `x` is sorted. The first and last points are always kept, every other
+    point is the one of its bucket forming the largest triangle with the point
+    kept before it and the average of the next bucket.
+    """
+    size = len(x)
+    if n >= size or n < 3:
+        return np.arange(size)
+
+    # n - 2 buckets between the first and last points
+    edges = np.linspace(1, size - 1, n - 1).astype(int)
+    kept = np.empty(n, dtype=int)
+    kept[0] = 0
+    kept[-1] = size - 1
+    for i in range(n - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 3 < n:
+            next_x, next_y = x[end : edges[i + 2]].mean(), y[end : edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        a_x, a_y = x[kept[i]], y[kept[i]]
+        areas = np.abs(
+            (a_x - next_x) * (y[start:end] - a_y)
+            - (a_x - x[start:end]) * (next_y - a_y)
+        )
+        kept[i + 1] = start + np.argmax(areas)
+
+    return kept
+
+
+def downsample(df, x, y, by=None, window=None, max_points=TIMELINE_MAX_POINTS):
+    """Rows of `df` plotted when (`x`, `y`) is drawn for `x` within `window`.
+
+    Each series, per value of `by`, keeps three points and a share of the rest
+    of `max_points` proportional to its length in the window. When there are
+    too many series for that, the `max_points` longest share the budget evenly
+    and the others are dropped. The rows are returned whole, sorted on `x`.
+    """
+    df = df[df[x].notna() & df[y].notna()]
+    if window is not None:
+        df = df[df[x].between(*window)]
+    if len(df) <= max_points:
+        return df
+
+    df = df.sort_values(x, kind="stable")
+    xs = df[x].to_numpy(dtype=np.float64)
+    ys = df[y].to_numpy(dtype=np.float64)
+    series = (
+        df.groupby(by, observed=True, sort=False).indices
+        if by
+        else {None: np.arange(len(df))}
+    )
+
+    series = list(series.values())
+    if 3 * len(series) <= max_points:
+        spare = max_points - 3 * len(series)
+        counts = [3 + spare * len(positions) // len(df) for positions in series]
+    else:
+        series = sorted(series, key=len, reverse=True)[:max_points]
+        counts = [max_points // len(series)] * len(series)
+
+    kept = []
+    for (positions, n) in zip(series, counts):
+        if n < 3:
+            # Too few points for LTTB, the ends of the series
+            ends = np.linspace(0, len(positions) - 1, n).astype(int)
+            kept.append(positions[np.unique(ends)])
+        else:
+            kept.append(positions[lttb(xs[positions], ys[positions], n)])
+
+    return df.iloc[np.sort(np.concatenate(kept))]
+
+
+class TimeIndex:
+    """Messages sorted on `time` per run and message type"""
+
+    def __init__(self, messages, time):
+        self.messages = messages.sort_values(["run", "type", time], kind="stable")
+        # Missing times are sorted last, they are never before a given time
+        self.times = self.messages[time].to_numpy(dtype=np.float64)
+        groups = self.messages.groupby(["run", "type"], observed=True, sort=False)
+        self.bounds = {
+            key: (positions[0], positions[-1] + 1)
+            for (key, positions) in groups.indices.items()
+        }
+
+    def until(self, runs, types, time):
+        """Messages of `runs` whose type is in `types`, at `time` or before"""
+        return self.between(runs, types, -np.inf, time)
+
+    def between(self, runs, types, start, end):
+        """Messages of `runs` whose type is in `types`, after `start` until `end`"""
+        slices = []
+        for run in runs:
+            for message_type in types:
+                if (run, message_type) not in self.bounds:
+                    continue
+                first, last = self.bounds[(run, message_type)]
+                low, high = first + np.searchsorted(
+                    self.times[first:last], [start, end], side="right"
+                )
+                slices.append((low, high))
+
+        if len(slices) == 1:
+            # A single group is a contiguous slice, which is not copied
+            return self.messages.iloc[slices[0][0] : slices[0][1]]
+        positions = [np.arange(start, stop) for (start, stop) in slices]
+        return self.messages.iloc[np.concatenate(positions) if positions else []]
+
+
+def visible_range(relayout, axis="xaxis"):
+    """`(low, high)` range of `axis` after a relayout, None when autoscaled"""
+    if not relayout:
+        return None
+    if f"{axis}.range[0]" in relayout:
+        return (relayout[f"{axis}.range[0]"], relayout[f"{axis}.range[1]"])
+    if f"{axis}.range" in relayout:
+        return tuple(relayout[f"{axis}.range"])
+    return None
+
+
+def moves_range(relayout, axis="xaxis"):
+    """Whether a relayout zooms, pans or autoscales `axis`"""
+    return any(key.startswith(f"{axis}.range") for key in relayout or {}) or (
+        f"{axis}.autorange" in (relayout or {})
+    )
+
+
+def timeline(df, x, y, color=None, relayout=None, categories=None, **kwargs):
+    """`px.scatter` of the messages of `df` in WebGL, downsampled to the window.
+
+    The window is the visible range of the x axis in `relayout`, the last
+    `relayoutData` of the graph, and the whole timeline without it. With
+    `categories`, there is a trace per value of `color` in that order, even for
+    values without messages, so that the timeline can be extended.
+    """
+    window = visible_range(relayout)
+    df = downsample(df, x, y, color, window)
+    if categories is not None:
+        # A message without coordinates, which is not drawn, per missing value
+        missing = set(categories).difference(df[color])
+        if missing:
+            df = pd.concat(
+                [df, pd.DataFrame({color: list(missing)})], ignore_index=True
+            )
+        kwargs["category_orders"] = {color: list(categories)}
+    fig = px.scatter(
+        df,
+        x=x,
+        y=y,
+        color=color,
+        render_mode="webgl",
+        **kwargs,
+    )
+    if window is not None:
+        fig.update_xaxes(range=window)
+    # Keeps the zoom of the user when the figure is replaced
+    return fig.update_layout(uirevision=x)
+
+
+def extension(fig, names):
+    """`extendData` appending the traces of `fig` to those of the same name.
+
+    `names` are the names of the traces of the extended figure, in order.
+    """
+    data = dict()
+    for key in ["x", "y", "hovertext", "customdata"]:
+        if fig.data and fig.data[0][key] is not None:
+            data[key] = [trace[key] for trace in fig.data]
+    return [data, [list(names).index(trace.name) for trace in fig.data]]
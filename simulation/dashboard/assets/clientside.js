@@ -0,0 +1,307 @@
+// Clientside callbacks of the dashboards on small datasets, see
+// analysis/clientside.py for the data they are given. Each one is given last
+// the children drawn on the server, shown when the file is too large for the
+// data to be sent
+
+// Colors of plotly express, in the same order
+const COLORS = [
+  '#636EFA',
+  '#EF553B',
+  '#00CC96',
+  '#AB63FA',
+  '#FFA15A',
+  '#19D3F3',
+  '#FF6692',
+  '#B6E880',
+  '#FF97FF',
+  '#FECB52'
+]
+
+const component = (namespace, type, props) => ({ namespace, type, props })
+const html = (type, props) => component('dash_html_components', type, props)
+const graph = (id, figure) =>
+  component('dash_core_components', 'Graph', { id, figure })
+const row = children =>
+  html('Div', {
+    style: {
+      display: 'flex',
+      'flex-direction': 'row',
+      'justify-content': 'center'
+    },
+    children
+  })
+
+// Value of `column` at `row`, null when missing
+const value = (data, column, row) => {
+  const values = data.columns[column]
+  if (Array.isArray(values)) {
+    return values[row]
+  }
+  const code = values.codes[row]
+  return code < 0 ? null : values.values[code]
+}
+
+// Rows within every range, given in the order of `data.filters`
+const filter = (data, ranges) => {
+  const rows = []
+  for (let i = 0; i < data.rows; i++) {
+    const kept = data.filters.every((column, f) => {
+      const v = value(data, column, i)
+      return v !== null && v >= ranges[f][0] && v <= ranges[f][1]
+    })
+    if (kept) {
+      rows.push(i)
+    }
+  }
+  return rows
+}
+
+// Rows per value of `column`, in order of appearance like pd.unique
+const groups = (data, rows, column) => {
+  const grouped = new Map()
+  for (const i of rows) {
+    const v = value(data, column, i)
+    if (!grouped.has(v)) {
+      grouped.set(v, [])
+    }
+    grouped.get(v).push(i)
+  }
+  return grouped
+}
+
+// Linear interpolation between the closest ranks, like pandas
+const quantile = (sorted, q) => {
+  const position = (sorted.length - 1) * q
+  const low = Math.floor(position)
+  const high = Math.ceil(position)
+  return sorted[low] + (sorted[high] - sorted[low]) * (position - low)
+}
+
+const numbers = (data, column, rows) =>
+  rows.map(i => value(data, column, i)).filter(v => v !== null)
+
+const percent = v => (v === null || isNaN(v) ? 'nan' : Math.round(v * 10000) / 100)
+
+// Traces of analysis/boxes.py `box`, the boxes computed here
+const boxTraces = (data, rows, spec) => {
+  const traces = []
+  let color = 0
+  for (const [name, group] of groups(data, rows, spec.color)) {
+    const style = {
+      name: String(name),
+      legendgroup: String(name),
+      offsetgroup: String(name),
+      marker: { color: COLORS[color++ % COLORS.length] }
+    }
+    const boxes = [...groups(data, group, spec.x)].sort(([a], [b]) =>
+      a < b ? -1 : a > b ? 1 : 0
+    )
+    const statistics = boxes.map(([, box]) => {
+      const values = numbers(data, spec.y, box).sort((a, b) => a - b)
+      const q1 = quantile(values, 0.25)
+      const q3 = quantile(values, 0.75)
+      const inside = values.filter(
+        v => v >= q1 - 1.5 * (q3 - q1) && v <= q3 + 1.5 * (q3 - q1)
+      )
+      return {
+        q1,
+        median: quantile(values, 0.5),
+        q3,
+        lowerfence: inside[0],
+        upperfence: inside[inside.length - 1]
+      }
+    })
+    traces.push({
+      type: 'box',
+      x: boxes.map(([x]) => x),
+      q1: statistics.map(s => s.q1),
+      median: statistics.map(s => s.median),
+      q3: statistics.map(s => s.q3),
+      lowerfence: statistics.map(s => s.lowerfence),
+      upperfence: statistics.map(s => s.upperfence),
+      boxpoints: false,
+      ...style
+    })
+
+    // At most `box_max_points` points per box, evenly spread over its runs
+    const shown = []
+    for (const [, box] of boxes) {
+      const points = box.filter(i => value(data, spec.y, i) !== null)
+      const step = Math.ceil(points.length / data.box_max_points)
+      shown.push(...points.filter((_, p) => p % step === 0))
+    }
+    traces.push({
+      type: 'box',
+      x: shown.map(i => value(data, spec.x, i)),
+      y: shown.map(i => value(data, spec.y, i)),
+      hovertext: shown.map(i => value(data, 'run_id', i)),
+      boxpoints: 'all',
+      jitter: 0.3,
+      pointpos: 0,
+      line: { width: 0 },
+      fillcolor: 'rgba(0,0,0,0)',
+      hoveron: 'points',
+      showlegend: false,
+      ...style
+    })
+  }
+
+  return {
+    data: traces,
+    layout: {
+      title: { text: spec.title },
+      boxmode: 'group',
+      legend: { title: { text: spec.color } },
+      xaxis: { title: { text: spec.x } },
+      yaxis: { title: { text: spec.y } }
+    }
+  }
+}
+
+// Traces of `px.scatter` colored by `spec.color`
+const scatterTraces = (data, rows, spec) => {
+  const traces = []
+  let color = 0
+  for (const [name, group] of groups(data, rows, spec.color)) {
+    traces.push({
+      type: 'scatter',
+      mode: 'markers',
+      name: String(name),
+      legendgroup: String(name),
+      marker: { color: COLORS[color++ % COLORS.length] },
+      x: group.map(i => value(data, spec.x, i)),
+      y: group.map(i => value(data, spec.y, i)),
+      hovertext: group.map(i => value(data, 'run_id', i)),
+      hovertemplate: `<b>%{hovertext}</b><br><br>${spec.color}=${name}<br>${spec.x}=%{x}<br>${spec.y}=%{y}<extra></extra>`
+    })
+  }
+
+  return {
+    data: traces,
+    layout: {
+      title: { text: spec.title },
+      legend: { title: { text: spec.color }, tracegroupgap: 0 },
+      xaxis: { title: { text: spec.x } },
+      yaxis: { title: { text: spec.y } }
+    }
+  }
+}
+
+window.dash_clientside = Object.assign({}, window.dash_clientside, {
+  dissec: {
+    // Children of the summary, like `generate_summary`
+    summary: function(...args) {
+      const drawn = args.pop()
+      const data = args[args.length - 1]
+      if (!data) {
+        return drawn || window.dash_clientside.no_update
+      }
+      const rows = filter(data, args)
+      const perStatus = groups(data, rows, 'status')
+      const perStrategy = groups(data, rows, 'strategy')
+      const successes = (perStatus.get('Success') || []).length
+
+      const statistics = (group, column) => {
+        const values = numbers(data, column, group).sort((a, b) => a - b)
+        if (values.length === 0) {
+          return 'min=nan%; avg=nan%; med=nan%; max=nan%'
+        }
+        const mean = values.reduce((a, b) => a + b, 0) / values.length
+        return [
+          `min=${percent(values[0])}%`,
+          `avg=${percent(mean)}%`,
+          `med=${percent(quantile(values, 0.5))}%`,
+          `max=${percent(values[values.length - 1])}%`
+        ].join('; ')
+      }
+
+      return html('Div', {
+        style: { justifyContent: 'center' },
+        children: [
+          html('H1', { children: 'Overview:' }),
+          html('Ul', {
+            children: [
+              html('Li', {
+                children: [
+                  `There are ${rows.length} simulations. ${successes} success, ${rows.length - successes} failures`,
+                  html('Ul', {
+                    children: data.columns.status.values.map(status => {
+                      const group = perStatus.get(status) || []
+                      return html('Li', {
+                        children: `${group.length} have status ${status}.
+                            Theoretical failure rate (${statistics(group, 'failure_probability')}).
+                            Observed failure rate (${statistics(group, 'failure_rate')})`
+                      })
+                    })
+                  })
+                ]
+              }),
+              html('Li', {
+                children: [
+                  'Different strategies have been used:',
+                  html('Ul', {
+                    children: data.columns.strategy.values.map(strategy => {
+                      const group = perStrategy.get(strategy) || []
+                      const success = group.filter(
+                        i => value(data, 'status', i) === 'Success'
+                      ).length
+                      return html('Li', {
+                        children: [
+                          `${group.length} runs using ${strategy} strategy, ${success} success`
+                        ]
+                      })
+                    })
+                  })
+                ]
+              })
+            ]
+          })
+        ]
+      })
+    },
+
+    // Children of a section of box plots, one per spec of `data.boxes[tab]`
+    boxes: function(opened, ...args) {
+      const drawn = args.pop()
+      const data = args[args.length - 1]
+      const tab = args[args.length - 2]
+      if (!opened || opened.length === 0) {
+        return []
+      }
+      if (!data) {
+        return drawn || []
+      }
+      const rows = filter(data, args)
+      return data.boxes[tab].map(specs =>
+        row(specs.map(spec => graph(spec.id, boxTraces(data, rows, spec))))
+      )
+    },
+
+    // Children of a section of scatters, one per spec of `data.scatters`
+    // whose strategy is among the filtered runs
+    scatters: function(opened, ...args) {
+      const drawn = args.pop()
+      const data = args[args.length - 1]
+      if (!opened || opened.length === 0) {
+        return []
+      }
+      if (!data) {
+        return drawn || []
+      }
+      const rows = filter(data, args)
+      const strategies = groups(data, rows, 'strategy')
+      return data.scatters.map(specs =>
+        row(
+          specs
+            .filter(spec => strategies.has(spec.strategy))
+            .map(spec =>
+              graph(
+                spec.id,
+                scatterTraces(data, strategies.get(spec.strategy), spec)
+              )
+            )
+        )
+      )
+    }
+  }
+})
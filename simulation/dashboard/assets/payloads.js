@@ -0,0 +1,62 @@
+// Decoding of the arrays encoded by analysis/payloads.py in the responses of
+// the callbacks, before they are applied to the page
+
+const TYPED_ARRAYS = { i4: Int32Array, f8: Float64Array }
+
+const typed = ({ dtype, bdata }) => {
+  const bytes = Uint8Array.from(atob(bdata), c => c.charCodeAt(0))
+  return new TYPED_ARRAYS[dtype](bytes.buffer)
+}
+
+// Plain array of `encoded`, the missing values null
+const array = encoded => {
+  if (encoded.dtype === 'codes') {
+    return Array.from(typed(encoded.codes), code =>
+      code < 0 ? null : encoded.values[code]
+    )
+  }
+  if (encoded.dtype === 'columns') {
+    const columns = encoded.columns.map(column => decodeValue(column, {}))
+    return Array.from(columns[0], (_, row) => columns.map(column => column[row]))
+  }
+  return Array.from(typed(encoded), v => (isNaN(v) ? null : v))
+}
+
+// `value` decoded in place, its shared values found in `shared` per id
+const decodeValue = (value, shared) => {
+  if (Array.isArray(value)) {
+    value.forEach((item, i) => {
+      value[i] = decodeValue(item, shared)
+    })
+  } else if (value !== null && typeof value === 'object') {
+    if (value.dtype === 'shared') {
+      // A copy per figure, plotly.js may modify it
+      return JSON.parse(shared[value.id])
+    }
+    if (value.bdata !== undefined || ['codes', 'columns'].includes(value.dtype)) {
+      return array(value)
+    }
+    for (const key of Object.keys(value)) {
+      value[key] = decodeValue(value[key], shared)
+    }
+  }
+  return value
+}
+
+// Values sent once per response, wherever they are first
+const sharedValues = (value, shared) => {
+  if (Array.isArray(value)) {
+    value.forEach(item => sharedValues(item, shared))
+  } else if (value !== null && typeof value === 'object') {
+    if (value.dtype === 'shared' && value.value !== undefined) {
+      shared[value.id] = JSON.stringify(value.value)
+    } else {
+      Object.values(value).forEach(item => sharedValues(item, shared))
+    }
+  }
+  return shared
+}
+
+const decode = value => decodeValue(value, sharedValues(value, {}))
+
+window.dissec_payloads = { decode }
@@ -1,9 +1,24 @@
 import plotly_express as px
 from dash import html, dcc, dash
+from dash.exceptions import PreventUpdate
 import numpy as np
 import pandas as pd
 import json
 from glob import glob
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis import jobs
+from analysis.boxes import BOX_MAX_POINTS, box
+from analysis.clientside import encode, fits, register_clientside
+from analysis.cube import roll_up, select, snap
+from analysis.datasets import dataset_key, get_cube, get_dataset
+from analysis.figures import get_figures
+from analysis.payloads import compact
+from analysis.sections import register_clientside_section, register_section, section
+from analysis.serving import serve
+from analysis.startup import defer
 
 tabs = [
     dict(label="Probabilité de panne", value="failure_probability"),
@@ -11,79 +26,22 @@ tabs = [
     dict(label="Fanout", value="fanout"),
     dict(label="Profondeur", value="depth"),
 ]
-roles = ["Aggregator", "LeafAggregator", "Contributor", "Backup", "Querier"]
-statistics = [
-    "initial_nodes",
-    "final_nodes",
-    "failures",
-    "work",
-    "messages",
-    "work_per_node",
-    "delta_nodes",
-    "bandwidth",
-]
-
-
-def get_data(path, aggregate_message=True):
-    if ".json" in path:
-        with open(path) as f:
-            data = json.load(f)
-
-        df = pd.concat([pd.DataFrame(i) for i in data])
-    else:
-        df = pd.read_csv(path, sep=";", decimal=",")
-        # We used different decimal format, check which one we have
-        if "float64" not in df.dtypes.unique():
-            df = pd.read_csv(path, sep=";")
-
-    df.rename(
-        mapper={
-            "seed": "run_id",
-            "failureRate": "failure_probability",
-            "observedFailureRate": "failure_rate",
-            "emissionTime": "emitter_time",
-            "receptionTime": "receiver_time",
-            "emitterId": "emitter_id",
-            "receiverId": "receiver_id",
-            "latency": "simulation_length",
-            "work": "total_work",
-            "groupSize": "group_size",
-            "circulatingAggregateIds": "circulating_aggregate_ids",
-            "currentlyCirculatingVersions": "currently_circulating_ids",
-            "usedBandwidth": "bandwidth",
-            "finalUsedBandwidth": "final_bandwidth",
-        },
-        axis=1,
-        inplace=True,
-    )
-    df.reset_index(inplace=True)
-    df.fillna(0, inplace=True)
-
-    df.loc[df["run_id"].str.startswith("OPTI-leader"), "strategy"] = "O_LEADER"
-    df.loc[df["run_id"].str.startswith("EAGER-leader"), "strategy"] = "E_LEADER"
-
-    for r in roles:
-        df[f"work_per_node_{r}"] = (
-            df[f"work_{r}"] / df[f"final_nodes_{r}"]
-            if (df[f"final_nodes_{r}"] != 0).any()
-            else 0
-        )
-        df[f"delta_nodes_{r}"] = df[f"final_nodes_{r}"] - df[f"initial_nodes_{r}"]
-
-    df.fillna(0, inplace=True)
-    for s in statistics:
-        df[f"{s}_total"] = 0
-        for r in roles:
-            df[f"{s}_total"] += df[f"{s}_{r}"]
 
-    if aggregate_message:
-        df = df.groupby(["run_id", "status", "strategy"]).mean()
-        df.reset_index(inplace=True)
 
-    return df
+def generate_summary(data, cube, status, strategies):
+    # Counts and extrema come from the cube, the medians still need the runs
+    per_status = {
+        statistic: roll_up(cube, ["status"], statistic)
+        .set_index("status")
+        .reindex(status)
+        for statistic in ["count", "min", "mean", "max"]
+    }
+    runs_per_status = per_status["count"]["failure_rate"].fillna(0).astype(int)
+    runs_per_strategy = roll_up(cube, ["strategy"], "count").set_index("strategy")
+    successes_per_strategy = roll_up(
+        select(cube, status="Success"), ["strategy"], "count"
+    ).set_index("strategy")
 
-
-def generate_summary(data, status, strategies):
     return (
         html.Div(
             style={"justifyContent": "center"},
@@ -93,20 +51,20 @@ def generate_summary(data, status, strategies):
                     children=[
                         html.Li(
                             children=[
-                                f"There are {len(data.groupby('run_id'))} simulations. {len(data[data['status'] == 'Success'].groupby('run_id'))} success, {len(data[data['status'] != 'Success'].groupby('run_id'))} failures",
+                                f"There are {runs_per_status.sum()} simulations. {runs_per_status.get('Success', 0)} success, {runs_per_status.sum() - runs_per_status.get('Success', 0)} failures",
                                 html.Ul(
                                     children=[
                                         html.Li(
                                             children=f"""
-                            {len(pd.unique(data[data['status'] == i]['run_id']))} have status {i}.
-                            Theoretical failure rate (min={round(data[data['status'] == i]['failure_probability'].min() * 100, 2)}%;
-                            avg={round(data[data['status'] == i]['failure_probability'].mean() * 100, 2)}%;
+                            {runs_per_status[i]} have status {i}.
+                            Theoretical failure rate (min={round(per_status['min'].loc[i, 'failure_probability'] * 100, 2)}%;
+                            avg={round(per_status['mean'].loc[i, 'failure_probability'] * 100, 2)}%;
                             med={round(data[data['status'] == i]['failure_probability'].median() * 100, 2)}%;
-                            max={round(data[data['status'] == i]['failure_probability'].max() * 100, 2)}%).
-                            Observed failure rate (min={round(data[data['status'] == i]['failure_rate'].min() * 100, 2)}%;
-                            avg={round(data[data['status'] == i]['failure_rate'].mean() * 100, 2)}%;
+                            max={round(per_status['max'].loc[i, 'failure_probability'] * 100, 2)}%).
+                            Observed failure rate (min={round(per_status['min'].loc[i, 'failure_rate'] * 100, 2)}%;
+                            avg={round(per_status['mean'].loc[i, 'failure_rate'] * 100, 2)}%;
                             med={round(data[data['status'] == i]['failure_rate'].median() * 100, 2)}%;
-                            max={round(data[data['status'] == i]['failure_rate'].max() * 100, 2)}%)
+                            max={round(per_status['max'].loc[i, 'failure_rate'] * 100, 2)}%)
                             """
                                         )
                                         for i in status
@@ -121,7 +79,7 @@ def generate_summary(data, status, strategies):
                                     children=[
                                         html.Li(
                                             children=[
-                                                f"{len(data[data['strategy'] == i])} runs using {i} strategy, {len(data.loc[(data['status'] == 'Success') & (data['strategy'] == i)])} success"
+                                                f"{int(runs_per_strategy['failure_rate'].get(i, 0))} runs using {i} strategy, {int(successes_per_strategy['failure_rate'].get(i, 0))} success"
                                             ]
                                         )
                                         for i in strategies
@@ -136,95 +94,189 @@ def generate_summary(data, status, strategies):
     )
 
 
-def generate_graphs(data, strategies_map, tab="failure_probability"):
-    graphs = dict()
+def box_specs(tab="failure_probability"):
+    """Rows of box plots of the boxes section, the `box` arguments of each one"""
+    by = (
+        "la probabilité de panne"
+        if tab == "failure_probability"
+        else "la taille de groupe"
+    )
+    per = "probabilité de panne" if tab == "failure_probability" else "taille de groupe"
+    return [
+        [
+            dict(
+                id="work_failure_rate_status",
+                x=tab,
+                y="work_total",
+                color="status",
+                title="Travail selon la taille de groupe par status",
+            ),
+            dict(
+                id="work_failure_rate_strategy",
+                x=tab,
+                y="work_total",
+                color="strategy",
+                title=f"Travail selon {by} par stratégie",
+            ),
+        ],
+        [
+            dict(
+                id="latency_failure_rate_status",
+                x=tab,
+                y="simulation_length",
+                color="status",
+                title=f"Latence selon {by} par status",
+            ),
+            dict(
+                id="latency_failure_rate_strategy",
+                x=tab,
+                y="simulation_length",
+                color="strategy",
+                title=f"Latence selon {by} par stratégie",
+            ),
+        ],
+        [
+            dict(
+                id="messages_strategy",
+                x=tab,
+                y="messages_total",
+                color="strategy",
+                title=f"Messages selon {by} par stratégie",
+            ),
+        ],
+        [
+            dict(
+                id="observed_failure_rate_per_failure_prob",
+                x=tab,
+                y="failure_rate",
+                color="strategy",
+                title=f"Taux de panne pour chaque {per}",
+            ),
+            dict(
+                id="observed_failure_rate_per_status",
+                x="status",
+                y="failure_rate",
+                color="strategy",
+                title="Taux de panne pour chaque statut d'exécution",
+            ),
+        ],
+    ]
 
-    failure_probabilities = np.sort(pd.unique(data["failure_probability"]))
-    group_sizes = np.sort(pd.unique(data["group_size"]))
-    fanouts = np.sort(pd.unique(data["fanout"]))
-    depths = np.sort(pd.unique(data["depth"]))
 
-    # Boxes
-    graphs["work_failure_rate_status"] = px.box(
-        data,
-        x=tab,
-        y="work_total",
-        color="status",
-        hover_name="run_id",
-        points="all",
-        title="Travail selon la taille de groupe par status",
-    )
-    graphs["work_failure_rate_strategy"] = px.box(
-        data,
-        x=tab,
-        y="work_total",
-        color="strategy",
-        hover_name="run_id",
-        points="all",
-        title=f"Travail selon {'la probabilité de panne' if tab == 'failure_probability' else 'la taille de groupe'} par stratégie",
-    )
-    graphs["messages_strategy"] = px.box(
-        data,
-        x=tab,
-        y="messages_total",
-        color="strategy",
-        hover_name="run_id",
-        points="all",
-        title=f"Messages selon {'la probabilité de panne' if tab == 'failure_probability' else 'la taille de groupe'} par stratégie",
-    )
-    graphs["latency_failure_rate_status"] = px.box(
-        data,
-        x=tab,
-        y="simulation_length",
-        color="status",
-        hover_name="run_id",
-        points="all",
-        title=f"Latence selon {'la probabilité de panne' if tab == 'failure_probability' else 'la taille de groupe'} par status",
-    )
-    graphs["latency_failure_rate_strategy"] = px.box(
-        data,
-        x=tab,
-        y="simulation_length",
-        color="strategy",
-        hover_name="run_id",
-        points="all",
-        title=f"Latence selon {'la probabilité de panne' if tab == 'failure_probability' else 'la taille de groupe'} par stratégie",
-    )
-    graphs["observed_failure_rate_per_failure_prob"] = px.box(
-        data,
-        x=tab,
-        y="failure_rate",
-        color="strategy",
-        hover_name="run_id",
-        points="all",
-        title=f"Taux de panne pour chaque {'probabilité de panne' if tab == 'failure_probability' else 'taille de groupe'}",
-    )
-    graphs["observed_failure_rate_per_status"] = px.box(
-        data,
-        x="status",
-        y="failure_rate",
-        color="strategy",
-        hover_name="run_id",
-        points="all",
-        title="Taux de panne pour chaque statut d'exécution",
-    )
+def generate_boxes(data, tab="failure_probability"):
+    return [
+        html.Div(
+            style={
+                "display": "flex",
+                "flex-direction": "row",
+                "justify-content": "center",
+            },
+            children=[
+                dcc.Graph(
+                    id=spec["id"],
+                    figure=box(
+                        data,
+                        x=spec["x"],
+                        y=spec["y"],
+                        color=spec["color"],
+                        hover_name="run_id",
+                        points="all",
+                        title=spec["title"],
+                    ),
+                )
+                for spec in specs
+            ],
+        )
+        for specs in box_specs(tab)
+    ]
 
+
+def scatter_specs(strategies_map):
+    """Rows of scatters of the scatters section, one per strategy in each row"""
+    return [
+        [
+            dict(
+                id=f"{strategies_map[strat]}_length_scatter",
+                strategy=strat,
+                x="simulation_length",
+                y="failure_rate",
+                color="status",
+                title=f"{strategies_map[strat]} execution latency",
+            )
+            for strat in strategies_map
+        ],
+        [
+            dict(
+                id=f"{strategies_map[strat]}_work_scatter",
+                strategy=strat,
+                x="simulation_length",
+                y="work_total",
+                color="status",
+                title=f"{strategies_map[strat]} total work",
+            )
+            for strat in strategies_map
+        ],
+    ]
+
+
+def generate_scatters(data, strategies_map):
+    return [
+        html.Div(
+            style={
+                "display": "flex",
+                "flex-direction": "row",
+                "justify-content": "center",
+            },
+            children=[
+                dcc.Graph(
+                    id=spec["id"],
+                    figure=px.scatter(
+                        data[data["strategy"] == spec["strategy"]],
+                        x=spec["x"],
+                        y=spec["y"],
+                        color=spec["color"],
+                        hover_name="run_id",
+                        title=spec["title"],
+                    ),
+                )
+                for spec in specs
+            ],
+        )
+        for specs in scatter_specs(strategies_map)
+    ]
+
+
+def amplify(data, cube, strategies_map, tab):
+    """Work and latency of the runs relative to the first x value of their strategy"""
     amps = data.copy()
 
     for strat in strategies_map:
-        amps_strat = amps[amps["strategy"] == strat]
-        amps.loc[amps["strategy"] == strat, "work_total"] /= amps_strat.groupby(
-            [tab, "strategy"], as_index=False
-        ).mean()["work_total"][0]
-        amps.loc[amps["strategy"] == strat, "simulation_length"] /= amps_strat.groupby(
-            [tab, "simulation_length"], as_index=False
-        ).mean()["simulation_length"][0]
-
-    grouped_mean = data.groupby([tab, "strategy"], as_index=False).mean()
-    grouped_upper = data.groupby([tab, "strategy"], as_index=False).max()
+        strat_cube = select(cube, strategy=strat)
+        amps.loc[amps["strategy"] == strat, "work_total"] /= roll_up(strat_cube, [tab])[
+            "work_total"
+        ][0]
+        # Shortest latency at the first x value
+        amps.loc[amps["strategy"] == strat, "simulation_length"] /= roll_up(
+            strat_cube, [tab], "min"
+        )["simulation_length"][0]
+
+    return amps
+
+
+def generate_amplifications(data, cube, strategies_map, tab="failure_probability"):
+    """Amplifications per strategy, yielded a row of figures at a time"""
+    graphs = dict()
+
+    failure_probabilities = np.sort(pd.unique(data["failure_probability"]))
+    group_sizes = np.sort(pd.unique(data["group_size"]))
+    fanouts = np.sort(pd.unique(data["fanout"]))
+    amps = amplify(data, cube, strategies_map, tab)
+
+    grouped_mean = roll_up(cube, [tab, "strategy"])
+    grouped_upper = roll_up(cube, [tab, "strategy"], "max")
     grouped_upper["work_total"] /= grouped_mean["work_total"].iloc[0]
     grouped_upper["simulation_length"] /= grouped_mean["simulation_length"].iloc[0]
-    grouped_lower = data.groupby([tab, "strategy"], as_index=False).min()
+    grouped_lower = roll_up(cube, [tab, "strategy"], "min")
     grouped_lower["work_total"] /= grouped_mean["work_total"].iloc[0]
     grouped_lower["simulation_length"] /= grouped_mean["simulation_length"].iloc[0]
     grouped_mean["work_total"] /= grouped_mean["work_total"].iloc[0]
@@ -239,55 +291,24 @@ def generate_graphs(data, strategies_map, tab="failure_probability"):
     else:
         x_axis = depths
 
-    for strat in strategies_map:
-        graphs[f"{strategies_map[strat]}_length_scatter"] = px.scatter(
-            data[data["strategy"] == strat],
-            x="simulation_length",
-            y="failure_rate",
-            color="status",
-            hover_name="run_id",
-            title=f"{strategies_map[strat]} execution latency",
-        )
-        graphs[f"{strategies_map[strat]}_work_scatter"] = px.scatter(
-            data[data["strategy"] == strat],
-            x="simulation_length",
-            y="work_total",
-            color="status",
-            hover_name="run_id",
-            title=f"{strategies_map[strat]} total work",
-        )
-
-        graphs[f"{strategies_map[strat]}_latency_amplification_scatter"] = px.scatter(
-            amps[amps["strategy"] == strat],
-            x=tab,
-            y="simulation_length",
-            color="status",
-            marginal_x="histogram",
-            marginal_y="histogram",
-            trendline="lowess",
-            title=f"{strategies_map[strat]} latency amplification",
-        )
-        graphs[f"{strategies_map[strat]}_work_amplification_scatter"] = px.scatter(
-            amps[amps["strategy"] == strat],
-            x=tab,
-            y="work_total",
-            color="status",
-            marginal_x="histogram",
-            marginal_y="histogram",
-            trendline="lowess",
-            title=f"{strategies_map[strat]} work amplification",
-        )
-        graphs[f"{strategies_map[strat]}_completeness_scatter"] = px.scatter(
-            amps[amps["strategy"] == strat],
-            x=tab,
-            y="completeness",
-            color="status",
-            marginal_x="histogram",
-            marginal_y="histogram",
-            trendline="lowess",
-            title=f"{strategies_map[strat]} completeness",
+    def row(kind):
+        """Figures of `kind` of every strategy side by side"""
+        return html.Div(
+            style={
+                "display": "flex",
+                "flex-direction": "row",
+                "justify-content": "center",
+            },
+            children=[
+                dcc.Graph(id=id, figure=graphs[id])
+                for id in [
+                    f"{strategies_map[strat]}_{kind}" for strat in strategies_map.keys()
+                ]
+            ],
         )
 
+    for strat in strategies_map:
+        jobs.step()
         not_empty = len(grouped_mean[grouped_mean["strategy"] == strat]) > 0
         fallback = [0 for _ in failure_probabilities]
         d1 = {}
@@ -363,6 +384,37 @@ def generate_graphs(data, strategies_map, tab="failure_probability"):
             title=f"{strategies_map[strat]} completeness",
         )
 
+    yield row("work_amplification")
+    yield row("latency_amplification")
+    yield row("completeness")
+
+    # The LOWESS trendlines are the costly part, each row is shown once drawn
+    scatters = [
+        ("latency_amplification_scatter", "simulation_length", "latency amplification"),
+        ("work_amplification_scatter", "work_total", "work amplification"),
+        ("completeness_scatter", "completeness", "completeness"),
+    ]
+    for (kind, y, title) in scatters:
+        for strat in strategies_map:
+            jobs.step()
+            graphs[f"{strategies_map[strat]}_{kind}"] = px.scatter(
+                amps[amps["strategy"] == strat],
+                x=tab,
+                y=y,
+                color="status",
+                marginal_x="histogram",
+                marginal_y="histogram",
+                trendline="lowess",
+                title=f"{strategies_map[strat]} {title}",
+            )
+        yield row(kind)
+
+
+def generate_combined(data, cube, strategies_map, tab="failure_probability"):
+    graphs = dict()
+    amps = amplify(data, cube, strategies_map, tab)
+    jobs.step()
+
     graphs[f"latency_amplification_scatter"] = px.scatter(
         amps,
         x=tab,
@@ -391,8 +443,30 @@ def generate_graphs(data, strategies_map, tab="failure_probability"):
         hover_name="run_id",
     )
 
-    gmean = data.groupby([tab, "strategy"], as_index=False).mean()
-    tmp_std = data.groupby([tab, "strategy"], as_index=False).std()
+    return [
+        html.Div(
+            style={
+                "display": "flex",
+                "flex-direction": "row",
+                "justify-content": "center",
+            },
+            children=[
+                dcc.Graph(id=id, figure=graphs[id])
+                for id in [
+                    "completeness_scatter",
+                    "latency_amplification_scatter",
+                    "work_amplification_scatter",
+                ]
+            ],
+        ),
+    ]
+
+
+def generate_others(data, cube, tab="failure_probability"):
+    graphs = dict()
+
+    gmean = roll_up(cube, [tab, "strategy"])
+    tmp_std = roll_up(cube, [tab, "strategy"], "std")
     gmean["total_work_std"] = tmp_std["work_total"]
     gmean["simulation_length_std"] = tmp_std["simulation_length"]
     gmean["completeness_std"] = tmp_std["completeness"]
@@ -425,7 +499,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability"):
         title="Average completeness per strategy",
     )
 
-    graphs["completeness_per_failure_prob"] = px.box(
+    graphs["completeness_per_failure_prob"] = box(
         data,
         x=tab,
         y="completeness",
@@ -435,248 +509,48 @@ def generate_graphs(data, strategies_map, tab="failure_probability"):
         title=f"Complétude par {'probabilité de panne' if tab == 'failure_probability' else 'taille de groupe'}",
     )
 
-    return html.Div(
-        children=[
-            html.H1("Boxes:"),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id="work_failure_rate_status",
-                        figure=graphs["work_failure_rate_status"],
-                    ),
-                    dcc.Graph(
-                        id="work_failure_rate_strategy",
-                        figure=graphs["work_failure_rate_strategy"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id="latency_failure_rate_status",
-                        figure=graphs["latency_failure_rate_status"],
-                    ),
-                    dcc.Graph(
-                        id="latency_failure_rate_strategy",
-                        figure=graphs["latency_failure_rate_strategy"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id="messages_strategy",
-                        figure=graphs["messages_strategy"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id="observed_failure_rate_per_failure_prob",
-                        figure=graphs["observed_failure_rate_per_failure_prob"],
-                    ),
-                    dcc.Graph(
-                        id="observed_failure_rate_per_status",
-                        figure=graphs["observed_failure_rate_per_status"],
-                    ),
-                ],
-            ),
-            #
-            # Scatters
-            #
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        f"{strategies_map[strat]}_length_scatter"
-                        for strat in strategies_map.keys()
-                    ]
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        f"{strategies_map[strat]}_work_scatter"
-                        for strat in strategies_map.keys()
-                    ]
-                ],
-            ),
-            #
-            # Amplifications
-            #
-            html.H1("Amplifications:"),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        f"{strategies_map[strat]}_work_amplification"
-                        for strat in strategies_map.keys()
-                    ]
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        f"{strategies_map[strat]}_latency_amplification"
-                        for strat in strategies_map.keys()
-                    ]
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        f"{strategies_map[strat]}_completeness"
-                        for strat in strategies_map.keys()
-                    ]
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        f"{strategies_map[strat]}_latency_amplification_scatter"
-                        for strat in strategies_map.keys()
-                    ]
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        f"{strategies_map[strat]}_work_amplification_scatter"
-                        for strat in strategies_map.keys()
-                    ]
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        f"{strategies_map[strat]}_completeness_scatter"
-                        for strat in strategies_map.keys()
-                    ]
-                ],
-            ),
-            html.H1("Combined plots"),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(id=id, figure=graphs[id])
-                    for id in [
-                        "completeness_scatter",
-                        "latency_amplification_scatter",
-                        "work_amplification_scatter",
-                    ]
-                ],
-            ),
-            #
-            # Rest
-            #
-            html.H1("Other graphs"),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=id,
-                        figure=graphs[id],
-                    )
-                    for id in [
-                        "completeness_failure_prob_strategy",
-                        "work_failure_prob_strategy",
-                        "latency_failure_prob_strategy",
-                    ]
-                ],
-            ),
-            dcc.Graph(
-                id="completeness_per_failure_prob",
-                figure=graphs["completeness_per_failure_prob"],
-            ),
-        ]
-    )
+    return [
+        html.Div(
+            style={
+                "display": "flex",
+                "flex-direction": "row",
+                "justify-content": "center",
+            },
+            children=[
+                dcc.Graph(
+                    id=id,
+                    figure=graphs[id],
+                )
+                for id in [
+                    "completeness_failure_prob_strategy",
+                    "work_failure_prob_strategy",
+                    "latency_failure_prob_strategy",
+                ]
+            ],
+        ),
+        dcc.Graph(
+            id="completeness_per_failure_prob",
+            figure=graphs["completeness_per_failure_prob"],
+        ),
+    ]
 
 
-if __name__ == "__main__":
-    with open("./dissec.config.json") as f:
-        config = json.load(f)
+def create_app(config, **kwargs):
+    """Dashboard on the default file of `config`, `kwargs` go to `dash.Dash`"""
+    app = dash.Dash(__name__, **kwargs)
+    compact(app)
+    return defer(app, lambda: setup(app, config), "Simulation  task")
 
-    data = get_data(config["defaultGraph"])
+
+def setup(app, config):
+    """Layout and callbacks of `app` on the default file of `config`"""
+    data = get_dataset(config["defaultGraph"], "overview")
 
     run_ids = pd.unique(data["run_id"])
     strategies = pd.unique(data["strategy"])
     status = pd.unique(data["status"])
-    data["failure_probability"] = data["failure_probability"].round(6)
+    # The registry frame is shared, it is not rounded in place
+    data = data.assign(failure_probability=data["failure_probability"].round(6))
     failure_probabilities = np.sort(pd.unique(data["failure_probability"]))
     failure_rates = np.sort(pd.unique(data["failure_rate"]))
 
@@ -693,14 +567,15 @@ if __name__ == "__main__":
     for k in set(strategies_map.keys()).difference(strategies):
         del strategies_map[k]
 
-    graphs = generate_graphs(data, strategies_map)
-    summary = generate_summary(data, status, strategies)
-
-    app = dash.Dash(__name__)
+    # Strategies drawn by the sections, when present in the selected runs
+    section_strategies = dict(EAGER="Eager", OPTI="Optimistic", PESS="Pessimistic")
+    # A small file is filtered in the browser, from columns sent once
+    in_browser = fits(data)
 
     app.layout = html.Div(
         children=[
             dcc.Store(id="store_file"),
+            dcc.Store(id="store_columns"),
             dcc.Tabs(
                 id="tabs",
                 value="failure_probability",
@@ -723,7 +598,9 @@ if __name__ == "__main__":
                     html.H1(id="file_span", children=f"{config['defaultGraph']}"),
                 ]
             ),
-            html.Div(id="summary", children=summary),
+            # Filled by the summary callback, on the initial filters
+            html.Div(id="summary"),
+            dcc.Store(id="summary-drawn"),
             #
             # Boxes
             #
@@ -753,13 +630,13 @@ if __name__ == "__main__":
                         value=[3, 5],
                         id="depths-range",
                     ),
-                    html.H3("Activate graphs"),
-                    dcc.Checklist(
-                        id="activate_graphs", options=["Activate graphs"], value=[]
-                    ),
                 ]
             ),
-            html.Div(id="graphs", children=[]),
+            section("boxes", "Boxes"),
+            section("scatters", "Scatters"),
+            section("amplifications", "Amplifications"),
+            section("combined", "Combined plots"),
+            section("others", "Other graphs"),
         ]
     )
 
@@ -768,53 +645,23 @@ if __name__ == "__main__":
         dash.Input(component_id="file-select", component_property="value"),
     )
     def update_file(selected_file):
-        return [get_data(selected_file).to_json(), selected_file]
+        # Loaded here so that the graphs callback finds it in the registry
+        get_dataset(selected_file, "overview")
+        return [selected_file, selected_file]
 
-    @app.callback(
-        [
-            dash.Output(component_id="summary", component_property="children"),
-            dash.Output(component_id="graphs", component_property="children"),
-        ],
-        [
-            dash.Input(
-                component_id="failure-probabilities-range", component_property="value"
-            ),
-            dash.Input(component_id="group-sizes-range", component_property="value"),
-            dash.Input(component_id="depths-range", component_property="value"),
-            dash.Input(component_id="tabs", component_property="value"),
-            dash.Input(component_id="activate_graphs", component_property="value"),
-        ],
-        dash.State("store_file", "data"),
-    )
-    def update_graphs(
-        selected_failures,
-        selected_sizes,
-        selected_depths,
-        tab,
-        activate_graphs,
-        store_file,
-    ):
+    def select_runs(store_file, selected_failures, selected_sizes, selected_depths):
+        """Runs and cube of the selected file within the ranges of the sliders"""
         print(
             "Update Arguments: ",
             selected_failures,
             selected_sizes,
             selected_depths,
-            tab,
-            activate_graphs,
         )
-        if not store_file:
-            df = get_data(config["defaultGraph"])
-        else:
-            df = pd.read_json(store_file)
-
-        strategies = pd.unique(df["strategy"])
-        status = pd.unique(df["status"])
-        df["failure_probability"] = df["failure_probability"].round(6)
+        df = get_dataset(store_file or config["defaultGraph"], "overview")
+        cube = get_cube(store_file or config["defaultGraph"], "overview")
 
-        # Remove strategies not present in the data
-        strategies_map = dict(EAGER="Eager", OPTI="Optimistic", PESS="Pessimistic")
-        for k in set(strategies_map.keys()).difference(strategies):
-            del strategies_map[k]
+        # The registry frame is shared, it is not rounded in place
+        df = df.assign(failure_probability=df["failure_probability"].round(6))
 
         df = df[
             (df["failure_probability"] >= selected_failures[0])
@@ -827,13 +674,212 @@ if __name__ == "__main__":
         df = df[
             (df["depth"] >= selected_depths[0]) & (df["depth"] <= selected_depths[1])
         ]
+        cube = select(
+            cube,
+            failure_probability=tuple(selected_failures),
+            group_size=tuple(selected_sizes),
+            depth=tuple(selected_depths),
+        )
+
+        return (df, cube)
+
+    filters = [
+        dash.Input(
+            component_id="failure-probabilities-range", component_property="value"
+        ),
+        dash.Input(component_id="group-sizes-range", component_property="value"),
+        dash.Input(component_id="depths-range", component_property="value"),
+    ]
 
-        graphs = (
-            generate_graphs(df, strategies_map, tab)
-            if "Activate graphs" in activate_graphs
-            else html.Div()
+    @app.callback(
+        dash.Output("store_columns", "data"), dash.Input("store_file", "data")
+    )
+    def update_columns(store_file):
+        if not in_browser:
+            return None
+        df = get_dataset(store_file or config["defaultGraph"], "overview")
+        if not fits(df):
+            # Filtered on the server, see on_server
+            return None
+        df = df.assign(failure_probability=df["failure_probability"].round(6))
+        boxes = {t["value"]: box_specs(t["value"]) for t in tabs}
+        scatters = scatter_specs(section_strategies)
+        return encode(
+            df,
+            ["failure_probability", "group_size", "depth"],
+            ["run_id", "status", "strategy", "failure_rate"]
+            + [
+                spec[key]
+                for rows in list(boxes.values()) + [scatters]
+                for specs in rows
+                for spec in specs
+                for key in ["x", "y", "color"]
+            ],
+            boxes=boxes,
+            scatters=scatters,
+            box_max_points=BOX_MAX_POINTS,
         )
 
-        return [generate_summary(df, status, strategies), graphs]
+    def update_summary(selected_failures, selected_sizes, selected_depths, store_file):
+        df = get_dataset(store_file or config["defaultGraph"], "overview")
+        strategies = pd.unique(df["strategy"])
+        status = pd.unique(df["status"])
+
+        df, cube = select_runs(
+            store_file, selected_failures, selected_sizes, selected_depths
+        )
+        return generate_summary(df, cube, status, strategies)
+
+    def on_server(draw):
+        """`draw` for the selected files whose columns are not sent"""
+
+        def draw_large(*values):
+            # The selected file is the last state of every callback
+            if fits(get_dataset(values[-1] or config["defaultGraph"], "overview")):
+                raise PreventUpdate
+            return draw(*values)
+
+        return draw_large
+
+    columns = dash.Input("store_columns", "data")
+    store = dash.State("store_file", "data")
+    # A large selected file is still filtered on the server
+    source = dash.Input("store_file", "data")
+    if in_browser:
+        register_clientside(
+            app,
+            dash.Output(component_id="summary", component_property="children"),
+            "summary",
+            filters,
+            columns,
+            "summary-drawn",
+            on_server(update_summary),
+            [store],
+            source,
+        )
+    else:
+        app.callback(
+            dash.Output(component_id="summary", component_property="children"),
+            filters,
+            store,
+        )(update_summary)
+
+    def draw(name, generate):
+        """Section callback calling `generate` on the selected runs"""
+
+        def draw_section(
+            selected_failures, selected_sizes, selected_depths, tab, store_file
+        ):
+            path = store_file or config["defaultGraph"]
+            ranges = snap(
+                get_cube(path, "overview"),
+                failure_probability=tuple(selected_failures),
+                group_size=tuple(selected_sizes),
+                depth=tuple(selected_depths),
+            )
+
+            def draw_figures():
+                df, cube = select_runs(
+                    store_file, selected_failures, selected_sizes, selected_depths
+                )
+
+                # Remove strategies not present in the data
+                strategies_map = dict(section_strategies)
+                for k in set(strategies_map.keys()).difference(
+                    pd.unique(df["strategy"])
+                ):
+                    del strategies_map[k]
+
+                return generate(df, cube, strategies_map, tab)
+
+            key = [dataset_key(path, "overview"), name, tab, ranges]
+            return get_figures(key, draw_figures)
+
+        return draw_section
+
+    # Each section is redrawn by the filters it uses only, the tab is read
+    # without being listened to by the sections that do not depend on it
+    tab = dash.Input(component_id="tabs", component_property="value")
+    tab_state = dash.State(component_id="tabs", component_property="value")
+    # With the background argument, sections are drawn by a pool of workers
+    background = "background" in sys.argv
+    draw_boxes = draw(
+        "boxes", lambda df, cube, strategies_map, tab: generate_boxes(df, tab)
+    )
+    draw_scatters = draw(
+        "scatters",
+        lambda df, cube, strategies_map, tab: generate_scatters(df, strategies_map),
+    )
+    if in_browser:
+        # The sections of raw runs are filtered and aggregated in the browser
+        register_clientside_section(
+            app,
+            "boxes",
+            "boxes",
+            filters + [tab],
+            columns,
+            on_server(draw_boxes),
+            [store],
+            source,
+        )
+        register_clientside_section(
+            app,
+            "scatters",
+            "scatters",
+            filters,
+            columns,
+            on_server(draw_scatters),
+            [tab_state, store],
+            source,
+        )
+    else:
+        register_section(
+            app,
+            "boxes",
+            draw_boxes,
+            filters + [tab],
+            [store],
+            background=background,
+        )
+        register_section(
+            app,
+            "scatters",
+            draw_scatters,
+            filters,
+            [tab_state, store],
+            background=background,
+        )
+    register_section(
+        app,
+        "amplifications",
+        draw("amplifications", generate_amplifications),
+        filters + [tab],
+        [store],
+        background=background,
+    )
+    register_section(
+        app,
+        "combined",
+        draw("combined", generate_combined),
+        filters + [tab],
+        [store],
+        background=background,
+    )
+    register_section(
+        app,
+        "others",
+        draw(
+            "others",
+            lambda df, cube, strategies_map, tab: generate_others(df, cube, tab),
+        ),
+        filters + [tab],
+        [store],
+        background=background,
+    )
+
+
+if __name__ == "__main__":
+    with open("./dissec.config.json") as f:
+        config = json.load(f)
 
-    app.run_server(debug=True)
+    serve(create_app(config))
@@ -1,97 +1,78 @@
 import plotly_express as px
-from dash import html, dcc, dash
+from dash import html, dcc, dash, callback_context
+from dash.exceptions import PreventUpdate
 import numpy as np
 import pandas as pd
 import json
+import os
+import sys
 
-roles = ["Aggregator", "LeafAggregator", "Contributor", "Backup", "Querier"]
-statistics = [
-    "initial_nodes",
-    "final_nodes",
-    "failures",
-    "work",
-    "messages",
-    "work_per_node",
-    "delta_nodes",
-    "inbound_bandwidth",
-    "outbound_bandwidth",
-]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis.boxes import box
+from analysis.datasets import get_message_tables
+from analysis.loader import join_runs
+from analysis.payloads import compact
+from analysis.serving import serve
+from analysis.startup import defer
+from analysis.timelines import (
+    PLAYBACK_FRAMES,
+    PLAYBACK_INTERVAL,
+    TimeIndex,
+    extension,
+    moves_range,
+    timeline,
+)
 
 
-def get_data(path):
-    if ".json" in path:
-        with open(path) as f:
-            data = json.load(f)
+def create_app(config, **kwargs):
+    """Dashboard on the default file of `config`, `kwargs` go to `dash.Dash`"""
+    app = dash.Dash(__name__, **kwargs)
+    compact(app)
+    return defer(app, lambda: setup(app, config), "Latency vs Reception time")
 
-        df = pd.concat([pd.DataFrame(i) for i in data])
-    else:
-        df = pd.read_csv(path, sep=";", decimal=",")
-        # We used different decimal format, check which one we have
-        if "float64" not in df.dtypes.unique():
-            df = pd.read_csv(path, sep=";")
 
-    df.rename(
-        mapper={
-            "seed": "seed",
-            "name": "run_id",
-            "buildingBlocks": "strategy",
-            "failureRate": "failure_probability",
-            "observedFailureRate": "failure_rate",
-            "emissionTime": "emitter_time",
-            "receptionTime": "receiver_time",
-            "emitterId": "emitter_id",
-            "receiverId": "receiver_id",
-            "latency": "simulation_length",
-            "work": "total_work",
-            "groupSize": "group_size",
-            "circulatingAggregateIds": "circulating_ids",
-            "currentlyCirculatingVersions": "currently_circulating_ids",
-            "inboundBandwidth": "inbound_bandwidth",
-            "outboundBandwidth": "outbound_bandwidth",
-            "finalInboundBandwidth": "final_inbound_bandwidth",
-            "finalOutboundBandwidth": "final_outbound_bandwidth",
-        },
-        axis=1,
-        inplace=True,
-    )
-    df.reset_index(inplace=True)
-    df.fillna(0, inplace=True)
-
-    df["latency"] = (df["receiver_time"] - df["emitter_time"]).apply(
-        lambda x: max(0, x)
-    )
-
-    for r in roles:
-        df[f"work_per_node_{r}"] = (
-            df[f"work_{r}"] / df[f"final_nodes_{r}"]
-            if (df[f"final_nodes_{r}"] != 0).any()
-            else 0
-        )
-        df[f"delta_nodes_{r}"] = df[f"final_nodes_{r}"] - df[f"initial_nodes_{r}"]
-
-    df.fillna(0, inplace=True)
-    for s in statistics:
-        df[f"{s}_total"] = 0
-        for r in roles:
-            df[f"{s}_total"] += df[f"{s}_{r}"]
+def setup(app, config):
+    """Layout and callbacks of `app` on the default file of `config`"""
+    runs, messages = get_message_tables(config["defaultGraph"])
 
-    return df
-
-
-if __name__ == "__main__":
-    with open("./dissec.config.json") as f:
-        config = json.load(f)
+    run_ids = pd.unique(runs["run_id"])
+    strategies = pd.unique(runs["strategy"])
+    status = pd.unique(runs["status"])
+    types = pd.unique(messages["type"])
+    simulation_lengths = pd.unique(runs["simulation_length"])
+    simulation_end = np.max(simulation_lengths)
+    # The registry frame is shared, it is not rounded in place
+    runs = runs.assign(failure_probability=runs["failure_probability"].round(6))
+    failure_probabilities = np.sort(pd.unique(runs["failure_probability"]))
+    failure_rates = np.sort(pd.unique(runs["failure_rate"]))
 
-    data = get_data(config["defaultGraph"])
+    # Empty frame with every column, for the figures before the first callback
+    columns = list(messages.columns) + list(runs.columns)
+    # Run columns joined to the messages shown by the timeline callback
+    plotted_columns = [
+        "run_id",
+        "status",
+        "currently_circulating_ids",
+        "outbound_bandwidth",
+        "work_total",
+        "messages_total",
+        "completeness",
+        "latency",
+    ]
+    # Timelines redrawn for their visible window when zoomed
+    timeline_graphs = [
+        "message_timeline",
+        "version_timeline",
+        "bandwidth_timeline",
+        "work_timeline",
+        "completeness_timeline",
+        "messages_timeline",
+    ]
 
-    run_ids = pd.unique(data["run_id"])
-    strategies = pd.unique(data["strategy"])
-    status = pd.unique(data["status"])
-    types = pd.unique(data["type"])
-    simulation_lengths = pd.unique(data["simulation_length"])
-    data["failure_probability"] = data["failure_probability"].round(6)
-    failure_probabilities = np.sort(pd.unique(data["failure_probability"]))
-    failure_rates = np.sort(pd.unique(data["failure_rate"]))
+    # Messages sorted per run and type, to replay them up to the slider time
+    time_indexes = {
+        axis: TimeIndex(messages, f"{axis}_time") for axis in ["receiver", "emitter"]
+    }
 
     # Remove strategies not present in the data
     strategies_map = dict(
@@ -100,22 +81,25 @@ if __name__ == "__main__":
     for k in set(strategies_map.keys()).difference(strategies):
         del strategies_map[k]
 
-    grouped = data.groupby(["run_id", "status", "strategy"], as_index=False)[
-        [
-            "simulation_length",
-            "total_work",
-            "failure_probability",
-            "failure_rate",
-            "completeness",
+    summary_columns = [
+        "simulation_length",
+        "total_work",
+        "failure_probability",
+        "failure_rate",
+        "completeness",
+    ]
+    grouped = (
+        join_runs(messages, runs, ["run_id", "status", "strategy"] + summary_columns)
+        .groupby(["run_id", "status", "strategy"], as_index=False, observed=True)[
+            summary_columns
         ]
-    ].max()
+        .max()
+    )
     grouped["failure_probability"] = grouped["failure_probability"].round(5)
 
-    app = dash.Dash(__name__)
-
     # Timeline
     message_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="receiver_id",
         color="type",
@@ -130,7 +114,7 @@ if __name__ == "__main__":
         ],
     )
     version_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="currently_circulating_ids",
         color="run_id",
@@ -138,7 +122,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     bandwidth_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="outbound_bandwidth",
         color="run_id",
@@ -146,7 +130,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     work_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="work_total",
         color="run_id",
@@ -154,7 +138,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     messages_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="messages_total",
         color="run_id",
@@ -162,7 +146,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     completeness_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="completeness",
         color="run_id",
@@ -170,7 +154,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     message_stats_fig = px.box(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="type",
         y="latency",
         hover_name="type",
@@ -192,20 +176,20 @@ if __name__ == "__main__":
                         children=[
                             html.Li(
                                 children=[
-                                    f"There are {len(data.groupby('run_id'))} simulations. {len(data[data['status'] == 'Success'].groupby('run_id'))} success, {len(data[data['status'] != 'Success'].groupby('run_id'))} failures",
+                                    f"There are {len(runs)} simulations. {(runs['status'] == 'Success').sum()} success, {(runs['status'] != 'Success').sum()} failures",
                                     html.Ul(
                                         children=[
                                             html.Li(
                                                 children=f"""
-                            {len(pd.unique(data[data['status'] == i]['run_id']))} have status {i}.
-                            Theoretical failure rate (min={round(data[data['status'] == i]['failure_probability'].min() * 100, 2)}%;
-                            avg={round(data[data['status'] == i]['failure_probability'].mean() * 100, 2)}%;
-                            med={round(data[data['status'] == i]['failure_probability'].median() * 100, 2)}%;
-                            max={round(data[data['status'] == i]['failure_probability'].max() * 100, 2)}%).
-                            Observed failure rate (min={round(data[data['status'] == i]['failure_rate'].min() * 100, 2)}%;
-                            avg={round(data[data['status'] == i]['failure_rate'].mean() * 100, 2)}%;
-                            med={round(data[data['status'] == i]['failure_rate'].median() * 100, 2)}%;
-                            max={round(data[data['status'] == i]['failure_rate'].max() * 100, 2)}%)
+                            {len(pd.unique(runs[runs['status'] == i]['run_id']))} have status {i}.
+                            Theoretical failure rate (min={round(runs[runs['status'] == i]['failure_probability'].min() * 100, 2)}%;
+                            avg={round(runs[runs['status'] == i]['failure_probability'].mean() * 100, 2)}%;
+                            med={round(runs[runs['status'] == i]['failure_probability'].median() * 100, 2)}%;
+                            max={round(runs[runs['status'] == i]['failure_probability'].max() * 100, 2)}%).
+                            Observed failure rate (min={round(runs[runs['status'] == i]['failure_rate'].min() * 100, 2)}%;
+                            avg={round(runs[runs['status'] == i]['failure_rate'].mean() * 100, 2)}%;
+                            med={round(runs[runs['status'] == i]['failure_rate'].median() * 100, 2)}%;
+                            max={round(runs[runs['status'] == i]['failure_rate'].max() * 100, 2)}%)
                             """
                                             )
                                             for i in status
@@ -297,7 +281,7 @@ if __name__ == "__main__":
                     html.H3("Simulation time"),
                     dcc.Slider(
                         0,
-                        np.max(simulation_lengths),
+                        simulation_end,
                         marks={
                             0: 'Start',
                             0.17: 'Received query',
@@ -312,6 +296,12 @@ if __name__ == "__main__":
                         value=0,
                         id="time-slider",
                     ),
+                    html.Button("Play", id="play"),
+                    dcc.Interval(
+                        id="playback", interval=PLAYBACK_INTERVAL, disabled=True
+                    ),
+                    # Time up to which the message timeline was last extended
+                    dcc.Store(id="played"),
                 ]
             ),
             dcc.Graph(id="message_timeline", figure=message_timeline_fig),
@@ -324,6 +314,31 @@ if __name__ == "__main__":
         ]
     )
 
+    def select_runs(selected_run_ids):
+        if "All" in selected_run_ids:
+            return runs
+        return runs[runs["run_id"].isin(selected_run_ids)]
+
+    def message_timeline(df, y_axis, selected_types=None, relayout=None):
+        # A trace per selected type, in that order, for frames to extend it
+        return timeline(
+            join_runs(df, runs, plotted_columns),
+            x=y_axis + "_time",
+            y=y_axis + "_id",
+            color="type",
+            relayout=relayout,
+            categories=selected_types,
+            hover_name="type",
+            hover_data=[
+                "receiver_time",
+                "emitter_time",
+                "receiver_id",
+                "emitter_id",
+                "run_id",
+                "status",
+            ],
+        )
+
     @app.callback(
         [
             dash.Output(component_id="message_timeline", component_property="figure"),
@@ -343,99 +358,166 @@ if __name__ == "__main__":
             dash.Input(
                 component_id="time-slider", component_property="value"
             ),
-        ],
+            dash.Input(component_id="played", component_property="data"),
+        ]
+        + [dash.Input(graph, "relayoutData") for graph in timeline_graphs],
     )
     def update_timeline(
         selected_y_axis,
         selected_run_ids,
         selected_types,
         current_time,
+        played,
+        *relayouts,
     ):
-        df = data.copy()
-        
-        if "All" not in selected_run_ids:
-            df = df[df["run_id"].isin(selected_run_ids)]
-        df = df[df["type"].isin(selected_types)]
+        relayouts = dict(zip(timeline_graphs, relayouts))
+        triggered = [t["prop_id"] for t in callback_context.triggered]
+        # The slider moved by the playback, the message timeline is extended
+        if "played.data" in triggered:
+            raise PreventUpdate
+        # A zoomed timeline is the only figure to redraw
+        zoomed = triggered[0].split(".")[0]
+        if zoomed in relayouts and not moves_range(relayouts[zoomed]):
+            raise PreventUpdate
 
-        error_x = None
-        error_x_minus = None
+        selected = select_runs(selected_run_ids)
+        # Only the message timeline depends on the time, redrawn like when zoomed
+        if zoomed == "time-slider":
+            zoomed = "message_timeline"
+        else:
+            df = messages[
+                messages["run"].isin(selected.index)
+                & messages["type"].isin(selected_types)
+            ]
+            df = join_runs(df, runs, plotted_columns)
 
-        print(current_time, len(df[df[selected_y_axis + "_time"] <= current_time]), len(df[df[selected_y_axis + "_time"] > current_time]))
-        # Timeline
-        new_message_timeline = px.scatter(
-            df[df[selected_y_axis + "_time"] <= current_time],
-            x=selected_y_axis + "_time",
-            error_x=error_x,
-            error_x_minus=error_x_minus,
-            y=selected_y_axis + "_id",
-            color="type",
-            hover_name="type",
-            hover_data=[
-                "receiver_time",
-                "emitter_time",
-                "receiver_id",
-                "emitter_id",
-                "run_id",
-                "status",
-            ],
-        )
-        version_timeline_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="currently_circulating_ids",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        bandwidth_timeline_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="outbound_bandwidth",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        work_timeline_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="work_total",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        completeness_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="completeness",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        messages_timeline_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="messages_total",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        new_message_stats_fig = px.box(
-            df,
-            x="type",
-            y="latency",
-            hover_name="type",
-            hover_data=["emitter_id"],
-            points="all",
+        figures = {
+            # Timeline
+            "message_timeline": lambda: message_timeline(
+                time_indexes[selected_y_axis].until(
+                    selected.index, selected_types, current_time
+                ),
+                selected_y_axis,
+                selected_types,
+                relayouts["message_timeline"],
+            ),
+            "version_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="currently_circulating_ids",
+                color="run_id",
+                relayout=relayouts["version_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "bandwidth_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="outbound_bandwidth",
+                color="run_id",
+                relayout=relayouts["bandwidth_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "work_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="work_total",
+                color="run_id",
+                relayout=relayouts["work_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "completeness_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="completeness",
+                color="run_id",
+                relayout=relayouts["completeness_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "messages_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="messages_total",
+                color="run_id",
+                relayout=relayouts["messages_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "message_stats": lambda: box(
+                df,
+                x="type",
+                y="latency",
+                hover_name="emitter_id",
+                points="all",
+            ),
+        }
+
+        if zoomed in relayouts:
+            return [
+                figure() if graph == zoomed else dash.no_update
+                for (graph, figure) in figures.items()
+            ]
+        return [figure() for figure in figures.values()]
+
+    @app.callback(
+        [
+            dash.Output(component_id="time-slider", component_property="value"),
+            dash.Output(
+                component_id="message_timeline", component_property="extendData"
+            ),
+            dash.Output(component_id="played", component_property="data"),
+            dash.Output(component_id="playback", component_property="disabled"),
+            dash.Output(component_id="play", component_property="children"),
+        ],
+        [
+            dash.Input(component_id="play", component_property="n_clicks"),
+            dash.Input(component_id="playback", component_property="n_intervals"),
+        ],
+        [
+            dash.State(component_id="playback", component_property="disabled"),
+            dash.State(component_id="time-slider", component_property="value"),
+            dash.State(component_id="y-axis", component_property="value"),
+            dash.State(component_id="runs-list", component_property="value"),
+            dash.State(component_id="types-list", component_property="value"),
+        ],
+    )
+    def play(
+        clicks,
+        frames,
+        paused,
+        current_time,
+        selected_y_axis,
+        selected_run_ids,
+        selected_types,
+    ):
+        trigger = callback_context.triggered[0]["prop_id"]
+        if trigger == "play.n_clicks":
+            if not paused:
+                return dash.no_update, dash.no_update, dash.no_update, True, "Play"
+            # Over, the replay starts again, from a redrawn message timeline
+            restart = 0 if current_time >= simulation_end else dash.no_update
+            return restart, dash.no_update, dash.no_update, False, "Pause"
+        if trigger != "playback.n_intervals" or paused:
+            raise PreventUpdate
+
+        # Only the messages of the frame are sent. Seeking redraws the message
+        # timeline up to the slider, from which the next frame starts again
+        end = min(current_time + simulation_end / PLAYBACK_FRAMES, simulation_end)
+        df = time_indexes[selected_y_axis].between(
+            select_runs(selected_run_ids).index, selected_types, current_time, end
         )
+        extend = dash.no_update
+        if len(df):
+            extend = extension(message_timeline(df, selected_y_axis), selected_types)
+        over = end >= simulation_end
+        return end, extend, end, over, "Play" if over else "Pause"
 
-        return [
-            new_message_timeline,
-            version_timeline_fig,
-            bandwidth_timeline_fig,
-            work_timeline_fig,
-            completeness_fig,
-            messages_timeline_fig,
-            new_message_stats_fig,
-        ]
 
-    app.run_server(debug=True)
+if __name__ == "__main__":
+    with open("./dissec.config.json") as f:
+        config = json.load(f)
+
+    serve(create_app(config))
@@ -1,96 +1,64 @@
 import plotly_express as px
-from dash import html, dcc, dash
+from dash import html, dcc, dash, callback_context
+from dash.exceptions import PreventUpdate
 import numpy as np
 import pandas as pd
 import json
+import os
+import sys
 
-roles = ["Aggregator", "LeafAggregator", "Contributor", "Backup", "Querier"]
-statistics = [
-    "initial_nodes",
-    "final_nodes",
-    "failures",
-    "work",
-    "messages",
-    "work_per_node",
-    "delta_nodes",
-    "inbound_bandwidth",
-    "outbound_bandwidth",
-]
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis.boxes import box
+from analysis.datasets import get_message_tables
+from analysis.loader import join_runs
+from analysis.payloads import compact
+from analysis.serving import serve
+from analysis.startup import defer
+from analysis.timelines import moves_range, timeline
 
 
-def get_data(path):
-    if ".json" in path:
-        with open(path) as f:
-            data = json.load(f)
+def create_app(config, **kwargs):
+    """Dashboard on the default file of `config`, `kwargs` go to `dash.Dash`"""
+    app = dash.Dash(__name__, **kwargs)
+    compact(app)
+    return defer(app, lambda: setup(app, config), "Latency vs Reception time")
 
-        df = pd.concat([pd.DataFrame(i) for i in data])
-    else:
-        df = pd.read_csv(path, sep=";", decimal=",")
-        # We used different decimal format, check which one we have
-        if "float64" not in df.dtypes.unique():
-            df = pd.read_csv(path, sep=";")
 
-    df.rename(
-        mapper={
-            "seed": "seed",
-            "name": "run_id",
-            "buildingBlocks": "strategy",
-            "failureRate": "failure_probability",
-            "observedFailureRate": "failure_rate",
-            "emissionTime": "emitter_time",
-            "receptionTime": "receiver_time",
-            "emitterId": "emitter_id",
-            "receiverId": "receiver_id",
-            "latency": "simulation_length",
-            "work": "total_work",
-            "groupSize": "group_size",
-            "circulatingAggregateIds": "circulating_ids",
-            "currentlyCirculatingVersions": "currently_circulating_ids",
-            "inboundBandwidth": "inbound_bandwidth",
-            "outboundBandwidth": "outbound_bandwidth",
-            "finalInboundBandwidth": "final_inbound_bandwidth",
-            "finalOutboundBandwidth": "final_outbound_bandwidth",
-        },
-        axis=1,
-        inplace=True,
-    )
-    df.reset_index(inplace=True)
-    df.fillna(0, inplace=True)
-
-    df["latency"] = (df["receiver_time"] - df["emitter_time"]).apply(
-        lambda x: max(0, x)
-    )
-
-    for r in roles:
-        df[f"work_per_node_{r}"] = (
-            df[f"work_{r}"] / df[f"final_nodes_{r}"]
-            if (df[f"final_nodes_{r}"] != 0).any()
-            else 0
-        )
-        df[f"delta_nodes_{r}"] = df[f"final_nodes_{r}"] - df[f"initial_nodes_{r}"]
-
-    df.fillna(0, inplace=True)
-    for s in statistics:
-        df[f"{s}_total"] = 0
-        for r in roles:
-            df[f"{s}_total"] += df[f"{s}_{r}"]
+def setup(app, config):
+    """Layout and callbacks of `app` on the default file of `config`"""
+    runs, messages = get_message_tables(config["defaultGraph"])
 
-    return df
+    run_ids = pd.unique(runs["run_id"])
+    strategies = pd.unique(runs["strategy"])
+    status = pd.unique(runs["status"])
+    types = pd.unique(messages["type"])
+    # The registry frame is shared, it is not rounded in place
+    runs = runs.assign(failure_probability=runs["failure_probability"].round(6))
+    failure_probabilities = np.sort(pd.unique(runs["failure_probability"]))
+    failure_rates = np.sort(pd.unique(runs["failure_rate"]))
 
-
-if __name__ == "__main__":
-    with open("./dissec.config.json") as f:
-        config = json.load(f)
-
-    data = get_data(config["defaultGraph"])
-
-    run_ids = pd.unique(data["run_id"])
-    strategies = pd.unique(data["strategy"])
-    status = pd.unique(data["status"])
-    types = pd.unique(data["type"])
-    data["failure_probability"] = data["failure_probability"].round(6)
-    failure_probabilities = np.sort(pd.unique(data["failure_probability"]))
-    failure_rates = np.sort(pd.unique(data["failure_rate"]))
+    # Empty frame with every column, for the figures before the first callback
+    columns = list(messages.columns) + list(runs.columns)
+    # Run columns joined to the messages shown by the timeline callback
+    plotted_columns = [
+        "run_id",
+        "status",
+        "currently_circulating_ids",
+        "outbound_bandwidth",
+        "work_total",
+        "messages_total",
+        "completeness",
+        "latency",
+    ]
+    # Timelines redrawn for their visible window when zoomed
+    timeline_graphs = [
+        "message_timeline",
+        "version_timeline",
+        "bandwidth_timeline",
+        "work_timeline",
+        "completeness_timeline",
+        "messages_timeline",
+    ]
 
     # Remove strategies not present in the data
     strategies_map = dict(
@@ -99,22 +67,25 @@ if __name__ == "__main__":
     for k in set(strategies_map.keys()).difference(strategies):
         del strategies_map[k]
 
-    grouped = data.groupby(["run_id", "status", "strategy"], as_index=False)[
-        [
-            "simulation_length",
-            "total_work",
-            "failure_probability",
-            "failure_rate",
-            "completeness",
+    summary_columns = [
+        "simulation_length",
+        "total_work",
+        "failure_probability",
+        "failure_rate",
+        "completeness",
+    ]
+    grouped = (
+        join_runs(messages, runs, ["run_id", "status", "strategy"] + summary_columns)
+        .groupby(["run_id", "status", "strategy"], as_index=False, observed=True)[
+            summary_columns
         ]
-    ].max()
+        .max()
+    )
     grouped["failure_probability"] = grouped["failure_probability"].round(5)
 
-    app = dash.Dash(__name__)
-
     # Timeline
     message_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="receiver_id",
         color="type",
@@ -129,7 +100,7 @@ if __name__ == "__main__":
         ],
     )
     version_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="currently_circulating_ids",
         color="run_id",
@@ -137,7 +108,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     bandwidth_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="outbound_bandwidth",
         color="run_id",
@@ -145,7 +116,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     work_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="work_total",
         color="run_id",
@@ -153,7 +124,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     messages_timeline_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="messages_total",
         color="run_id",
@@ -161,7 +132,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     completeness_fig = px.scatter(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="receiver_time",
         y="completeness",
         color="run_id",
@@ -169,7 +140,7 @@ if __name__ == "__main__":
         hover_data=["receiver_id", "emitter_id", "run_id"],
     )
     message_stats_fig = px.box(
-        pd.DataFrame(columns=data.columns),
+        pd.DataFrame(columns=columns),
         x="type",
         y="latency",
         hover_name="type",
@@ -191,20 +162,20 @@ if __name__ == "__main__":
                         children=[
                             html.Li(
                                 children=[
-                                    f"There are {len(data.groupby('run_id'))} simulations. {len(data[data['status'] == 'Success'].groupby('run_id'))} success, {len(data[data['status'] != 'Success'].groupby('run_id'))} failures",
+                                    f"There are {len(runs)} simulations. {(runs['status'] == 'Success').sum()} success, {(runs['status'] != 'Success').sum()} failures",
                                     html.Ul(
                                         children=[
                                             html.Li(
                                                 children=f"""
-                            {len(pd.unique(data[data['status'] == i]['run_id']))} have status {i}.
-                            Theoretical failure rate (min={round(data[data['status'] == i]['failure_probability'].min() * 100, 2)}%;
-                            avg={round(data[data['status'] == i]['failure_probability'].mean() * 100, 2)}%;
-                            med={round(data[data['status'] == i]['failure_probability'].median() * 100, 2)}%;
-                            max={round(data[data['status'] == i]['failure_probability'].max() * 100, 2)}%).
-                            Observed failure rate (min={round(data[data['status'] == i]['failure_rate'].min() * 100, 2)}%;
-                            avg={round(data[data['status'] == i]['failure_rate'].mean() * 100, 2)}%;
-                            med={round(data[data['status'] == i]['failure_rate'].median() * 100, 2)}%;
-                            max={round(data[data['status'] == i]['failure_rate'].max() * 100, 2)}%)
+                            {len(pd.unique(runs[runs['status'] == i]['run_id']))} have status {i}.
+                            Theoretical failure rate (min={round(runs[runs['status'] == i]['failure_probability'].min() * 100, 2)}%;
+                            avg={round(runs[runs['status'] == i]['failure_probability'].mean() * 100, 2)}%;
+                            med={round(runs[runs['status'] == i]['failure_probability'].median() * 100, 2)}%;
+                            max={round(runs[runs['status'] == i]['failure_probability'].max() * 100, 2)}%).
+                            Observed failure rate (min={round(runs[runs['status'] == i]['failure_rate'].min() * 100, 2)}%;
+                            avg={round(runs[runs['status'] == i]['failure_rate'].mean() * 100, 2)}%;
+                            med={round(runs[runs['status'] == i]['failure_rate'].median() * 100, 2)}%;
+                            max={round(runs[runs['status'] == i]['failure_rate'].max() * 100, 2)}%)
                             """
                                             )
                                             for i in status
@@ -371,7 +342,8 @@ if __name__ == "__main__":
                 component_id="observed-failure-rates-range", component_property="value"
             ),
             dash.Input(component_id="show-latencies", component_property="value"),
-        ],
+        ]
+        + [dash.Input(graph, "relayoutData") for graph in timeline_graphs],
     )
     def update_timeline(
         selected_y_axis,
@@ -381,14 +353,22 @@ if __name__ == "__main__":
         selected_failures,
         selected_observed_failures,
         show_latencies,
+        *relayouts,
     ):
-        df = data.copy()
+        relayouts = dict(zip(timeline_graphs, relayouts))
+        # A zoomed timeline is the only figure to redraw
+        zoomed = callback_context.triggered[0]["prop_id"].split(".")[0]
+        if zoomed in relayouts and not moves_range(relayouts[zoomed]):
+            raise PreventUpdate
+
+        # Runs are filtered on the small run table, messages only by key
+        selected = runs
         if selected_runs_success != "All":
-            df = df[df["status"] == selected_runs_success]
+            selected = selected[selected["status"] == selected_runs_success]
         elif len(selected_runs_success) == 0:
-            df = pd.DataFrame(columns=data.columns)
-        df = df[
-            df["failure_probability"].isin(
+            selected = selected.iloc[:0]
+        selected = selected[
+            selected["failure_probability"].isin(
                 [
                     i
                     for i in failure_probabilities
@@ -396,8 +376,8 @@ if __name__ == "__main__":
                 ]
             )
         ]
-        df = df[
-            df["failure_rate"].isin(
+        selected = selected[
+            selected["failure_rate"].isin(
                 [
                     i
                     for i in failure_rates
@@ -407,95 +387,110 @@ if __name__ == "__main__":
             )
         ]
         if "All" not in selected_run_ids:
-            df = df[df["run_id"].isin(selected_run_ids)]
-        df = df[df["type"].isin(selected_types)]
+            selected = selected[selected["run_id"].isin(selected_run_ids)]
+        df = messages[
+            messages["run"].isin(selected.index)
+            & messages["type"].isin(selected_types)
+        ]
+        df = join_runs(df, runs, plotted_columns)
 
         if show_latencies:
+            # Error bars towards the other end of the message only
+            df = df.assign(no_latency=0.0)
             if "emitter" in selected_y_axis:
                 error_x = "latency"
-                error_x_minus = np.zeros(len(df))
+                error_x_minus = "no_latency"
             else:
-                error_x = np.zeros(len(df))
+                error_x = "no_latency"
                 error_x_minus = "latency"
         else:
             error_x = None
             error_x_minus = None
 
-        # Timeline
-        new_message_timeline = px.scatter(
-            df,
-            x=selected_y_axis + "_time",
-            error_x=error_x,
-            error_x_minus=error_x_minus,
-            y=selected_y_axis + "_id",
-            color="type",
-            hover_name="type",
-            hover_data=[
-                "receiver_time",
-                "emitter_time",
-                "receiver_id",
-                "emitter_id",
-                "run_id",
-                "status",
-            ],
-        )
-        version_timeline_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="currently_circulating_ids",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        bandwidth_timeline_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="outbound_bandwidth",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        work_timeline_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="work_total",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        completeness_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="completeness",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        messages_timeline_fig = px.scatter(
-            df,
-            x="receiver_time",
-            y="messages_total",
-            color="run_id",
-            hover_name="type",
-            hover_data=["receiver_id", "emitter_id", "run_id"],
-        )
-        new_message_stats_fig = px.box(
-            df,
-            x="type",
-            y="latency",
-            hover_name="type",
-            hover_data=["emitter_id"],
-            points="all",
-        )
+        figures = {
+            # Timeline
+            "message_timeline": lambda: timeline(
+                df,
+                x=selected_y_axis + "_time",
+                error_x=error_x,
+                error_x_minus=error_x_minus,
+                y=selected_y_axis + "_id",
+                color="type",
+                relayout=relayouts["message_timeline"],
+                hover_name="type",
+                hover_data=[
+                    "receiver_time",
+                    "emitter_time",
+                    "receiver_id",
+                    "emitter_id",
+                    "run_id",
+                    "status",
+                ],
+            ),
+            "version_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="currently_circulating_ids",
+                color="run_id",
+                relayout=relayouts["version_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "bandwidth_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="outbound_bandwidth",
+                color="run_id",
+                relayout=relayouts["bandwidth_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "work_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="work_total",
+                color="run_id",
+                relayout=relayouts["work_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "completeness_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="completeness",
+                color="run_id",
+                relayout=relayouts["completeness_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "messages_timeline": lambda: timeline(
+                df,
+                x="receiver_time",
+                y="messages_total",
+                color="run_id",
+                relayout=relayouts["messages_timeline"],
+                hover_name="type",
+                hover_data=["receiver_id", "emitter_id", "run_id"],
+            ),
+            "message_stats": lambda: box(
+                df,
+                x="type",
+                y="latency",
+                hover_name="emitter_id",
+                points="all",
+            ),
+        }
+
+        if zoomed in relayouts:
+            return [
+                figure() if graph == zoomed else dash.no_update
+                for (graph, figure) in figures.items()
+            ]
+        return [figure() for figure in figures.values()]
 
-        return [
-            new_message_timeline,
-            version_timeline_fig,
-            bandwidth_timeline_fig,
-            work_timeline_fig,
-            completeness_fig,
-            messages_timeline_fig,
-            new_message_stats_fig,
-        ]
 
-    app.run_server(debug=True)
+if __name__ == "__main__":
+    with open("./dissec.config.json") as f:
+        config = json.load(f)
+
+    serve(create_app(config))
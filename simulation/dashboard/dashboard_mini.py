@@ -4,6 +4,16 @@ import numpy as np
 import pandas as pd
 import json
 from glob import glob
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis import jobs
+from analysis.datasets import get_dataset
+from analysis.payloads import compact
+from analysis.sections import register_section, section
+from analysis.serving import serve
+from analysis.startup import defer
 
 tabs = [
     dict(label="Probabilité de panne", value="failure_probability"),
@@ -14,69 +24,6 @@ tabs = [
     dict(label="Concentration", value="concentration"),
 ]
 roles = ["Aggregator", "LeafAggregator", "Contributor", "Backup", "Querier"]
-statistics = [
-    "initial_nodes",
-    "final_nodes",
-    "failures",
-    "work",
-    "messages",
-    "work_per_node",
-    "delta_nodes",
-    "bandwidth",
-]
-
-
-def get_data(path):
-    if ".json" in path:
-        with open(path) as f:
-            data = json.load(f)
-
-        df = pd.concat([pd.DataFrame(i) for i in data])
-    else:
-        df = pd.read_csv(path, sep=";", decimal=",")
-        # We used different decimal format, check which one we have
-        if "float64" not in df.dtypes.unique():
-            df = pd.read_csv(path, sep=";")
-
-    df.rename(
-        mapper={
-            "name": "run_id",
-            "buildingBlocks": "strategy",
-            "failureRate": "failure_probability",
-            "observedFailureRate": "failure_rate",
-            "emissionTime": "emitter_time",
-            "receptionTime": "receiver_time",
-            "emitterId": "emitter_id",
-            "receiverId": "receiver_id",
-            "latency": "simulation_length",
-            "work": "total_work",
-            "groupSize": "group_size",
-            "circulatingAggregateIds": "circulating_aggregate_ids",
-            "finalUsedBandwidth": "final_bandwidth",
-        },
-        axis=1,
-        inplace=True,
-    )
-    df.reset_index(inplace=True)
-    df.fillna(0, inplace=True)
-
-    for r in roles:
-        df[f"work_per_node_{r}"] = (
-            df[f"work_{r}"] / df[f"final_nodes_{r}"]
-            if (df[f"final_nodes_{r}"] != 0).any()
-            else 0
-        )
-        df[f"delta_nodes_{r}"] = df[f"final_nodes_{r}"] - df[f"initial_nodes_{r}"]
-
-    df.fillna(0, inplace=True)
-    for s in statistics:
-        df[f"{s}_total"] = 0
-        for r in roles:
-            if f"{s}_{r}" not in df.columns:
-                df[f"{s}_{r}"] = 0
-            df[f"{s}_total"] += df[f"{s}_{r}"]
-
-    return df
 
 
 def generate_summary(data, status, strategies):
@@ -325,6 +272,7 @@ def generate_maps(df, x_axis, y_axis, strategies_map, display_failures=False):
         )
 
     for strat in strategies_map:
+        jobs.step()
         maps[f"{strat}_map_runs"] = px.imshow(
             maps[f"{strat}_map_runs"],
             text_auto=True,
@@ -442,6 +390,7 @@ def generate_maps(df, x_axis, y_axis, strategies_map, display_failures=False):
         )
 
     for strat in strategies_map:
+        jobs.step()
         maps_roles[f"{strat}_work_per_role_total"] = px.imshow(
             maps_roles[f"{strat}_work_per_role_total"],
             text_auto=True,
@@ -465,6 +414,7 @@ def generate_maps(df, x_axis, y_axis, strategies_map, display_failures=False):
     # Courbes
     curves = dict()
     for strat in strategies_map:
+        jobs.step()
         df_strat = copy_df[copy_df["strategy"] == strat]
         curves[f"{strat}_curve_completeness_depth"] = px.line(
             df_strat.groupby(["depth", "failure_probability"], as_index=False).mean(),
@@ -763,35 +713,29 @@ def generate_maps(df, x_axis, y_axis, strategies_map, display_failures=False):
     )
 
 
-if __name__ == "__main__":
-    with open("./dissec.config.json") as f:
-        config = json.load(f)
+def create_app(config, **kwargs):
+    """Dashboard on the default file of `config`, `kwargs` go to `dash.Dash`"""
+    app = dash.Dash(__name__, **kwargs)
+    compact(app)
+    return defer(app, lambda: setup(app, config), "Simulation  task")
 
-    data = get_data(config["defaultGraph"])
+
+def setup(app, config):
+    """Layout and callbacks of `app` on the default file of `config`"""
+    data = get_dataset(config["defaultGraph"], "mini", False)
 
     run_ids = pd.unique(data["run_id"])
     strategies = pd.unique(data["strategy"])
     status = pd.unique(data["status"])
-    data["failure_probability"] = data["failure_probability"].round(8)
+    # The registry frame is shared, it is not rounded in place
+    data = data.assign(failure_probability=data["failure_probability"].round(8))
     failure_probabilities = np.sort(pd.unique(data["failure_probability"]))
     failure_rates = np.sort(pd.unique(data["failure_rate"]))
 
     outputs = glob("./outputs/*")
 
-    # Remove strategies not present in the data
-    strategies_map = dict(
-        EAGER="Eager", OPTI="Optimistic", PESS="Pessimistic", STRAW="Strawman"
-    )
-    for k in set(strategies_map.keys()).difference(strategies):
-        del strategies_map[k]
-
-    summary = generate_summary(data, status, strategies)
-
     default_x = tabs[0]["value"]
     default_y = tabs[1]["value"]
-    maps = generate_maps(data, tabs[0]["value"], tabs[1]["value"], strategies_map)
-
-    app = dash.Dash(__name__)
 
     app.layout = html.Div(
         children=[
@@ -813,7 +757,8 @@ if __name__ == "__main__":
                     html.H1(id="file_span", children=f"{config['defaultGraph']}"),
                 ]
             ),
-            html.Div(id="summary", children=summary),
+            # Filled by the summary callback, on the initial filters
+            html.Div(id="summary"),
             html.Div(
                 [
                     html.H3("Failure Probabilities"),
@@ -897,7 +842,7 @@ if __name__ == "__main__":
                     ),
                 ],
             ),
-            html.Div(id="maps", children=[maps]),
+            section("maps", "Maps", opened=True),
         ]
     )
 
@@ -906,26 +851,52 @@ if __name__ == "__main__":
         dash.Input(component_id="file-select", component_property="value"),
     )
     def update_file(selected_file):
-        return [get_data(selected_file).to_json(), selected_file]
+        # Loaded here so that the graphs callback finds it in the registry
+        get_dataset(selected_file, "mini", False)
+        return [selected_file, selected_file]
+
+    def select_runs(store_file, selected_failures, selected_sizes, selected_depths):
+        """Runs of the selected file within the ranges of the sliders"""
+        df = get_dataset(store_file or config["defaultGraph"], "mini", False)
+
+        # The registry frame is shared, it is not rounded in place
+        df = df.assign(failure_probability=df["failure_probability"].round(6))
+
+        df = df[
+            (df["failure_probability"] >= selected_failures[0])
+            & (df["failure_probability"] <= selected_failures[1])
+        ]
+        df = df[
+            (df["group_size"] >= selected_sizes[0])
+            & (df["group_size"] <= selected_sizes[1])
+        ]
+        df = df[
+            (df["depth"] >= selected_depths[0]) & (df["depth"] <= selected_depths[1])
+        ]
+        return df
+
+    filters = [
+        dash.Input(
+            component_id="failure-probabilities-range", component_property="value"
+        ),
+        dash.Input(component_id="group-sizes-range", component_property="value"),
+        dash.Input(component_id="depths-range", component_property="value"),
+    ]
 
     @app.callback(
-        [
-            dash.Output(component_id="summary", component_property="children"),
-            dash.Output(component_id="maps", component_property="children"),
-        ],
-        [
-            dash.Input(
-                component_id="failure-probabilities-range", component_property="value"
-            ),
-            dash.Input(component_id="group-sizes-range", component_property="value"),
-            dash.Input(component_id="depths-range", component_property="value"),
-            dash.Input(component_id="x_axis_dropdown", component_property="value"),
-            dash.Input(component_id="y_axis_dropdown", component_property="value"),
-            dash.Input(component_id="display_failures", component_property="value"),
-        ],
+        dash.Output(component_id="summary", component_property="children"),
+        filters,
         dash.State("store_file", "data"),
     )
-    def update_graphs(
+    def update_summary(selected_failures, selected_sizes, selected_depths, store_file):
+        df = get_dataset(store_file or config["defaultGraph"], "mini", False)
+        strategies = pd.unique(df["strategy"])
+        status = pd.unique(df["status"])
+
+        df = select_runs(store_file, selected_failures, selected_sizes, selected_depths)
+        return generate_summary(df, status, strategies)
+
+    def draw_maps(
         selected_failures,
         selected_sizes,
         selected_depths,
@@ -934,38 +905,37 @@ if __name__ == "__main__":
         display_failures,
         store_file,
     ):
-        if not store_file:
-            df = get_data(config["defaultGraph"])
-        else:
-            df = pd.read_json(store_file)
-
-        strategies = pd.unique(df["strategy"])
-        status = pd.unique(df["status"])
-        df["failure_probability"] = df["failure_probability"].round(6)
+        df = select_runs(store_file, selected_failures, selected_sizes, selected_depths)
 
         # Remove strategies not present in the data
         strategies_map = dict(
             EAGER="Eager", OPTI="Optimistic", PESS="Pessimistic", STRAW="Strawman"
         )
-        for k in set(strategies_map.keys()).difference(strategies):
+        for k in set(strategies_map.keys()).difference(pd.unique(df["strategy"])):
             del strategies_map[k]
 
-        df = df[
-            (df["failure_probability"] >= selected_failures[0])
-            & (df["failure_probability"] <= selected_failures[1])
-        ]
-        df = df[
-            (df["group_size"] >= selected_sizes[0])
-            & (df["group_size"] <= selected_sizes[1])
-        ]
-        df = df[
-            (df["depth"] >= selected_depths[0]) & (df["depth"] <= selected_depths[1])
+        return [
+            generate_maps(df, x_axis, y_axis, strategies_map, "YES" in display_failures)
         ]
 
-        maps = generate_maps(
-            df, x_axis, y_axis, strategies_map, "YES" in display_failures
-        )
+    # With the background argument, the maps are drawn by a pool of workers
+    register_section(
+        app,
+        "maps",
+        draw_maps,
+        filters
+        + [
+            dash.Input(component_id="x_axis_dropdown", component_property="value"),
+            dash.Input(component_id="y_axis_dropdown", component_property="value"),
+            dash.Input(component_id="display_failures", component_property="value"),
+        ],
+        [dash.State("store_file", "data")],
+        background="background" in sys.argv,
+    )
 
-        return [generate_summary(df, status, strategies), maps]
 
-    app.run_server(debug=True)
+if __name__ == "__main__":
+    with open("./dissec.config.json") as f:
+        config = json.load(f)
+
+    serve(create_app(config))
@@ -1,6 +1,7 @@
 import plotly_express as px
 import plotly.graph_objs as go
 from dash import html, dcc, dash
+from dash.exceptions import PreventUpdate
 import numpy as np
 import pandas as pd
 import json
@@ -8,6 +9,24 @@ from glob import glob
 import sys
 from itertools import cycle
 from plotly.subplots import make_subplots
+import os
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis import jobs
+from analysis.boxes import box
+from analysis.clientside import encode, fits, register_clientside
+from analysis.cube import dense, roll_up, select, snap
+from analysis.datasets import dataset_key, get_cube, get_dataset, get_run_index
+from analysis.pareto import pareto_fronts
+from analysis.figures import get_figures
+from analysis.payloads import compact
+from analysis.runs import RunIndex
+from analysis.sections import register_section, section
+from analysis.serving import serve
+from analysis.startup import defer
+
+# Short name in the heatmap rows and title in the exports of their dimensions
+MAPS_LABELS = dict(depth=("depth", "Height"), model_size=("model", "Model size"))
 
 tabs = [
     dict(label="Probabilité de panne", value="failure_probability"),
@@ -15,153 +34,22 @@ tabs = [
     dict(label="Fanout", value="fanout"),
     dict(label="Profondeur", value="depth"),
 ]
-roles = ["Aggregator", "LeafAggregator", "Contributor", "Backup", "Querier", "Worker"]
-statistics = [
-    "initial_nodes",
-    "final_nodes",
-    "failures",
-    "work",
-    "messages",
-    "work_per_node",
-    "bandwidth_per_node",
-    "delta_nodes",
-    "inbound_bandwidth",
-    "outbound_bandwidth",
-]
-
 
-def get_data(path, aggregate_message=True):
-    if ".json" in path:
-        with open(path) as f:
-            data = json.load(f)
 
-        df = pd.concat([pd.DataFrame(i) for i in data])
-    else:
-        df = pd.read_csv(path, sep=";", decimal=",")
-        # We used different decimal format, check which one we have
-        if "float64" not in df.dtypes.unique():
-            df = pd.read_csv(path, sep=";")
-
-    df["name"] = df["name"] + "-g" + df["groupSize"].map(str)
-    df.rename(
-        mapper={
-            "seed": "seed",
-            "name": "run_id",
-            "buildingBlocks": "strategy",
-            "failureRate": "failure_window",
-            "observedFailureRate": "failure_rate",
-            "observedContributorsFailureRate": "failure_rate_contributors",
-            "observedWorkersFailureRate": "failure_rate_workers",
-            "emissionTime": "emitter_time",
-            "receptionTime": "receiver_time",
-            "emitterId": "emitter_id",
-            "receiverId": "receiver_id",
-            "latency": "simulation_length",
-            "work": "total_work",
-            "groupSize": "group_size",
-            "modelSize": "model_size",
-            "circulatingAggregateIds": "circulating_aggregate_ids",
-            "currentlyCirculatingVersions": "currently_circulating_ids",
-            "inboundBandwidth": "inbound_bandwidth",
-            "outboundBandwidth": "outbound_bandwidth",
-            "finalInboundBandwidth": "final_inbound_bandwidth",
-            "finalOutboundBandwidth": "final_outbound_bandwidth",
-        },
-        axis=1,
-        inplace=True,
-    )
-    df.drop(
-        index=df[df["strategy"] == "LFP,Replace,0Resync,3,NonBlocking"].index,
-        inplace=True,
-    )
-    df.reset_index(inplace=True)
-    df.fillna(0, inplace=True)
-
-    strategies = pd.unique(df["strategy"])
-    translate_strategies = {
-        "FFP,Drop,Stop,1,None": "LowCost",
-        "LFP,Replace,Stay,1,NonBlocking": "HighCmpl",
-        "LFP,Drop,Stop,1,FullSync": "S&P",
-        "LFP,Replace,0Resync,1,NonBlocking": "Hybrid",
-        "LFP,Replace,0Resync,1,Leaves": "HyBlock",
+def generate_summary(data, cube, status, strategies):
+    # Counts and extrema come from the cube, the medians still need the runs
+    per_status = {
+        statistic: roll_up(cube, ["status"], statistic)
+        .set_index("status")
+        .reindex(status)
+        for statistic in ["count", "min", "mean", "max"]
     }
-    for s in strategies:
-        df.loc[df["strategy"] == s, "strategy"] = (
-            translate_strategies[s] if s in translate_strategies else s
-        )
-
-    for stat in statistics:
-        if (
-            "work_per_node" in stat
-            or "delta_nodes" in stat
-            or "bandwidth_per_node" in stat
-        ):
-            continue
-
-        df[f"{stat}_Worker"] = (
-            df[f"{stat}_Aggregator"]
-            + df[f"{stat}_LeafAggregator"]
-            + df[f"{stat}_Querier"]
-        )
-
-    for r in roles:
-        df[f"work_per_node_{r}"] = (
-            df[f"work_{r}"] / df[f"final_nodes_{r}"]
-            if (df[f"final_nodes_{r}"] != 0).any()
-            else 0
-        )
-        df[f"bandwidth_per_node_{r}"] = (
-            df[f"inbound_bandwidth_{r}"] / df[f"final_nodes_{r}"]
-            if (df[f"final_nodes_{r}"] != 0).any()
-            else 0
-        )
-        df[f"delta_nodes_{r}"] = df[f"final_nodes_{r}"] - df[f"initial_nodes_{r}"]
-        df[f"delta_nodes_{r}"] = df[f"delta_nodes_{r}"].abs()
-
-    df.fillna(0, inplace=True)
-    for s in statistics:
-        df[f"{s}_total"] = 0
-        for r in roles:
-            df[f"{s}_total"] += df[f"{s}_{r}"]
-
-    if aggregate_message:
-        df = df.groupby(["run_id", "status", "strategy"]).mean()
-        df.reset_index(inplace=True)
-
-    df.loc[df["failure_window"] == 0, "failure_window"] = np.inf
-    df["failure_probability"] = 100 / df["failure_window"]
-    df["failure_probability"] = df["failure_probability"].round(5)
+    runs_per_status = per_status["count"]["failure_rate"].fillna(0).astype(int)
+    runs_per_strategy = roll_up(cube, ["strategy"], "count").set_index("strategy")
+    successes_per_strategy = roll_up(
+        select(cube, status="Success"), ["strategy"], "count"
+    ).set_index("strategy")
 
-    df["has_result"] = df["completeness"] > 0
-
-    # Computing % versions per level
-    cols = ["_level_0", "_level_1", "_level_2", "_level_3", "_level_4"]
-    for c in cols:
-        depth = int(c.split("_")[-1])
-        df["versions_percent" + c] = df["versions" + c] / df["fanout"] ** (
-            df["depth"] - depth
-        )
-        df["work_avg" + c] = df["work" + c] / df["fanout"] ** (df["depth"] - depth)
-
-    to_drop = [
-        {"seed": "2-3", "depth": 4, "model_size": 1024, "group_size": 5},
-        {"seed": "3-6", "depth": 4, "model_size": 1024, "group_size": 5},
-    ]
-    for d in to_drop:
-        df.drop(
-            index=df[
-                (df["seed"] == d["seed"])
-                & (df["depth"] == d["depth"])
-                & (df["model_size"] == d["model_size"])
-                & (df["group_size"] == d["group_size"])
-            ].index,
-            inplace=True,
-        )
-
-    return df
-
-
-def generate_summary(data, status, strategies):
     return (
         html.Div(
             style={"justifyContent": "center"},
@@ -171,20 +59,20 @@ def generate_summary(data, status, strategies):
                     children=[
                         html.Li(
                             children=[
-                                f"There are {len(data.groupby('run_id'))} simulations. {len(data[data['status'] == 'Success'].groupby('run_id'))} success, {len(data[data['status'] != 'Success'].groupby('run_id'))} failures",
+                                f"There are {runs_per_status.sum()} simulations. {runs_per_status.get('Success', 0)} success, {runs_per_status.sum() - runs_per_status.get('Success', 0)} failures",
                                 html.Ul(
                                     children=[
                                         html.Li(
                                             children=f"""
-                            {len(pd.unique(data[data['status'] == i]['run_id']))} have status {i}.
-                            Theoretical failure rate (min={round(data[data['status'] == i]['failure_probability'].min() * 100, 2)}%;
-                            avg={round(data[data['status'] == i]['failure_probability'].mean() * 100, 2)}%;
+                            {runs_per_status[i]} have status {i}.
+                            Theoretical failure rate (min={round(per_status['min'].loc[i, 'failure_probability'] * 100, 2)}%;
+                            avg={round(per_status['mean'].loc[i, 'failure_probability'] * 100, 2)}%;
                             med={round(data[data['status'] == i]['failure_probability'].median() * 100, 2)}%;
-                            max={round(data[data['status'] == i]['failure_probability'].max() * 100, 2)}%).
-                            Observed failure rate (min={round(data[data['status'] == i]['failure_rate'].min() * 100, 2)}%;
-                            avg={round(data[data['status'] == i]['failure_rate'].mean() * 100, 2)}%;
+                            max={round(per_status['max'].loc[i, 'failure_probability'] * 100, 2)}%).
+                            Observed failure rate (min={round(per_status['min'].loc[i, 'failure_rate'] * 100, 2)}%;
+                            avg={round(per_status['mean'].loc[i, 'failure_rate'] * 100, 2)}%;
                             med={round(data[data['status'] == i]['failure_rate'].median() * 100, 2)}%;
-                            max={round(data[data['status'] == i]['failure_rate'].max() * 100, 2)}%)
+                            max={round(per_status['max'].loc[i, 'failure_rate'] * 100, 2)}%)
                             """
                                         )
                                         for i in status
@@ -199,7 +87,7 @@ def generate_summary(data, status, strategies):
                                     children=[
                                         html.Li(
                                             children=[
-                                                f"{len(data[data['strategy'] == i])} runs using {i} strategy, {len(data.loc[(data['status'] == 'Success') & (data['strategy'] == i)])} success"
+                                                f"{int(runs_per_strategy['failure_rate'].get(i, 0))} runs using {i} strategy, {int(successes_per_strategy['failure_rate'].get(i, 0))} success"
                                             ]
                                         )
                                         for i in strategies
@@ -214,7 +102,31 @@ def generate_summary(data, status, strategies):
     )
 
 
-def generate_graphs(data, strategies_map, tab="failure_probability", export=True):
+def generate_graphs(*args, **kwargs):
+    """Figures of the paper in a single Div, see `draw_graphs`"""
+    return html.Div(children=list(draw_graphs(*args, **kwargs)))
+
+
+def draw_graphs(
+    data,
+    cube,
+    strategies_map,
+    run_index=None,
+    tab="failure_probability",
+    export=True,
+    y_maps_dimensions=("depth", "model_size"),
+    y_maps_values=None,
+):
+    """Figures of the paper, exported to `outputs/final` with `export`.
+
+    The rows of figures are yielded in the order of the page, each as soon as
+    its figures and those of the rows before it are drawn.
+
+    The rows of the strategy heatmaps are the configurations `y_maps_values`
+    of the `y_maps_dimensions`, by default small and large trees for each
+    model size. `run_index` indexes the runs of `data`, it is built on them
+    when not given.
+    """
     graphs = dict()
 
     strategies = pd.unique(data["strategy"])
@@ -225,6 +137,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
     print("graphing", strategies, failure_probabilities, depths, group_sizes)
 
     box_points = False
+    # At most BOX_MAX_POINTS points are sent per box, see analysis.boxes
     box_points = "all"
 
     default_failure = 0.25
@@ -239,45 +152,37 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
     tiny_model = 1
     small_model = 2**10
     large_model = 2**12
-    y_maps_values = [
-        (small_tree, tiny_model),
-        (large_tree, tiny_model),
-        (small_tree, small_model),
-        (large_tree, small_model),
-        (small_tree, large_model),
-        (large_tree, large_model),
+    if y_maps_values is None:
+        y_maps_values = [
+            (small_tree, tiny_model),
+            (large_tree, tiny_model),
+            (small_tree, small_model),
+            (large_tree, small_model),
+            (small_tree, large_model),
+            (large_tree, large_model),
+        ]
+    # Means per configuration, failure probability and strategy, from the cube
+    maps_axes = [
+        (tuple(y_maps_dimensions), y_maps_values),
+        ("failure_probability", failure_probabilities),
+        ("strategy", list(strategies)),
     ]
-    map_completeness = np.zeros(
-        (len(y_maps_values), len(failure_probabilities), len(strategies))
-    )
-    map_work = np.zeros(
-        (len(y_maps_values), len(failure_probabilities), len(strategies))
-    )
-    map_latency = np.zeros(
-        (len(y_maps_values), len(failure_probabilities), len(strategies))
+    # The completeness is that of the default group size
+    default_group_cube = select(cube, group_size=default_group)
+    map_completeness = dense(default_group_cube, "completeness", maps_axes)
+    map_work = dense(cube, "work_per_node_total", maps_axes)
+    map_latency = dense(cube, "simulation_length", maps_axes)
+    y_maps_labels = [
+        " ".join(
+            f"{MAPS_LABELS.get(dimension, (dimension,))[0]}{value}"
+            for (dimension, value) in zip(y_maps_dimensions, config)
+        )
+        for config in y_maps_values
+    ]
+    y_maps_title = ", ".join(
+        MAPS_LABELS.get(dimension, (dimension, dimension))[1]
+        for dimension in y_maps_dimensions
     )
-    for (j, (depth, model_size)) in enumerate(y_maps_values):
-        for (i, failure) in enumerate(failure_probabilities):
-            for (k, strat) in enumerate(strategies):
-                map_completeness[j, i, k] = data[
-                    (data["depth"] == depth)
-                    & (data["model_size"] == model_size)
-                    & (data["failure_probability"] == failure)
-                    & (data["group_size"] == 5)
-                    & (data["strategy"] == strat)
-                ]["completeness"].mean()
-                map_work[j, i, k] = data[
-                    (data["depth"] == depth)
-                    & (data["model_size"] == model_size)
-                    & (data["failure_probability"] == failure)
-                    & (data["strategy"] == strat)
-                ]["work_per_node_total"].mean()
-                map_latency[j, i, k] = data[
-                    (data["depth"] == depth)
-                    & (data["model_size"] == model_size)
-                    & (data["failure_probability"] == failure)
-                    & (data["strategy"] == strat)
-                ]["simulation_length"].mean()
 
     np.nan_to_num(map_completeness, False)
     np.nan_to_num(map_work, False)
@@ -308,7 +213,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
     ]
 
     strat_symbol = ["LC", "HC", "SP", "Hy", "HyB"]
-    for (j, (depth, model_size)) in enumerate(y_maps_values):
+    for j in range(len(y_maps_values)):
         for (i, failure) in enumerate(failure_probabilities):
             complete_strategies = np.where(
                 (
@@ -353,6 +258,22 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
                 np.where(map_latency[j, i, :] == np.min(map_latency[j, i, :]))[0][0]
             ]
 
+    # Strategies on the Pareto front of each cell, the complete ones as good,
+    # among the runs of the completeness map it is drawn like
+    pareto = pareto_fronts(
+        default_group_cube,
+        maps_axes,
+        tolerances=dict(completeness=1 - completeness_margin),
+    )
+    symbols = [
+        strat_symbol[k] if k < len(strat_symbol) else str(strat)
+        for (k, strat) in enumerate(strategies)
+    ]
+    pareto_labels = [
+        [", ".join(symbols[k] for k in np.flatnonzero(cell)) for cell in row]
+        for row in pareto
+    ]
+
     # Export
     if export:
         dfs_completeness = []
@@ -378,25 +299,35 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
             f"./outputs/final/map_completeness.csv",
             sep=";",
             index=True,
-            index_label="(Height, Model size)",
+            index_label=f"({y_maps_title})",
         )
         pd.concat(dfs_work, axis=0).to_csv(
             f"./outputs/final/map_work.csv",
             sep=";",
             index=True,
-            index_label="(Height, Model size)",
+            index_label=f"({y_maps_title})",
         )
         pd.concat(dfs_latency, axis=0).to_csv(
             f"./outputs/final/map_latency.csv",
             sep=";",
             index=True,
-            index_label="(Height, Model size)",
+            index_label=f"({y_maps_title})",
         )
         pd.DataFrame(
             best_strat_work_labels_map,
             columns=["None", "Few", "Some", "A lot", "Extreme"],
             index=y_maps_values,
         ).to_csv(f"./outputs/final/map_bests.csv", sep=";", index=False)
+        pd.DataFrame(
+            pareto_labels,
+            columns=["None", "Few", "Some", "A lot", "Extreme"],
+            index=y_maps_values,
+        ).to_csv(
+            f"./outputs/final/map_pareto.csv",
+            sep=";",
+            index=True,
+            index_label=f"({y_maps_title})",
+        )
 
     graphs["map_completeness"] = go.Figure(
         data=go.Heatmap(
@@ -405,10 +336,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
             texttemplate="%{text}",
             textfont={"size": 20},
             x=["None", "Few", "Some", "A lot", "Extreme"],
-            y=[
-                f"depth{depth} model{model_size}"
-                for (depth, model_size) in y_maps_values
-            ],
+            y=y_maps_labels,
         ),
     ).update_layout(title_text="Completeness")
     graphs["map_work"] = go.Figure(
@@ -418,10 +346,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
             texttemplate="%{text}",
             textfont={"size": 20},
             x=["None", "Few", "Some", "A lot", "Extreme"],
-            y=[
-                f"depth{depth} model{model_size}"
-                for (depth, model_size) in y_maps_values
-            ],
+            y=y_maps_labels,
         ),
     ).update_layout(title_text="Work per node (s)")
     graphs["map_latency"] = go.Figure(
@@ -431,10 +356,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
             texttemplate="%{text}",
             textfont={"size": 20},
             x=["None", "Few", "Some", "A lot", "Extreme"],
-            y=[
-                f"depth{depth} model{model_size}"
-                for (depth, model_size) in y_maps_values
-            ],
+            y=y_maps_labels,
         ),
     ).update_layout(title_text="Execution Latency (s)")
     graphs["map_best"] = go.Figure(
@@ -444,22 +366,36 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
             texttemplate="%{text}",
             textfont={"size": 20},
             x=["None", "Few", "Some", "A lot", "Extreme"],
-            y=[
-                f"depth{depth} model{model_size}"
-                for (depth, model_size) in y_maps_values
-            ],
+            y=y_maps_labels,
         ),
     ).update_layout(width=1500, height=600)
+    graphs["map_pareto"] = go.Figure(
+        data=go.Heatmap(
+            z=pareto.sum(axis=-1),
+            text=pareto_labels,
+            texttemplate="%{text}",
+            textfont={"size": 20},
+            x=["None", "Few", "Some", "A lot", "Extreme"],
+            y=y_maps_labels,
+        ),
+    ).update_layout(
+        title_text="Pareto-optimal strategies (completeness, work, latency, bandwidth)",
+        width=1500,
+        height=600,
+    )
 
+    # The runs of each figure are contiguous slices of the sorted runs
+    if run_index is None:
+        run_index = RunIndex(data)
     plots_config = [
         dict(
             {
                 "name": "some_failure_tiny_model_completeness",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == 1)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=1,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "completeness",
                 "range_x": [0.2, 0.55],
@@ -471,11 +407,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "some_failure_tiny_model_latency",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == 1)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=1,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "simulation_length",
                 "range_x": [0.2, 0.55],
@@ -487,11 +423,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "some_failure_tiny_model_work_per_node",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == 1)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=1,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "work_per_node_total",
                 "range_x": [0.2, 0.55],
@@ -503,11 +439,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "some_failure_tiny_model_bandwidth_per_node",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == 1)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=1,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "inbound_bandwidth_total",
                 "range_x": [0.2, 0.55],
@@ -519,11 +455,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "some_failure_completeness",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == default_size)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=default_size,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "completeness",
                 "range_x": [0.2, 0.55],
@@ -535,11 +471,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "some_failure_latency",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == default_size)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=default_size,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "simulation_length",
                 "range_x": [0.2, 0.55],
@@ -551,11 +487,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "some_failure_work_per_node",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == default_size)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=default_size,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "work_per_node_total",
                 "range_x": [0.2, 0.55],
@@ -567,11 +503,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "some_failure_bandwidth",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == default_size)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=default_size,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "inbound_bandwidth_total",
                 "range_x": [0.2, 0.55],
@@ -583,11 +519,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "high_failures_completeness",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == default_size)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=default_size,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "completeness",
                 "range_x": [0.45, 1.25],
@@ -599,11 +535,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "high_failures_latency",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["model_size"] == default_size)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    model_size=default_size,
+                    group_size=default_group,
+                ),
                 "x": "failure_probability",
                 "y": "simulation_length",
                 "range_x": [0.45, 1.25],
@@ -615,11 +551,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "depth_completeness",
-                "data": data[
-                    (data["failure_probability"] == default_failure)
-                    & (data["model_size"] == default_size)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    failure_probability=default_failure,
+                    model_size=default_size,
+                    group_size=default_group,
+                ),
                 "x": "depth",
                 "y": "completeness",
                 "range_x": [2.5, 5.5],
@@ -631,11 +567,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "depth_latency",
-                "data": data[
-                    (data["failure_probability"] == default_failure)
-                    & (data["model_size"] == default_size)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    failure_probability=default_failure,
+                    model_size=default_size,
+                    group_size=default_group,
+                ),
                 "x": "depth",
                 "y": "simulation_length",
                 "range_x": [2.5, 5.5],
@@ -647,11 +583,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "size_completeness",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["failure_probability"] == default_failure)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    failure_probability=default_failure,
+                    group_size=default_group,
+                ),
                 "x": "model_size",
                 "y": "completeness",
                 "range_x": [0.5, 20000],
@@ -663,11 +599,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "size_latency",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["failure_probability"] == default_failure)
-                    & (data["group_size"] == default_group)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    failure_probability=default_failure,
+                    group_size=default_group,
+                ),
                 "x": "model_size",
                 "y": "simulation_length",
                 "range_x": [0.5, 20000],
@@ -679,11 +615,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "group_completeness",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["failure_probability"] == default_failure)
-                    & (data["model_size"] == default_size)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    failure_probability=default_failure,
+                    model_size=default_size,
+                ),
                 "x": "group_size",
                 "y": "completeness",
                 "range_x": [3.5, 6.5],
@@ -695,11 +631,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "group_latency",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["failure_probability"] == default_failure)
-                    & (data["model_size"] == default_size)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    failure_probability=default_failure,
+                    model_size=default_size,
+                ),
                 "x": "group_size",
                 "y": "simulation_length",
                 "range_x": [3.5, 6.5],
@@ -711,11 +647,11 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         dict(
             {
                 "name": "group_work",
-                "data": data[
-                    (data["depth"] == default_depth)
-                    & (data["failure_probability"] == default_failure)
-                    & (data["model_size"] == default_size)
-                ],
+                "data": run_index.query(
+                    depth=default_depth,
+                    failure_probability=default_failure,
+                    model_size=default_size,
+                ),
                 "x": "group_size",
                 "y": "work_per_node_total",
                 "range_x": [3.5, 6.5],
@@ -726,6 +662,89 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         ),
     ]
 
+    # Rows of the page in order, the final box plots wrapped at 600px each
+    final_boxes = [conf["name"] for conf in plots_config]
+    layout_rows = [
+        final_boxes,
+        ["map_completeness", "map_work", "map_latency"],
+        ["map_best"],
+        ["map_pareto"],
+        ["count_failure_paper", "count_depth_paper", "count_group_paper"],
+        [
+            "failures_contributors_failure_paper",
+            "failures_contributors_depth_paper",
+            "failures_contributors_group_paper",
+        ],
+        [
+            "failures_workers_failure_paper",
+            "failures_workers_depth_paper",
+            "failures_workers_group_paper",
+        ],
+        ["work_failure_paper", "work_depth_paper", "work_group_paper"],
+        ["latency_failure_paper", "latency_depth_paper", "latency_group_paper"],
+        ["bandwidth_failure_paper", "bandwidth_depth_paper", "bandwidth_group_paper"],
+        [
+            "completeness_failure_paper",
+            "completeness_depth_paper",
+            "completeness_group_paper",
+        ],
+        ["versions_failure_paper", "versions_depth_paper", "versions_group_paper"],
+        ["failures_line"],
+        "Bar plots",
+        ["work_failure_bar", "work_depth_bar", "work_size_bar"],
+        ["bandwidth_failure_bar", "bandwidth_depth_bar", "bandwidth_size_bar"],
+        ["initial_nodes_count_bar", "final_nodes_count_bar", "delta_nodes_count_bar"],
+        ["work_level_bar", "messages_level_bar", "bandwidth_level_bar"],
+        ["failures_level_bar", "versions_level_bar", "propagation_level_bar"],
+        [
+            "versions_level_bar_simpler",
+            "versions_level_bar_focus",
+            "work_level_bar_focus",
+        ],
+        ["versions_level_tiny_bar_focus", "work_level_tiny_bar_focus"],
+        ["avg_work_contributors_paper", "avg_work_workers_paper"],
+        ["completeness_avg_line", "bandwidth_avg_line"],
+    ]
+
+    def drawn_rows():
+        """Rows not shown yet, up to the first one whose figures are not drawn"""
+        while layout_rows and (
+            isinstance(layout_rows[0], str)
+            or all(name in graphs for name in layout_rows[0])
+        ):
+            names = layout_rows.pop(0)
+            if isinstance(names, str):
+                yield html.H1(names)
+            elif names is final_boxes:
+                yield html.Div(
+                    style={
+                        "display": "flex",
+                        "flex-wrap": "wrap",
+                        "justify-content": "center",
+                    },
+                    children=[
+                        dcc.Graph(
+                            style={
+                                "width": "600px",
+                            },
+                            id=name,
+                            figure=graphs[name],
+                        )
+                        for name in names
+                    ],
+                )
+            else:
+                yield html.Div(
+                    style={
+                        "display": "flex",
+                        "flex-direction": "row",
+                        "justify-content": "center",
+                    },
+                    children=[
+                        dcc.Graph(id=name, figure=graphs[name]) for name in names
+                    ],
+                )
+
     def make_final_box_plot(config):
         if len(config["data"]) == 0:
             print(f"{config['x']}_{config['range_x']}-{config['y']} failed to print...")
@@ -737,16 +756,22 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
                 f"{config['x']}_{config['range_x']}-{config['y']}.csv",
                 pd.unique(config["data"]["group_size"]),
             )
-            df = pd.DataFrame(index=config["data"].index)
-            df[config["x"]] = config["data"][config["x"]]
-            df["name"] = config["data"]["run_id"].str.split(pat="-m", expand=True)[1]
-            strats = pd.unique(config["data"]["strategy"])
-            for strat in strats:
-                df[strat] = config["data"][config["data"]["strategy"] == strat][
-                    config["y"]
-                ]
-
-            df = df.groupby(["name"]).mean()
+            # One row per settings, the mean of each strategy side by side
+            runs = config["data"]
+            strats = pd.unique(runs["strategy"])
+            runs = runs[runs["run_settings"] >= 0]
+            df = pd.concat(
+                [
+                    runs.groupby("run_settings")[config["x"]].mean(),
+                    runs.groupby(["run_settings", "strategy"], observed=True)[
+                        config["y"]
+                    ]
+                    .mean()
+                    .unstack("strategy")
+                    .reindex(columns=strats),
+                ],
+                axis=1,
+            )
             df.sort_values(config["x"], inplace=True)
             df.to_csv(
                 f"./outputs/final/{config['name']}_{config['x']}_{config['range_x']}-{config['y']}.csv",
@@ -754,7 +779,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
                 index=False,
             )
 
-        return px.box(
+        return box(
             config["data"],
             x=config["x"],
             range_x=config["range_x"],
@@ -769,9 +794,10 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
 
     for conf in plots_config:
         graphs[conf["name"]] = make_final_box_plot(conf)
+    yield from drawn_rows()
 
-    graphs[f"count_failure_paper"] = px.box(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
+    graphs[f"count_failure_paper"] = box(
+        run_index.query(depth=default_depth, model_size=default_size),
         x="failure_probability",
         y="initial_nodes_Contributor",
         color="strategy",
@@ -780,11 +806,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         # log_x=True,
         title=f"Contributors for Failure",
     )
-    graphs[f"count_depth_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
+    graphs[f"count_depth_paper"] = box(
+        run_index.query(failure_window=default_window, model_size=default_size),
         x="depth",
         y="initial_nodes_Contributor",
         color="strategy",
@@ -793,11 +816,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         log_y=True,
         title=f"Contributors for depth",
     )
-    graphs[f"count_group_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
+    graphs[f"count_group_paper"] = box(
+        run_index.query(failure_window=default_window, depth=default_depth),
         x="model_size",
         y="initial_nodes_Contributor",
         color="strategy",
@@ -807,8 +827,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         title=f"Contributors for model size",
     )
 
-    graphs[f"failures_contributors_failure_paper"] = px.box(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
+    graphs[f"failures_contributors_failure_paper"] = box(
+        run_index.query(depth=default_depth, model_size=default_size),
         x="failure_probability",
         y="failure_rate_contributors",
         color="strategy",
@@ -817,11 +837,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         # log_x=True,
         title=f"Observed contributors failures for Failure",
     )
-    graphs[f"failures_contributors_depth_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
+    graphs[f"failures_contributors_depth_paper"] = box(
+        run_index.query(failure_window=default_window, model_size=default_size),
         x="depth",
         y="failure_rate_contributors",
         color="strategy",
@@ -830,11 +847,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         log_y=True,
         title=f"Observed contributors failures for depth",
     )
-    graphs[f"failures_contributors_group_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
+    graphs[f"failures_contributors_group_paper"] = box(
+        run_index.query(failure_window=default_window, depth=default_depth),
         x="model_size",
         y="failure_rate_contributors",
         color="strategy",
@@ -844,8 +858,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         title=f"Observed contributors failures for model size",
     )
 
-    graphs[f"failures_workers_failure_paper"] = px.box(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
+    graphs[f"failures_workers_failure_paper"] = box(
+        run_index.query(depth=default_depth, model_size=default_size),
         x="failure_probability",
         y="failure_rate_workers",
         color="strategy",
@@ -854,11 +868,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         # log_x=True,
         title=f"Observed workers failures for Failure",
     )
-    graphs[f"failures_workers_depth_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
+    graphs[f"failures_workers_depth_paper"] = box(
+        run_index.query(failure_window=default_window, model_size=default_size),
         x="depth",
         y="failure_rate_workers",
         color="strategy",
@@ -867,11 +878,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         log_y=True,
         title=f"Observed workers failures for depth",
     )
-    graphs[f"failures_workers_group_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
+    graphs[f"failures_workers_group_paper"] = box(
+        run_index.query(failure_window=default_window, depth=default_depth),
         x="model_size",
         y="failure_rate_workers",
         color="strategy",
@@ -881,8 +889,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         title=f"Observed workers failures for model size",
     )
 
-    graphs[f"work_failure_paper"] = px.box(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
+    graphs[f"work_failure_paper"] = box(
+        run_index.query(depth=default_depth, model_size=default_size),
         x="failure_probability",
         y="work_per_node_total",
         color="strategy",
@@ -891,11 +899,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         # log_x=True,
         title=f"Work for Failure",
     )
-    graphs[f"work_depth_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
+    graphs[f"work_depth_paper"] = box(
+        run_index.query(failure_window=default_window, model_size=default_size),
         x="depth",
         y="work_per_node_total",
         color="strategy",
@@ -904,11 +909,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         log_y=True,
         title=f"Work for depth",
     )
-    graphs[f"work_group_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
+    graphs[f"work_group_paper"] = box(
+        run_index.query(failure_window=default_window, depth=default_depth),
         x="model_size",
         y="work_per_node_total",
         color="strategy",
@@ -919,8 +921,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         title=f"Work for model size",
     )
 
-    graphs[f"latency_failure_paper"] = px.box(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
+    graphs[f"latency_failure_paper"] = box(
+        run_index.query(depth=default_depth, model_size=default_size),
         x="failure_probability",
         y="simulation_length",
         color="strategy",
@@ -929,11 +931,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         # log_x=True,
         title=f"Latency for Failure",
     )
-    graphs[f"latency_depth_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
+    graphs[f"latency_depth_paper"] = box(
+        run_index.query(failure_window=default_window, model_size=default_size),
         x="depth",
         y="simulation_length",
         color="strategy",
@@ -942,11 +941,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         log_y=True,
         title=f"Latency for depth",
     )
-    graphs[f"latency_group_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
+    graphs[f"latency_group_paper"] = box(
+        run_index.query(failure_window=default_window, depth=default_depth),
         x="model_size",
         y="simulation_length",
         color="strategy",
@@ -957,8 +953,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         title=f"Latency for model size",
     )
 
-    graphs[f"bandwidth_failure_paper"] = px.box(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
+    graphs[f"bandwidth_failure_paper"] = box(
+        run_index.query(depth=default_depth, model_size=default_size),
         x="failure_probability",
         y="inbound_bandwidth_total",
         color="strategy",
@@ -967,11 +963,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         # log_x=True,
         title=f"Bandwidth for Failure",
     )
-    graphs[f"bandwidth_depth_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
+    graphs[f"bandwidth_depth_paper"] = box(
+        run_index.query(failure_window=default_window, model_size=default_size),
         x="depth",
         y="inbound_bandwidth_total",
         color="strategy",
@@ -980,11 +973,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         log_y=True,
         title=f"Bandwidth for depth",
     )
-    graphs[f"bandwidth_group_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
+    graphs[f"bandwidth_group_paper"] = box(
+        run_index.query(failure_window=default_window, depth=default_depth),
         x="model_size",
         y="inbound_bandwidth_total",
         color="strategy",
@@ -995,8 +985,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         title=f"Bandwidth for model size",
     )
 
-    graphs[f"completeness_failure_paper"] = px.box(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
+    graphs[f"completeness_failure_paper"] = box(
+        run_index.query(depth=default_depth, model_size=default_size),
         x="failure_probability",
         y="completeness",
         color="strategy",
@@ -1005,11 +995,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         # log_x=True,
         title=f"Completeness for Failure",
     )
-    graphs[f"completeness_depth_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
+    graphs[f"completeness_depth_paper"] = box(
+        run_index.query(failure_window=default_window, model_size=default_size),
         x="depth",
         y="completeness",
         color="strategy",
@@ -1017,11 +1004,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         points=box_points,
         title=f"Completeness for depth",
     )
-    graphs[f"completeness_group_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
+    graphs[f"completeness_group_paper"] = box(
+        run_index.query(failure_window=default_window, depth=default_depth),
         x="model_size",
         y="completeness",
         color="strategy",
@@ -1031,8 +1015,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         title=f"Completeness for model size",
     )
 
-    graphs[f"versions_failure_paper"] = px.box(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
+    graphs[f"versions_failure_paper"] = box(
+        run_index.query(depth=default_depth, model_size=default_size),
         x="failure_probability",
         y="circulating_aggregate_ids",
         color="strategy",
@@ -1041,11 +1025,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         # log_x=True,
         title=f"Versions for Failure",
     )
-    graphs[f"versions_depth_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
+    graphs[f"versions_depth_paper"] = box(
+        run_index.query(failure_window=default_window, model_size=default_size),
         x="depth",
         y="circulating_aggregate_ids",
         color="strategy",
@@ -1053,11 +1034,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         points=box_points,
         title=f"Versions for depth",
     )
-    graphs[f"versions_group_paper"] = px.box(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
+    graphs[f"versions_group_paper"] = box(
+        run_index.query(failure_window=default_window, depth=default_depth),
         x="model_size",
         y="circulating_aggregate_ids",
         color="strategy",
@@ -1067,15 +1045,54 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         title=f"Versions for model size",
     )
 
-    avg_data = (
-        data[
-            (data["depth"] == default_depth)
-            & (data["model_size"] == default_size)
-            & (data["failure_window"] <= 400)
-            & (data["failure_window"] >= 200)
-        ]
-        .groupby(["strategy", "failure_probability"], as_index=False)
-        .mean()
+    # Update plots
+    to_update_plots = [
+        "failures_contributors_failure_paper",
+        "failures_contributors_depth_paper",
+        "failures_contributors_group_paper",
+        "work_failure_paper",
+        "work_depth_paper",
+        "work_group_paper",
+        "latency_failure_paper",
+        "latency_depth_paper",
+        "latency_group_paper",
+        "bandwidth_failure_paper",
+        "bandwidth_depth_paper",
+        "bandwidth_group_paper",
+        "completeness_failure_paper",
+        "completeness_depth_paper",
+        "completeness_group_paper",
+    ]
+    for plot in to_update_plots:
+        # graphs[plot] = graphs[plot].update_traces(marker=dict(opacity=0))
+        # graphs[plot] = graphs[plot].update_traces(quartilemethod="exclusive")
+        continue
+
+    to_update_plots = [
+        "failures_contributors_failure_paper",
+        "work_failure_paper",
+        "latency_failure_paper",
+        "bandwidth_failure_paper",
+        "completeness_failure_paper",
+    ]
+    for plot in to_update_plots:
+        graphs[plot] = graphs[plot].update_traces(width=0.05 / 3)
+        graphs[plot] = graphs[plot].update_layout(boxgap=0.005, boxgroupgap=0.01)
+
+    for plot in plots_config:
+        # graphs[plot['name']] = graphs[plot['name']].update_traces(marker=dict(opacity=0))
+        pass
+
+    yield from drawn_rows()
+
+    avg_data = roll_up(
+        select(
+            cube,
+            depth=default_depth,
+            model_size=default_size,
+            failure_window=(200, 400),
+        ),
+        ["strategy", "failure_probability"],
     )
     graphs[f"avg_work_contributors_paper"] = px.line(
         avg_data,
@@ -1093,17 +1110,20 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
     )
 
     graphs[f"failures_line"] = px.line(
-        data[(data["model_size"] == default_size) & (data["depth"] == default_depth)]
-        .groupby(["strategy", "failure_probability"], as_index=False)
-        .mean(),
+        roll_up(
+            select(cube, model_size=default_size, depth=default_depth),
+            ["strategy", "failure_probability"],
+        ),
         x="failure_probability",
         y="has_result",
         color="strategy",
     )
 
     # Stacked bars
+    yield from drawn_rows()
+
     def create_bars(
-        df,
+        cells,
         x_axis,
         x_label,
         y_axis,
@@ -1112,7 +1132,8 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         export=False,
         prefix="",
     ):
-        plot_df = df.groupby([x_axis, "strategy"], as_index=False).mean()
+        jobs.step()
+        plot_df = roll_up(cells, [x_axis, "strategy"])
         columns = [y_axis + col for col in columns]
         palette = cycle(px.colors.qualitative.Alphabet)
         # palette = cycle(px.colors.sequential.PuBu)
@@ -1131,26 +1152,22 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         )
 
         if export:
-            dfs = []
-            for x in pd.unique(plot_df[x_axis]):
-                for cols in columns:
-                    tmp = []
-                    # strategies = pd.unique(plot_df["strategy"])
-                    for strat in strategies:
-                        tmp.append(
-                            plot_df[
-                                (plot_df["strategy"] == strat) & (plot_df[x_axis] == x)
-                            ][cols].iloc[0]
-                        )
-
-                    dfs.append(
-                        pd.DataFrame(
-                            [[x, cols.split("_")[-1]] + tmp],
-                            columns=[x_label, "Level"] + [s for s in strategies],
-                        )
-                    )
+            # One row per x value and column, the strategies side by side
+            rows = pd.MultiIndex.from_product(
+                [pd.unique(plot_df[x_axis]), columns], names=[x_label, "Level"]
+            )
+            exported = (
+                plot_df.set_index([x_axis, "strategy"])[columns]
+                .rename_axis(columns="Level")
+                .stack(dropna=False)
+                .unstack("strategy")
+                .reindex(index=rows, columns=strategies)
+                .reset_index()
+            )
+            exported["Level"] = exported["Level"].str.split("_").str[-1]
+            exported.columns.name = None
 
-            pd.concat(dfs, axis=0,).to_csv(
+            exported.to_csv(
                 f"./outputs/final/{prefix}bars_{x_axis}-{y_axis}.csv",
                 sep=";",
                 index=False,
@@ -1171,10 +1188,55 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
 
         return fig
 
+    graphs[f"work_failure_bar"] = create_bars(
+        select(cube, depth=default_depth, model_size=default_size),
+        "failure_probability",
+        "Failures",
+        "work_per_node",
+        "Work per node type",
+    )
+    graphs[f"work_depth_bar"] = create_bars(
+        select(cube, failure_window=default_window, model_size=default_size),
+        "depth",
+        "Depth",
+        "work_per_node",
+        "Work per node type",
+    )
+    graphs[f"work_size_bar"] = create_bars(
+        select(cube, failure_window=default_window, depth=default_depth),
+        "model_size",
+        "Model Size",
+        "work_per_node",
+        "Work per node type",
+    )
+
+    graphs[f"bandwidth_failure_bar"] = create_bars(
+        select(cube, depth=default_depth, model_size=default_size),
+        "failure_probability",
+        "Failures",
+        "bandwidth_per_node",
+        "Bandwidth per node type",
+    )
+    graphs[f"bandwidth_depth_bar"] = create_bars(
+        select(cube, failure_window=default_window, model_size=default_size),
+        "depth",
+        "Depth",
+        "bandwidth_per_node",
+        "Bandwidth per node type",
+    )
+    graphs[f"bandwidth_size_bar"] = create_bars(
+        select(cube, failure_window=default_window, depth=default_depth),
+        "model_size",
+        "Model Size",
+        "bandwidth_per_node",
+        "Bandwidth per node type",
+    )
+    yield from drawn_rows()
+
     # Bars per roles
     cols = ["_Aggregator", "_LeafAggregator", "_Contributor", "_Backup", "_Querier"]
     graphs[f"initial_nodes_count_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "initial_nodes",
@@ -1182,7 +1244,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         cols,
     )
     graphs[f"final_nodes_count_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "final_nodes",
@@ -1190,7 +1252,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         cols,
     )
     graphs[f"delta_nodes_count_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "delta_nodes",
@@ -1201,7 +1263,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
     # Bars per level
     cols = ["_level_0", "_level_1", "_level_2", "_level_3", "_level_4"]
     graphs[f"work_level_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "work",
@@ -1209,7 +1271,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         cols,
     )
     graphs[f"messages_level_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "messages",
@@ -1217,7 +1279,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         cols,
     )
     graphs[f"bandwidth_level_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "inbound_bandwidth",
@@ -1226,7 +1288,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
     )
 
     graphs[f"failures_level_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "failures",
@@ -1234,7 +1296,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         cols,
     )
     graphs[f"versions_level_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "versions",
@@ -1242,7 +1304,7 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         cols,
     )
     graphs[f"propagation_level_bar"] = create_bars(
-        data,
+        cube,
         "depth",
         "Depth",
         "propagation",
@@ -1251,11 +1313,9 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
     )
 
     graphs[f"versions_level_tiny_bar_focus"] = create_bars(
-        data[
-            (data["depth"] == default_depth)
-            & (data["model_size"] == 1)
-            & (data["strategy"] != "Min Cost")
-        ],
+        select(
+            cube, depth=default_depth, model_size=1, strategy=lambda v: v != "Min Cost"
+        ),
         "failure_probability",
         "Failure rate (%/s)",
         "versions_percent",
@@ -1265,11 +1325,9 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         "tiny_",
     )
     graphs[f"work_level_tiny_bar_focus"] = create_bars(
-        data[
-            (data["depth"] == default_depth)
-            & (data["model_size"] == 1)
-            & (data["strategy"] != "Min Cost")
-        ],
+        select(
+            cube, depth=default_depth, model_size=1, strategy=lambda v: v != "Min Cost"
+        ),
         "failure_probability",
         "Failure rate (%/s)",
         "work_avg",
@@ -1279,11 +1337,12 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         "tiny_",
     )
     graphs[f"versions_level_bar_focus"] = create_bars(
-        data[
-            (data["depth"] == default_depth)
-            & (data["model_size"] == default_size)
-            & (data["strategy"] != "Min Cost")
-        ],
+        select(
+            cube,
+            depth=default_depth,
+            model_size=default_size,
+            strategy=lambda v: v != "Min Cost",
+        ),
         "failure_probability",
         "Failure rate (%/s)",
         "versions_percent",
@@ -1292,11 +1351,12 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         export,
     )
     graphs[f"work_level_bar_focus"] = create_bars(
-        data[
-            (data["depth"] == default_depth)
-            & (data["model_size"] == default_size)
-            & (data["strategy"] != "Min Cost")
-        ],
+        select(
+            cube,
+            depth=default_depth,
+            model_size=default_size,
+            strategy=lambda v: v != "Min Cost",
+        ),
         "failure_probability",
         "Failure rate (%/s)",
         "work_avg",
@@ -1305,14 +1365,15 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         export,
     )
     graphs[f"versions_level_bar_simpler"] = px.bar(
-        data[
-            (data["depth"] == default_depth)
-            & (data["model_size"] == default_size)
-            & (data["failure_window"] <= 400)
-            & (data["failure_window"] >= 200)
-        ]
-        .groupby("strategy", as_index=False)
-        .mean(),
+        roll_up(
+            select(
+                cube,
+                depth=default_depth,
+                model_size=default_size,
+                failure_window=(200, 400),
+            ),
+            ["strategy"],
+        ),
         x="strategy",
         y=[
             "versions_level_0",
@@ -1323,538 +1384,38 @@ def generate_graphs(data, strategies_map, tab="failure_probability", export=True
         ],
     )
 
-    graphs[f"work_failure_bar"] = create_bars(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
-        "failure_probability",
-        "Failures",
-        "work_per_node",
-        "Work per node type",
-    )
-    graphs[f"work_depth_bar"] = create_bars(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
-        "depth",
-        "Depth",
-        "work_per_node",
-        "Work per node type",
-    )
-    graphs[f"work_size_bar"] = create_bars(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
-        "model_size",
-        "Model Size",
-        "work_per_node",
-        "Work per node type",
-    )
-
-    graphs[f"bandwidth_failure_bar"] = create_bars(
-        data[(data["depth"] == default_depth) & (data["model_size"] == default_size)],
-        "failure_probability",
-        "Failures",
-        "bandwidth_per_node",
-        "Bandwidth per node type",
-    )
-    graphs[f"bandwidth_depth_bar"] = create_bars(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["model_size"] == default_size)
-        ],
-        "depth",
-        "Depth",
-        "bandwidth_per_node",
-        "Bandwidth per node type",
-    )
-    graphs[f"bandwidth_size_bar"] = create_bars(
-        data[
-            (data["failure_window"] == default_window)
-            & (data["depth"] == default_depth)
-        ],
-        "model_size",
-        "Model Size",
-        "bandwidth_per_node",
-        "Bandwidth per node type",
-    )
-
     graphs[f"completeness_avg_line"] = px.line(
-        data[(data["model_size"] == default_size) & (data["depth"] == default_depth)]
-        .groupby(["strategy", "failure_probability"], as_index=False)
-        .mean(),
+        roll_up(
+            select(cube, model_size=default_size, depth=default_depth),
+            ["strategy", "failure_probability"],
+        ),
         x="failure_probability",
         y="completeness",
         color="strategy",
     )
     graphs[f"bandwidth_avg_line"] = px.line(
-        data[(data["model_size"] == default_size) & (data["depth"] == default_depth)]
-        .groupby(["strategy", "failure_probability"], as_index=False)
-        .mean(),
+        roll_up(
+            select(cube, model_size=default_size, depth=default_depth),
+            ["strategy", "failure_probability"],
+        ),
         x="failure_probability",
         y="inbound_bandwidth_total",
         color="strategy",
     )
 
-    # Update plots
-    to_update_plots = [
-        "failures_contributors_failure_paper",
-        "failures_contributors_depth_paper",
-        "failures_contributors_group_paper",
-        "work_failure_paper",
-        "work_depth_paper",
-        "work_group_paper",
-        "latency_failure_paper",
-        "latency_depth_paper",
-        "latency_group_paper",
-        "bandwidth_failure_paper",
-        "bandwidth_depth_paper",
-        "bandwidth_group_paper",
-        "completeness_failure_paper",
-        "completeness_depth_paper",
-        "completeness_group_paper",
-    ]
-    for plot in to_update_plots:
-        # graphs[plot] = graphs[plot].update_traces(marker=dict(opacity=0))
-        # graphs[plot] = graphs[plot].update_traces(quartilemethod="exclusive")
-        continue
+    yield from drawn_rows()
 
-    to_update_plots = [
-        "failures_contributors_failure_paper",
-        "work_failure_paper",
-        "latency_failure_paper",
-        "bandwidth_failure_paper",
-        "completeness_failure_paper",
-    ]
-    for plot in to_update_plots:
-        graphs[plot] = graphs[plot].update_traces(width=0.05 / 3)
-        graphs[plot] = graphs[plot].update_layout(boxgap=0.005, boxgroupgap=0.01)
 
-    for plot in plots_config:
-        # graphs[plot['name']] = graphs[plot['name']].update_traces(marker=dict(opacity=0))
-        pass
-
-    return html.Div(
-        children=[
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-wrap": "wrap",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        style={
-                            "width": "600px",
-                        },
-                        id=conf["name"],
-                        figure=graphs[conf["name"]],
-                    )
-                    for conf in plots_config
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"map_completeness",
-                        figure=graphs["map_completeness"],
-                    ),
-                    dcc.Graph(
-                        id=f"map_work",
-                        figure=graphs["map_work"],
-                    ),
-                    dcc.Graph(
-                        id=f"map_latency",
-                        figure=graphs["map_latency"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"map_best",
-                        figure=graphs["map_best"],
-                    )
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"count_failure_paper",
-                        figure=graphs["count_failure_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"count_depth_paper",
-                        figure=graphs["count_depth_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"count_group_paper",
-                        figure=graphs["count_group_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"failures_contributors_failure_paper",
-                        figure=graphs["failures_contributors_failure_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"failures_contributors_depth_paper",
-                        figure=graphs["failures_contributors_depth_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"failures_contributors_group_paper",
-                        figure=graphs["failures_contributors_group_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"failures_workers_failure_paper",
-                        figure=graphs["failures_workers_failure_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"failures_workers_depth_paper",
-                        figure=graphs["failures_workers_depth_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"failures_workers_group_paper",
-                        figure=graphs["failures_workers_group_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"work_failure_paper",
-                        figure=graphs["work_failure_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"work_depth_paper",
-                        figure=graphs["work_depth_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"work_group_paper",
-                        figure=graphs["work_group_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"latency_failure_paper",
-                        figure=graphs["latency_failure_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"latency_depth_paper",
-                        figure=graphs["latency_depth_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"latency_group_paper",
-                        figure=graphs["latency_group_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"bandwidth_failure_paper",
-                        figure=graphs["bandwidth_failure_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"bandwidth_depth_paper",
-                        figure=graphs["bandwidth_depth_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"bandwidth_group_paper",
-                        figure=graphs["bandwidth_group_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"completeness_failure_paper",
-                        figure=graphs["completeness_failure_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"completeness_depth_paper",
-                        figure=graphs["completeness_depth_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"completeness_group_paper",
-                        figure=graphs["completeness_group_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"versions_failure_paper",
-                        figure=graphs["versions_failure_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"versions_depth_paper",
-                        figure=graphs["versions_depth_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"versions_group_paper",
-                        figure=graphs["versions_group_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"failures_line",
-                        figure=graphs["failures_line"],
-                    ),
-                ],
-            ),
-            html.H1("Bar plots"),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"work_failure_bar",
-                        figure=graphs["work_failure_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"work_depth_bar",
-                        figure=graphs["work_depth_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"work_size_bar",
-                        figure=graphs["work_size_bar"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"bandwidth_failure_bar",
-                        figure=graphs["bandwidth_failure_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"bandwidth_depth_bar",
-                        figure=graphs["bandwidth_depth_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"bandwidth_size_bar",
-                        figure=graphs["bandwidth_size_bar"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"initial_nodes_count_bar",
-                        figure=graphs["initial_nodes_count_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"final_nodes_count_bar",
-                        figure=graphs["final_nodes_count_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"delta_nodes_count_bar",
-                        figure=graphs["delta_nodes_count_bar"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"work_level_bar",
-                        figure=graphs["work_level_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"messages_level_bar",
-                        figure=graphs["messages_level_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"bandwidth_level_bar",
-                        figure=graphs["bandwidth_level_bar"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"failures_level_bar",
-                        figure=graphs["failures_level_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"versions_level_bar",
-                        figure=graphs["versions_level_bar"],
-                    ),
-                    dcc.Graph(
-                        id=f"propagation_level_bar",
-                        figure=graphs["propagation_level_bar"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"versions_level_bar_simpler",
-                        figure=graphs["versions_level_bar_simpler"],
-                    ),
-                    dcc.Graph(
-                        id=f"versions_level_bar_focus",
-                        figure=graphs["versions_level_bar_focus"],
-                    ),
-                    dcc.Graph(
-                        id=f"work_level_bar_focus",
-                        figure=graphs["work_level_bar_focus"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"versions_level_tiny_bar_focus",
-                        figure=graphs["versions_level_tiny_bar_focus"],
-                    ),
-                    dcc.Graph(
-                        id=f"work_level_tiny_bar_focus",
-                        figure=graphs["work_level_tiny_bar_focus"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"avg_work_contributors_paper",
-                        figure=graphs["avg_work_contributors_paper"],
-                    ),
-                    dcc.Graph(
-                        id=f"avg_work_workers_paper",
-                        figure=graphs["avg_work_workers_paper"],
-                    ),
-                ],
-            ),
-            html.Div(
-                style={
-                    "display": "flex",
-                    "flex-direction": "row",
-                    "justify-content": "center",
-                },
-                children=[
-                    dcc.Graph(
-                        id=f"completeness_avg_line",
-                        figure=graphs["completeness_avg_line"],
-                    ),
-                    dcc.Graph(
-                        id=f"bandwidth_avg_line",
-                        figure=graphs["bandwidth_avg_line"],
-                    ),
-                ],
-            ),
-        ]
-    )
+def create_app(config, **kwargs):
+    """Dashboard on the default file of `config`, `kwargs` go to `dash.Dash`"""
+    app = dash.Dash(__name__, **kwargs)
+    compact(app)
+    return defer(app, lambda: setup(app, config), "Simulation  task")
 
 
-if __name__ == "__main__":
-    with open("./dissec.config.json") as f:
-        config = json.load(f)
-
-    data = get_data(config["defaultGraph"], True if "aggregate" in sys.argv else False)
+def setup(app, config):
+    """Layout and callbacks of `app` on the default file of `config`"""
+    data = get_dataset(config["defaultGraph"], "paper", "aggregate" in sys.argv)
 
     run_ids = pd.unique(data["run_id"])
     strategies = pd.unique(data["strategy"])
@@ -1886,14 +1447,13 @@ if __name__ == "__main__":
     for k in set(strategies_map.keys()).difference(strategies):
         del strategies_map[k]
 
-    graphs = generate_graphs(data, strategies_map, False)
-    summary = generate_summary(data, status, strategies)
-
-    app = dash.Dash(__name__)
+    # A small file is filtered in the browser, from columns sent once
+    in_browser = fits(data)
 
     app.layout = html.Div(
         children=[
             dcc.Store(id="store_file"),
+            dcc.Store(id="store_columns"),
             dcc.Tabs(
                 id="tabs",
                 value="failure_probability",
@@ -1916,7 +1476,9 @@ if __name__ == "__main__":
                     html.H1(id="file_span", children=f"{config['defaultGraph']}"),
                 ]
             ),
-            html.Div(id="summary", children=summary),
+            # Filled by the summary callback, on the initial filters
+            html.Div(id="summary"),
+            dcc.Store(id="summary-drawn"),
             html.Div(
                 [
                     html.H3("Failure Probabilities"),
@@ -1959,7 +1521,7 @@ if __name__ == "__main__":
                     html.Button("Export graphs", id="export-button", n_clicks=0),
                 ]
             ),
-            html.Div(id="graphs", children=[]),
+            section("paper", "Paper figures"),
         ]
     )
 
@@ -1975,83 +1537,172 @@ if __name__ == "__main__":
         dash.Input(component_id="file-select", component_property="value"),
     )
     def update_file(selected_file):
-        return [get_data(selected_file).to_json(), selected_file]
+        # Loaded here so that the graphs callback finds it in the registry
+        get_dataset(selected_file, "paper")
+        return [selected_file, selected_file]
+
+    def source(store_file):
+        """Registry arguments of the selected file"""
+        if not store_file:
+            return (config["defaultGraph"], "paper", "aggregate" in sys.argv)
+        return (store_file, "paper", True)
+
+    def load(store_file):
+        """Runs and cube of the selected file"""
+        return get_dataset(*source(store_file)), get_cube(*source(store_file))
+
+    def select_runs(
+        store_file, selected_failures, selected_sizes, selected_depths, selected_model
+    ):
+        """Runs, cube and run index of the selected file within the sliders"""
+        df, cube = load(store_file)
+
+        print(
+            "before filters",
+            pd.unique(df["depth"]),
+            pd.unique(df["group_size"]),
+            pd.unique(df["failure_probability"]),
+            len(df),
+            selected_failures,
+            selected_sizes,
+            selected_depths,
+        )
+
+        ranges = dict(
+            failure_probability=tuple(selected_failures),
+            group_size=tuple(selected_sizes),
+            depth=tuple(selected_depths),
+            model_size=tuple(selected_model),
+        )
+        # Built once per file, every figure queries the runs within the ranges
+        run_index = get_run_index(*source(store_file)).within(**ranges)
+
+        return run_index.query(), select(cube, **ranges), run_index
+
+    filters = [
+        dash.Input(
+            component_id="failure-probabilities-range", component_property="value"
+        ),
+        dash.Input(component_id="group-sizes-range", component_property="value"),
+        dash.Input(component_id="depths-range", component_property="value"),
+        dash.Input(component_id="model-range", component_property="value"),
+    ]
 
     @app.callback(
-        [
-            dash.Output(component_id="summary", component_property="children"),
-            dash.Output(component_id="graphs", component_property="children"),
-        ],
-        [
-            dash.Input(
-                component_id="failure-probabilities-range", component_property="value"
-            ),
-            dash.Input(component_id="group-sizes-range", component_property="value"),
-            dash.Input(component_id="depths-range", component_property="value"),
-            dash.Input(component_id="model-range", component_property="value"),
-            dash.Input(component_id="tabs", component_property="value"),
-        ],
-        dash.State("store_file", "data"),
+        dash.Output("store_columns", "data"), dash.Input("store_file", "data")
     )
-    def update_graphs(
+    def update_columns(store_file):
+        if not in_browser:
+            return None
+        df, _ = load(store_file)
+        if not fits(df):
+            # Summarized on the server, see summarize_large
+            return None
+        return encode(
+            df,
+            ["failure_probability", "group_size", "depth", "model_size"],
+            ["status", "strategy", "failure_rate"],
+        )
+
+    def update_summary(
         selected_failures,
         selected_sizes,
         selected_depths,
         selected_model,
-        tab,
         store_file,
     ):
-        if not store_file:
-            df = get_data(
-                config["defaultGraph"], True if "aggregate" in sys.argv else False
-            )
-        else:
-            df = pd.read_json(store_file)
-
+        df, _ = load(store_file)
         strategies = pd.unique(df["strategy"])
         status = pd.unique(df["status"])
-        # df["failure_probability"] = df["failure_probability"].round(6)
 
-        # Remove strategies not present in the data
-        strategies_map = {
-            "FFP-Drop-Stop-None": "Strawman",
-            "LFP-Drop-Stop-FullSync": "OneShot",
-            "LFP-Replace-Stay-NonBlocking": "Eager",
-        }
-        for k in set(strategies_map.keys()).difference(strategies):
-            del strategies_map[k]
-
-        print(
-            "before filters",
-            strategies,
-            strategies_map,
-            pd.unique(df["depth"]),
-            pd.unique(df["group_size"]),
-            pd.unique(df["failure_probability"]),
-            len(df),
+        df, cube, _ = select_runs(
+            store_file,
             selected_failures,
             selected_sizes,
             selected_depths,
+            selected_model,
+        )
+        return generate_summary(df, cube, status, strategies)
+
+    def summarize_large(*values):
+        """Summary of the selected files whose columns are not sent"""
+        # The selected file is the last state
+        if fits(load(values[-1])[0]):
+            raise PreventUpdate
+        return update_summary(*values)
+
+    store = dash.State("store_file", "data")
+    if in_browser:
+        # The paper figures are still drawn on the server
+        register_clientside(
+            app,
+            dash.Output(component_id="summary", component_property="children"),
+            "summary",
+            filters,
+            dash.Input("store_columns", "data"),
+            "summary-drawn",
+            summarize_large,
+            [store],
+            # A large selected file is still summarized on the server
+            dash.Input("store_file", "data"),
         )
+    else:
+        app.callback(
+            dash.Output(component_id="summary", component_property="children"),
+            filters,
+            store,
+        )(update_summary)
 
-        df = df[
-            (df["failure_probability"] >= selected_failures[0])
-            & (df["failure_probability"] <= selected_failures[1])
-        ]
-        df = df[
-            (df["group_size"] >= selected_sizes[0])
-            & (df["group_size"] <= selected_sizes[1])
-        ]
-        df = df[
-            (df["depth"] >= selected_depths[0]) & (df["depth"] <= selected_depths[1])
-        ]
-        df = df[
-            (df["model_size"] >= selected_model[0])
-            & (df["model_size"] <= selected_model[1])
-        ]
+    def draw_paper(
+        selected_failures, selected_sizes, selected_depths, selected_model, store_file
+    ):
+        ranges = snap(
+            get_cube(*source(store_file)),
+            failure_probability=tuple(selected_failures),
+            group_size=tuple(selected_sizes),
+            depth=tuple(selected_depths),
+            model_size=tuple(selected_model),
+        )
 
-        graphs = generate_graphs(df, strategies_map, tab, False)
+        def draw_figures():
+            df, cube, run_index = select_runs(
+                store_file,
+                selected_failures,
+                selected_sizes,
+                selected_depths,
+                selected_model,
+            )
 
-        return [generate_summary(df, status, strategies), graphs]
+            # Remove strategies not present in the data
+            strategies_map = {
+                "FFP-Drop-Stop-None": "Strawman",
+                "LFP-Drop-Stop-FullSync": "OneShot",
+                "LFP-Replace-Stay-NonBlocking": "Eager",
+            }
+            for k in set(strategies_map.keys()).difference(pd.unique(df["strategy"])):
+                del strategies_map[k]
+
+            return draw_graphs(df, cube, strategies_map, run_index, export=False)
+
+        # Dragging the sliders back and forth draws each selection once
+        key = [dataset_key(*source(store_file)), "paper", ranges]
+        return get_figures(key, draw_figures)
+
+    # With the background argument, sections are drawn by a pool of workers
+    background = "background" in sys.argv
+    # The paper figures do not depend on the tab
+    register_section(
+        app,
+        "paper",
+        draw_paper,
+        filters,
+        [dash.State("store_file", "data")],
+        background=background,
+    )
+
+
+if __name__ == "__main__":
+    with open("./dissec.config.json") as f:
+        config = json.load(f)
 
-    app.run_server(debug=True)
+    serve(create_app(config))
@@ -0,0 +1,86 @@
+"""Every dashboard as a page of a single server.
+
+Each dashboard keeps its own app, mounted under its path on a shared Flask
+server, so that their components do not clash. They all run in this process
+and share the registry of `analysis.datasets`: a file loaded, a cube or a
+section drawn by a page is reused by the other pages and when coming back.
+"""
+
+from dash import html, dcc, dash
+import flask
+import json
+import os
+import sys
+
+import dashboard
+import dashboard_demo
+import dashboard_full
+import dashboard_mini
+import dashboard_paper
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis.payloads import compact
+from analysis.serving import serve
+from analysis.startup import decorate
+
+pages = [
+    dict(path="overview", label="Overview", module=dashboard),
+    dict(path="paper", label="Paper figures", module=dashboard_paper),
+    dict(path="maps", label="Heatmaps", module=dashboard_mini),
+    dict(path="timelines", label="Timelines", module=dashboard_demo),
+    dict(path="messages", label="Messages", module=dashboard_full),
+]
+
+
+def navigation(served, current=None):
+    """Links to the `served` pages, the `current` one highlighted"""
+    return html.Nav(
+        style={"display": "flex", "gap": "2em", "fontSize": "1.5em"},
+        children=[
+            dcc.Link(
+                page["label"],
+                href=f"/{page['path']}/",
+                refresh=True,
+                style={"fontWeight": "bold" if page["path"] == current else "normal"},
+            )
+            for page in served
+        ],
+    )
+
+
+def create_server(config):
+    """Index app serving every page on the default file of `config`"""
+    server = flask.Flask(__name__)
+    for page in pages:
+        app = page["module"].create_app(
+            config, server=server, url_base_pathname=f"/{page['path']}/"
+        )
+        app.title = page["label"]
+        # A page whose setup fails, typically on a file without its columns,
+        # shows the error below the navigation
+        decorate(
+            app,
+            lambda layout, path=page["path"]: html.Div(
+                children=[navigation(pages, path), layout]
+            ),
+        )
+
+    index = dash.Dash(__name__, server=server)
+    compact(index)
+    index.layout = html.Div(
+        children=[
+            html.H1(
+                children="Simulation dashboards",
+                style={"textAlign": "center", "color": "#7FDBFF"},
+            ),
+            navigation(pages),
+        ]
+    )
+    return index
+
+
+if __name__ == "__main__":
+    with open("./dissec.config.json") as f:
+        config = json.load(f)
+
+    serve(create_server(config))
@@ -5,6 +5,12 @@ import json
 from glob import glob
 import matplotlib
 from matplotlib.backends.backend_pgf import FigureCanvasPgf
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis.cube import build_sketches, quantiles, select
+from analysis.loader import get_data
 
 matplotlib.backend_bases.register_backend("pdf", FigureCanvasPgf)
 
@@ -24,76 +30,6 @@ tabs = [
     dict(label="Fanout", value="fanout"),
     dict(label="Profondeur", value="depth"),
 ]
-roles = ["Aggregator", "LeafAggregator", "Contributor", "Backup", "Querier"]
-statistics = [
-    "initial_nodes",
-    "final_nodes",
-    "failures",
-    "work",
-    "messages",
-    "work_per_node",
-    "delta_nodes",
-    "bandwidth",
-]
-
-
-def get_data(path, aggregate_message=True):
-    if ".json" in path:
-        with open(path) as f:
-            data = json.load(f)
-
-        df = pd.concat([pd.DataFrame(i) for i in data])
-    else:
-        df = pd.read_csv(path, sep=";", decimal=",")
-        # We used different decimal format, check which one we have
-        if "float64" not in df.dtypes.unique():
-            df = pd.read_csv(path, sep=";")
-
-    df.rename(
-        mapper={
-            "seed": "run_id",
-            "failureRate": "failure_probability",
-            "observedFailureRate": "failure_rate",
-            "emissionTime": "emitter_time",
-            "receptionTime": "receiver_time",
-            "emitterId": "emitter_id",
-            "receiverId": "receiver_id",
-            "latency": "simulation_length",
-            "work": "total_work",
-            "groupSize": "group_size",
-            "circulatingAggregateIds": "circulating_aggregate_ids",
-            "currentlyCirculatingVersions": "currently_circulating_ids",
-            "usedBandwidth": "bandwidth",
-            "finalUsedBandwidth": "final_bandwidth",
-        },
-        axis=1,
-        inplace=True,
-    )
-    df.reset_index(inplace=True)
-    df.fillna(0, inplace=True)
-
-    df.loc[df["run_id"].str.startswith("OPTI-leader"), "strategy"] = "O_LEADER"
-    df.loc[df["run_id"].str.startswith("EAGER-leader"), "strategy"] = "E_LEADER"
-
-    for r in roles:
-        df[f"work_per_node_{r}"] = (
-            df[f"work_{r}"] / df[f"final_nodes_{r}"]
-            if (df[f"final_nodes_{r}"] != 0).any()
-            else 0
-        )
-        df[f"delta_nodes_{r}"] = df[f"final_nodes_{r}"] - df[f"initial_nodes_{r}"]
-
-    df.fillna(0, inplace=True)
-    for s in statistics:
-        df[f"{s}_total"] = 0
-        for r in roles:
-            df[f"{s}_total"] += df[f"{s}_{r}"]
-
-    if aggregate_message:
-        df = df.groupby(["run_id", "status", "strategy"]).mean()
-        df.reset_index(inplace=True)
-
-    return df
 
 
 def generate_box(quantiles, index):
@@ -214,7 +150,7 @@ if __name__ == "__main__":
     with open("./dissec.config.json") as f:
         config = json.load(f)
 
-    data = get_data(config["defaultGraph"])
+    data = get_data(config["defaultGraph"], "overview")
 
     run_ids = pd.unique(data["run_id"])
     strategies = pd.unique(data["strategy"])
@@ -224,6 +160,7 @@ if __name__ == "__main__":
     sizes = np.sort(pd.unique(data["group_size"]))
     failure_probabilities = np.sort(pd.unique(data["failure_probability"]))
     failure_rates = np.sort(pd.unique(data["failure_rate"]))
+    sketches = build_sketches(data)
 
     outputs = glob("./outputs/*")
 
@@ -236,74 +173,38 @@ if __name__ == "__main__":
         "latency": {},
         "completeness": {},
     }
+    # Box per metric, merged from the quantile sketches of the selected cells
+    metrics = dict(
+        work="work_total", latency="simulation_length", completeness="completeness"
+    )
     for strategy in strategies_map:
-        df = (
-            data[data["strategy"] == strategy]
-            .groupby(["failure_probability", "run_id"], as_index=False)
-            .mean()
-        )
+        cells = select(sketches, strategy=strategy)
 
-        if strategy not in res["work"]:
-            res["work"][strategy] = {}
-            res["latency"][strategy] = {}
-            res["completeness"][strategy] = {}
+        for key in res:
+            res[key][strategy] = {}
 
         for proba in failure_probabilities:
-            df2 = df[df["failure_probability"] == proba].copy()
-            df2 = df2[df2["depth"] == 6.0]
-            df2 = df2[df2["group_size"] == 5.0]
-            quantiles = [0, 0.25, 0.5, 0.75, 1]
-
-            res["work"][strategy][f"failures-{str(proba)}"] = [
-                quantile["work_total"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
-            res["latency"][strategy][f"failures-{str(proba)}"] = [
-                quantile["simulation_length"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
-            res["completeness"][strategy][f"failures-{str(proba)}"] = [
-                quantile["completeness"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
+            selected = select(
+                cells, failure_probability=proba, depth=6.0, group_size=5.0
+            )
+            for (key, metric) in metrics.items():
+                res[key][strategy][f"failures-{str(proba)}"] = quantiles(
+                    selected, metric
+                )
 
         for d in depths:
-            df2 = df[df["depth"] == d].copy()
-            df2 = df2[df2["failure_probability"] == 0.00005]
-            df2 = df2[df2["group_size"] == 5.0]
-            quantiles = [0, 0.25, 0.5, 0.75, 1]
-
-            res["work"][strategy][f"depth-{str(d)}"] = [
-                quantile["work_total"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
-            res["latency"][strategy][f"depth-{str(d)}"] = [
-                quantile["simulation_length"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
-            res["completeness"][strategy][f"depth-{str(d)}"] = [
-                quantile["completeness"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
+            selected = select(
+                cells, failure_probability=0.00005, depth=d, group_size=5.0
+            )
+            for (key, metric) in metrics.items():
+                res[key][strategy][f"depth-{str(d)}"] = quantiles(selected, metric)
 
         for g in sizes:
-            df2 = df[df["group_size"] == g].copy()
-            df2 = df2[df2["failure_probability"] == 0.00005]
-            df2 = df2[df2["depth"] == 6.0]
-            quantiles = [0, 0.25, 0.5, 0.75, 1]
-
-            res["work"][strategy][f"group-{str(g)}"] = [
-                quantile["work_total"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
-            res["latency"][strategy][f"group-{str(g)}"] = [
-                quantile["simulation_length"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
-            res["completeness"][strategy][f"group-{str(g)}"] = [
-                quantile["completeness"]
-                for quantile in [df2.quantile(q) for q in quantiles]
-            ]
+            selected = select(
+                cells, failure_probability=0.00005, depth=6.0, group_size=g
+            )
+            for (key, metric) in metrics.items():
+                res[key][strategy][f"group-{str(g)}"] = quantiles(selected, metric)
 
     with open("./outputs/graphs_1figure.tex", "w") as f:
         # Failure probabilities
@@ -5,6 +5,11 @@ import json
 from glob import glob
 import matplotlib
 from matplotlib.backends.backend_pgf import FigureCanvasPgf
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from analysis.loader import get_data
 
 matplotlib.backend_bases.register_backend("pdf", FigureCanvasPgf)
 
@@ -24,76 +29,6 @@ tabs = [
     dict(label="Fanout", value="fanout"),
     dict(label="Profondeur", value="depth"),
 ]
-roles = ["Aggregator", "LeafAggregator", "Contributor", "Backup", "Querier"]
-statistics = [
-    "initial_nodes",
-    "final_nodes",
-    "failures",
-    "work",
-    "messages",
-    "work_per_node",
-    "delta_nodes",
-    "bandwidth",
-]
-
-
-def get_data(path, aggregate_message=True):
-    if ".json" in path:
-        with open(path) as f:
-            data = json.load(f)
-
-        df = pd.concat([pd.DataFrame(i) for i in data])
-    else:
-        df = pd.read_csv(path, sep=";", decimal=",")
-        # We used different decimal format, check which one we have
-        if "float64" not in df.dtypes.unique():
-            df = pd.read_csv(path, sep=";")
-
-    df.rename(
-        mapper={
-            "seed": "run_id",
-            "failureRate": "failure_probability",
-            "observedFailureRate": "failure_rate",
-            "emissionTime": "emitter_time",
-            "receptionTime": "receiver_time",
-            "emitterId": "emitter_id",
-            "receiverId": "receiver_id",
-            "latency": "simulation_length",
-            "work": "total_work",
-            "groupSize": "group_size",
-            "circulatingAggregateIds": "circulating_aggregate_ids",
-            "currentlyCirculatingVersions": "currently_circulating_ids",
-            "usedBandwidth": "bandwidth",
-            "finalUsedBandwidth": "final_bandwidth",
-        },
-        axis=1,
-        inplace=True,
-    )
-    df.reset_index(inplace=True)
-    df.fillna(0, inplace=True)
-
-    df.loc[df["run_id"].str.startswith("OPTI-leader"), "strategy"] = "O_LEADER"
-    df.loc[df["run_id"].str.startswith("EAGER-leader"), "strategy"] = "E_LEADER"
-
-    for r in roles:
-        df[f"work_per_node_{r}"] = (
-            df[f"work_{r}"] / df[f"final_nodes_{r}"]
-            if (df[f"final_nodes_{r}"] != 0).any()
-            else 0
-        )
-        df[f"delta_nodes_{r}"] = df[f"final_nodes_{r}"] - df[f"initial_nodes_{r}"]
-
-    df.fillna(0, inplace=True)
-    for s in statistics:
-        df[f"{s}_total"] = 0
-        for r in roles:
-            df[f"{s}_total"] += df[f"{s}_{r}"]
-
-    if aggregate_message:
-        df = df.groupby(["run_id", "status", "strategy"]).mean()
-        df.reset_index(inplace=True)
-
-    return df
 
 
 def generate_box(quantiles, index):
@@ -161,7 +96,7 @@ if __name__ == "__main__":
     with open("./dissec.config.json") as f:
         config = json.load(f)
 
-    data = get_data(config["defaultGraph"])
+    data = get_data(config["defaultGraph"], "overview")
 
     run_ids = pd.unique(data["run_id"])
     strategies = pd.unique(data["strategy"])
@@ -0,0 +1,151 @@
+"""Throughput of a dashboard served in production mode per number of workers.
+
+usage: python3 scripts/load_test.py <dashboard> [workers...]
+
+For each number of workers (1, 2 and 4 by default), the dashboard is started
+with the production argument, then every callback of its page is requested
+over and over by concurrent clients, with the initial values of the layout and
+its sections opened. Set DISSEC_FIGURES_MAX_MB=0 to measure the drawing of the
+figures rather than their memoization.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import URLError
+from urllib.request import Request, urlopen
+
+import numpy as np
+
+PORT = 8060
+CLIENTS = 16
+REQUESTS = 400
+
+
+def get(path):
+    with urlopen(f"http://127.0.0.1:{PORT}{path}") as response:
+        return json.load(response)
+
+
+def wait_for_server(server, timeout=600):
+    start = time.time()
+    while time.time() - start < timeout:
+        if server.poll() is not None:
+            raise RuntimeError("The dashboard exited")
+        try:
+            return get("/_dash-layout")
+        except (URLError, ConnectionError):
+            time.sleep(0.5)
+    raise RuntimeError("The dashboard did not start")
+
+
+def initial_values(layout):
+    """Props of every component of the layout per id, with sections opened"""
+    values = dict()
+
+    def walk(node):
+        if isinstance(node, list):
+            for child in node:
+                walk(child)
+        elif isinstance(node, dict) and "props" in node:
+            props = node["props"]
+            if "id" in props:
+                values[props["id"]] = dict(props)
+                if props["id"].endswith("-open"):
+                    values[props["id"]]["value"] = props["options"]
+            walk(props.get("children"))
+
+    walk(layout)
+    return values
+
+
+def payloads(dependencies, values):
+    """Bodies of the requests calling each server side callback"""
+
+    def prop(dependency):
+        component, name = dependency["id"], dependency["property"]
+        return dict(
+            id=component,
+            property=name,
+            value=values.get(component, {}).get(name),
+        )
+
+    bodies = []
+    for callback in dependencies:
+        if callback.get("clientside_function"):
+            continue
+        output = callback["output"]
+        if output.startswith(".."):
+            outputs = [
+                dict(id=o.split(".")[0], property=o.split(".")[1])
+                for o in output.strip(".").split("...")
+            ]
+        else:
+            outputs = dict(id=output.split(".")[0], property=output.split(".")[1])
+        bodies.append(
+            dict(
+                output=output,
+                outputs=outputs,
+                inputs=[prop(i) for i in callback["inputs"]],
+                state=[prop(s) for s in callback["state"]],
+                changedPropIds=[],
+            )
+        )
+    return bodies
+
+
+def call(body):
+    request = Request(
+        f"http://127.0.0.1:{PORT}/_dash-update-component",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    start = time.time()
+    with urlopen(request) as response:
+        response.read()
+    return time.time() - start
+
+
+def load_test(dashboard, workers):
+    server = subprocess.Popen(
+        [sys.executable, dashboard, "production"],
+        env=dict(os.environ, PORT=str(PORT), DISSEC_WORKERS=str(workers)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        layout = wait_for_server(server)
+        bodies = payloads(get("/_dash-dependencies"), initial_values(layout))
+        # Warm up, so that the workers have loaded the dataset
+        with ThreadPoolExecutor(CLIENTS) as clients:
+            list(clients.map(call, bodies * workers))
+
+        start = time.time()
+        with ThreadPoolExecutor(CLIENTS) as clients:
+            latencies = list(
+                clients.map(call, [bodies[i % len(bodies)] for i in range(REQUESTS)])
+            )
+        elapsed = time.time() - start
+    finally:
+        server.send_signal(signal.SIGINT)
+        server.wait()
+
+    return (
+        REQUESTS / elapsed,
+        np.percentile(latencies, 50),
+        np.percentile(latencies, 95),
+    )
+
+
+if __name__ == "__main__":
+    dashboard = sys.argv[1]
+    counts = [int(c) for c in sys.argv[2:]] or [1, 2, 4]
+
+    print("workers  requests/s  p50 (ms)  p95 (ms)")
+    for workers in counts:
+        throughput, p50, p95 = load_test(dashboard, workers)
+        print(f"{workers:7}  {throughput:10.1f}  {p50 * 1000:8.0f}  {p95 * 1000:8.0f}")
@@ -0,0 +1,95 @@
+"""Time to the first paint of a dashboard and until it is set up.
+
+usage: python3 scripts/startup_time.py <dashboard> [runs]
+
+The dashboard is started on the development server, then its layout is
+requested until it answers, which is when the browser can paint the page, and
+its loading page is polled like the browser does until the dashboard is ready.
+Both are averaged over a few runs (3 by default), the first one may also fill
+the cache of the loaded file.
+"""
+
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+PORT = 8061
+TIMEOUT = 600
+
+
+def post(path, body):
+    request = Request(
+        f"http://127.0.0.1:{PORT}{path}",
+        data=json.dumps(body).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urlopen(request) as response:
+        return response.status, response.read()
+
+
+def poll():
+    """Whether the dashboard is set up, as answered to its loading page"""
+    status, body = post(
+        "/_dash-update-component",
+        dict(
+            output="..startup-ready.data...startup-status.children...startup-poll.disabled..",
+            outputs=[
+                dict(id="startup-ready", property="data"),
+                dict(id="startup-status", property="children"),
+                dict(id="startup-poll", property="disabled"),
+            ],
+            inputs=[dict(id="startup-poll", property="n_intervals", value=1)],
+            changedPropIds=["startup-poll.n_intervals"],
+        ),
+    )
+    if status == 204:
+        return False
+    response = json.loads(body)["response"]
+    if not response["startup-ready"]["data"]:
+        raise RuntimeError(response["startup-status"]["children"])
+    return True
+
+
+def startup_time(dashboard):
+    server = subprocess.Popen(
+        [sys.executable, dashboard],
+        env=dict(os.environ, PORT=str(PORT)),
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    start = time.time()
+    try:
+        first_paint = None
+        while time.time() - start < TIMEOUT:
+            if server.poll() is not None:
+                raise RuntimeError("The dashboard exited")
+            try:
+                if first_paint is None:
+                    with urlopen(f"http://127.0.0.1:{PORT}/_dash-layout"):
+                        first_paint = time.time() - start
+                if poll():
+                    return first_paint, time.time() - start
+            except (URLError, ConnectionError, HTTPError):
+                pass
+            time.sleep(0.1)
+        raise RuntimeError("The dashboard did not start")
+    finally:
+        # The development server runs in a child process of the reloader
+        os.killpg(server.pid, signal.SIGTERM)
+        server.wait()
+
+
+if __name__ == "__main__":
+    dashboard = sys.argv[1]
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    times = [startup_time(dashboard) for _ in range(runs)]
+    first_paint = sum(t[0] for t in times) / runs
+    ready = sum(t[1] for t in times) / runs
+    print(f"first paint {first_paint:.2f}s, ready {ready:.2f}s")
@@ -0,0 +1,10 @@
+"""Tests of the `analysis` package, run from the `simulation` directory.
+
+Like the entry points, they add this directory's parent to `sys.path` before
+importing `analysis`.
+"""
+
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
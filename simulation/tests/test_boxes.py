@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+
+from analysis.boxes import box, box_statistics
+
+
+def test_box_statistics_match_quantiles():
+    df = pd.DataFrame(dict(x=[1] * 5 + [2] * 4, y=[1, 2, 3, 4, 100, 5, 6, 7, 8]))
+    statistics, outliers = box_statistics(df, "x", "y")
+    assert statistics.loc[1, "median"] == 3
+    assert statistics.loc[2, "q1"] == np.quantile([5, 6, 7, 8], 0.25)
+    # The outlier is out of the whisker, and flagged
+    assert statistics.loc[1, "upperfence"] == 4
+    assert outliers.tolist() == [False] * 4 + [True] + [False] * 4
+
+
+def test_box_of_no_runs_is_empty():
+    df = pd.DataFrame(dict(x=[], y=[], strategy=[]), dtype=float)
+    statistics, outliers = box_statistics(df, "x", "y")
+    assert len(statistics) == 0 and len(outliers) == 0
+    assert len(box(df, "x", "y", color="strategy", points="all").data) == 0
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from analysis import jobs
+
+
+def wait(job, statuses, timeout=10):
+    start = time.time()
+    while time.time() - start < timeout:
+        status = jobs.poll(job)
+        if status["status"] in statuses:
+            return status
+        time.sleep(0.01)
+    raise TimeoutError(f"{job} is still {jobs.poll(job)['status']}")
+
+
+def draw(steps):
+    for _ in range(steps):
+        time.sleep(0.01)
+        jobs.step()
+    return steps
+
+
+def draw_parts(parts, steps):
+    for part in range(parts):
+        draw(steps)
+        yield dict(part=part)
+
+
+@pytest.fixture
+def pool(tmp_path, monkeypatch):
+    monkeypatch.setattr(jobs, "JOBS_DIR", str(tmp_path))
+    monkeypatch.setattr(jobs, "JOBS_WORKERS", 1)
+    monkeypatch.setattr(jobs, "_functions", dict())
+    jobs.register("draw", draw)
+    jobs.register("draw_parts", draw_parts)
+    yield
+    jobs._pool.shutdown()
+    jobs._pool = None
+
+
+def test_job_reports_steps_and_result(pool):
+    job = jobs.submit("draw", 20)
+    running = wait(job, ["running", "done"])
+    done = wait(job, ["done"])
+
+    assert running["steps"] <= done["steps"] == 20
+    assert done["result"] == 20
+
+
+def test_cancel_stops_a_running_job(pool):
+    job = jobs.submit("draw", 10_000)
+    wait(job, ["running"])
+    jobs.cancel(job)
+
+    assert jobs.poll(job)["status"] == "cancelled"
+    # The worker is freed at the next step, not at the end of the job
+    following = jobs.submit("draw", 1)
+    assert wait(following, ["done"], timeout=5)["result"] == 1
+
+
+def test_cancel_before_start_skips_the_job(pool):
+    busy = jobs.submit("draw", 50)
+    job = jobs.submit("draw", 1)
+    jobs.cancel(job)
+    wait(busy, ["done"])
+    time.sleep(0.1)
+
+    assert jobs.poll(job)["status"] == "cancelled"
+
+
+def test_step_outside_of_a_job_does_nothing():
+    jobs.step()
+
+
+def test_function_registered_after_the_pool_is_forked(pool):
+    # Another page set up while the first one already draws
+    busy = jobs.submit("draw", 20)
+    jobs.register("double", lambda value: 2 * value)
+    job = jobs.submit("double", 21)
+
+    assert wait(job, ["done", "error"])["result"] == 42
+    assert wait(busy, ["done"])["result"] == 20
+
+
+def test_parts_are_shown_as_they_are_drawn(pool):
+    job = jobs.submit("draw_parts", 3, 20)
+    running = wait(job, ["running"])
+    while running.get("parts", 0) == 0:
+        running = jobs.poll(job)
+    done = wait(job, ["done"])
+
+    # The first part is shown while the others are drawn
+    assert running["status"] == "running" and running["parts"] < 3
+    assert jobs.parts(job, running["parts"])[0] == dict(part=0)
+    assert done["parts"] == 3 and "result" not in done
+    assert jobs.parts(job, done["parts"]) == [dict(part=p) for p in range(3)]
+
+    jobs.forget(job)
+    assert jobs.parts(job, 3) == [None] * 3
+
+
+def test_cancel_stops_a_job_between_parts(pool):
+    job = jobs.submit("draw_parts", 1000, 1)
+    status = wait(job, ["running"])
+    while status.get("parts", 0) == 0:
+        status = jobs.poll(job)
+    jobs.cancel(job)
+
+    following = jobs.submit("draw", 1)
+    assert wait(following, ["done"], timeout=5)["result"] == 1
+    # The parts of the cancelled job are removed with it
+    assert jobs.parts(job, 1) == [None]
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+from analysis.loader import (
+    PROFILES,
+    parse_run_ids,
+    read_chunks,
+    read_table,
+    sniff_format,
+)
+
+
+def runs(run_ids, **columns):
+    return parse_run_ids(pd.DataFrame(dict(run_id=run_ids, **columns)))
+
+
+def test_run_names_of_overview_exports():
+    df = runs(["LFP-Drop-Stop-1-FullSync-m1024-f400-d3-s2-5"])
+    row = df.iloc[0]
+    assert row["run_blocks"] == "LFP-Drop-Stop-1-FullSync"
+    assert row["run_seed"] == "2-5"
+    assert (row["run_model_size"], row["run_failure_window"]) == (1024, 400)
+    assert (row["run_depth"], row["run_group_size"]) == (3, -1)
+
+
+def test_run_names_of_full_exports():
+    # The failure rate follows the depth, in a second `m` block
+    df = runs(["LFP-Replace-0Resync1-1-NonBlocking-m1024-d4-m400-s3-6-g5"])
+    row = df.iloc[0]
+    assert row["run_blocks"] == "LFP-Replace-0Resync1-1-NonBlocking"
+    assert row["run_seed"] == "3-6"
+    assert (row["run_model_size"], row["run_failure_window"]) == (1024, 400)
+    assert (row["run_depth"], row["run_group_size"]) == (4, 5)
+
+
+def test_same_settings_in_both_forms_group_together():
+    df = runs(
+        [
+            "FFP-Drop-Stop-1-None-m1-f0-d3-s0-0",
+            "LFP-Drop-Stop-1-FullSync-m1-f0-d3-s0-0",
+            "FFP-Drop-Stop-1-None-m1-d3-m0-s0-1",
+            "LFP-Drop-Stop-1-FullSync-m1-d3-m0-s0-1",
+        ]
+    )
+    settings = df["run_settings"].tolist()
+    assert settings[0] == settings[1] and settings[2] == settings[3]
+    assert settings[0] != settings[2]
+
+
+def test_unknown_run_names_are_missing():
+    df = runs(["OPTI-leader"])
+    assert pd.isna(df.iloc[0]["run_seed"])
+    assert df.iloc[0]["run_depth"] == -1
+
+
+def test_paper_exclusion_once_aggregated():
+    # Averaged per run, the frame has no seed column left
+    df = runs(
+        [
+            "LFP-Drop-Stop-1-FullSync-m1024-f400-d4-s2-3-g5",
+            "LFP-Drop-Stop-1-FullSync-m1024-f400-d4-s2-4-g5",
+            "LFP-Drop-Stop-1-FullSync-m1024-d4-m400-s3-6-g5",
+            "LFP-Drop-Stop-1-FullSync-m1024-f400-d4-s3-6-g3",
+        ],
+        failure_window=400,
+        completeness=100,
+        depth=4,
+        model_size=1024,
+    )
+    df = PROFILES["paper"]["finalize"](df)
+    assert df["run_seed"].astype(str).tolist() == ["2-4", "3-6"]
+    assert df["run_group_size"].tolist() == [5, 3]
+
+
+def test_late_numeric_column_is_not_read_as_strings(tmp_path):
+    # Past the sampled head of the file, as in large full exports
+    path = tmp_path / "late.csv"
+    rows = ["run_id;latency;late"]
+    rows += [f"a;{i},5;" for i in range(20000)]
+    rows += [f"a;1,5;{i},25" for i in range(10)]
+    path.write_text("\n".join(rows) + "\n")
+
+    _, decimal, dtypes = sniff_format(str(path), sample_size=1024)
+    assert decimal == "," and "late" not in dtypes
+
+    df = read_table(str(path))
+    assert df["late"].dtype == np.float64
+    assert df["late"].iloc[-1] == 9.25
+    chunks = list(read_chunks(str(path), chunksize=5000))
+    assert all(chunk["late"].dtype == np.float64 for chunk in chunks)
+    assert chunks[-1]["late"].sum() == sum(i + 0.25 for i in range(10))
@@ -0,0 +1,102 @@
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("dash")
+
+from analysis.cube import build_cube
+from analysis.loader import ROLES
+
+sys.path.append(
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "dashboard")
+)
+import dashboard_paper
+
+STATISTICS = [
+    "work",
+    "failures",
+    "messages",
+    "initial_nodes",
+    "final_nodes",
+    "inbound_bandwidth",
+    "outbound_bandwidth",
+    "propagation",
+    "versions",
+    "work_per_node",
+    "bandwidth_per_node",
+    "delta_nodes",
+]
+LEVEL_STATISTICS = STATISTICS[:3] + STATISTICS[5:9] + ["versions_percent", "work_avg"]
+RUN_STATISTICS = [
+    "completeness",
+    "simulation_length",
+    "total_work",
+    "failure_rate",
+    "failure_rate_workers",
+    "failure_rate_contributors",
+    "circulating_aggregate_ids",
+    "final_inbound_bandwidth",
+    "final_outbound_bandwidth",
+]
+
+
+@pytest.fixture
+def runs():
+    """Random runs of the paper profile, three seeds per settings"""
+    df = pd.DataFrame(
+        itertools.product(
+            ["LowCost", "HighCmpl", "S&P", "Hybrid", "HyBlock"],
+            [3, 4],
+            [4, 5],
+            [1, 1024],
+            [np.inf, 100, 200, 400],
+            ["0-0", "0-1", "0-2"],
+        ),
+        columns=[
+            "strategy",
+            "depth",
+            "group_size",
+            "model_size",
+            "failure_window",
+            "seed",
+        ],
+    )
+    df["failure_probability"] = (100 / df["failure_window"]).round(5)
+    df["run_id"] = [f"run-{i}" for i in range(len(df))]
+    df["run_settings"] = df.groupby(
+        ["depth", "group_size", "model_size", "failure_window", "seed"]
+    ).ngroup()
+    df["status"] = "Success"
+    df["fanout"] = 4
+
+    names = [f"{s}_{r}" for s in STATISTICS for r in ROLES + ["Worker", "total"]]
+    names += [f"{s}_level_{level}" for s in LEVEL_STATISTICS for level in range(5)]
+    names += RUN_STATISTICS
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 100, (len(df), len(names)))
+    df = pd.concat([df, pd.DataFrame(values, columns=names)], axis=1)
+    df["has_result"] = df["completeness"] > 0
+    return df
+
+
+def test_heatmaps_accept_any_configurations(runs, tmp_path, monkeypatch):
+    # The final box plots are written under outputs/final
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("outputs/final")
+
+    layout = dashboard_paper.generate_graphs(
+        runs,
+        build_cube(runs),
+        {},
+        export=False,
+        y_maps_dimensions=("depth",),
+        y_maps_values=[(3,), (4,)],
+    )
+    for name in ["map_completeness", "map_best", "map_pareto"]:
+        heatmap = layout[name].figure.data[0]
+        assert list(heatmap.y) == ["depth3", "depth4"]
+        assert np.shape(heatmap.z) == (2, 5)
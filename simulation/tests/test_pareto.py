@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+
+from analysis.cube import build_cube, select
+from analysis.pareto import front, pareto_fronts
+
+
+def test_dominated_strategy_is_off_the_front():
+    # Two objectives maximized, the second strategy is worse on both
+    values = [[3, 3], [2, 2], [4, 1]]
+    assert front(values, ["max", "max"]).tolist() == [True, False, True]
+
+
+def test_better_on_one_objective_only_is_not_enough():
+    values = [[3, 3], [3, 2]]
+    assert front(values, ["max", "max"]).tolist() == [True, False]
+    values = [[3, 1], [1, 3]]
+    assert front(values, ["max", "max"]).tolist() == [True, True]
+
+
+def test_ties_stay_on_the_front():
+    values = [[2, 5], [2, 5], [1, 5]]
+    assert front(values, ["max", "min"]).tolist() == [True, True, False]
+
+
+def test_mixed_senses():
+    # Completeness maximized, work minimized
+    values = [[100, 10], [90, 5], [90, 10], [100, 12]]
+    assert front(values, ["max", "min"]).tolist() == [True, True, False, False]
+    # The same strategies when work is maximized instead
+    assert front(values, ["max", "max"]).tolist() == [False, False, False, True]
+
+
+def test_tolerances_keep_negligible_differences():
+    # 96% complete is as good as 100% within 5%, and does less work
+    values = [[100, 10], [96, 8], [80, 7]]
+    assert front(values, ["max", "min"]).tolist() == [True, True, True]
+    assert front(values, ["max", "min"], [0.05, 0]).tolist() == [False, True, True]
+    # Within the tolerance, a strategy is no better either
+    values = [[100, 10], [98, 10]]
+    assert front(values, ["max", "min"], [0.05, 0]).tolist() == [True, True]
+
+
+def test_missing_values():
+    values = [[np.nan, 1], [3, 5], [2, 6]]
+    assert front(values, ["max", "min"]).tolist() == [False, True, False]
+
+
+def test_cells_are_independent():
+    values = np.array([[[1, 1], [2, 2]], [[2, 2], [1, 1]]])
+    assert front(values, ["max", "max"]).tolist() == [[False, True], [True, False]]
+
+
+def test_pareto_fronts_of_selected_cells():
+    runs = pd.DataFrame(
+        dict(
+            strategy=["A", "B", "A", "B"],
+            group_size=[4, 4, 5, 5],
+            depth=[3, 3, 3, 3],
+            completeness=[100.0, 90.0, 90.0, 100.0],
+            work_per_node_total=[5.0, 5.0, 5.0, 5.0],
+        )
+    )
+    cube = build_cube(runs)
+    axes = [("depth", [3]), ("strategy", ["A", "B"])]
+
+    assert pareto_fronts(cube, axes).tolist() == [[True, True]]
+    fronts = pareto_fronts(select(cube, group_size=4), axes)
+    assert fronts.tolist() == [[True, False]]
@@ -0,0 +1,71 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from analysis.runs import RunIndex
+
+
+@pytest.fixture
+def runs():
+    rng = np.random.default_rng(0)
+    size = 2000
+    return pd.DataFrame(
+        dict(
+            strategy=rng.choice(["LowCost", "HighCmpl", "S&P"], size),
+            depth=rng.choice([3, 4, 5], size),
+            group_size=rng.choice([4, 5, 6], size),
+            model_size=rng.choice([1, 1024, 4096], size),
+            failure_probability=rng.choice([0, 0.25, 0.5, np.nan], size),
+            value=rng.random(size),
+        ),
+        index=rng.permutation(size),
+    )
+
+
+def masked(df, **conditions):
+    mask = np.ones(len(df), dtype=bool)
+    for (name, condition) in conditions.items():
+        if isinstance(condition, tuple):
+            mask &= df[name].between(*condition).to_numpy()
+        elif isinstance(condition, list):
+            mask &= df[name].isin(condition).to_numpy()
+        else:
+            mask &= (df[name] == condition).to_numpy()
+    return df[mask]
+
+
+@pytest.mark.parametrize(
+    "conditions",
+    [
+        dict(),
+        dict(depth=4),
+        dict(depth=4, model_size=1024, group_size=5),
+        dict(failure_probability=0.25, group_size=5),
+        dict(strategy=["LowCost", "S&P"], depth=(3, 4)),
+        dict(model_size=(2, 4096), failure_probability=(0.1, 1)),
+        dict(depth=9),
+    ],
+)
+def test_query_matches_masks(runs, conditions):
+    result = RunIndex(runs).query(**conditions)
+    # The same runs, in the order of the frame
+    pd.testing.assert_frame_equal(result, masked(runs, **conditions))
+
+
+def test_within_narrows_every_query(runs):
+    ranges = dict(depth=(4, 5), failure_probability=(0, 0.3))
+    run_index = RunIndex(runs).within(**ranges)
+    subset = masked(runs, **ranges)
+    pd.testing.assert_frame_equal(run_index.query(), subset)
+    # Conditions on a level of the ranges are combined with them
+    pd.testing.assert_frame_equal(
+        run_index.query(depth=[3, 4], model_size=1),
+        masked(subset, depth=4, model_size=1),
+    )
+
+
+def test_unknown_levels_are_rejected(runs):
+    with pytest.raises(KeyError):
+        RunIndex(runs).query(seed="0-0")
+    with pytest.raises(KeyError):
+        RunIndex(runs).within(fanout=4)
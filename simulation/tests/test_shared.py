@@ -0,0 +1,43 @@
+import os
+
+import pandas as pd
+import pytest
+
+# Arrow is only required to serve with several processes
+pytest.importorskip("pyarrow")
+
+from analysis import shared
+
+
+@pytest.fixture
+def servers(tmp_path, monkeypatch):
+    """Directories of two servers, the first one being this process"""
+    monkeypatch.setattr(shared, "SHARED_DIR", str(tmp_path))
+    monkeypatch.setattr(shared, "SERVER_DIR", str(tmp_path / "1"))
+    return (tmp_path / "1", tmp_path / "2")
+
+
+def test_share_publishes_once(servers):
+    df = pd.DataFrame(dict(depth=[3, 4, 5], strategy=["a", "b", "a"]))
+    loads = []
+    first = shared.share("runs", lambda: loads.append(1) or df)
+    second = shared.share("runs", lambda: loads.append(1) or df)
+
+    assert loads == [1]
+    pd.testing.assert_frame_equal(first, df)
+    pd.testing.assert_frame_equal(second, df)
+    assert os.listdir(servers[0]) == ["runs.arrow"]
+
+
+def test_clear_keeps_other_servers(servers, monkeypatch):
+    (own, other) = servers
+    df = pd.DataFrame(dict(depth=[3, 4]))
+    assert shared.publish("runs", df)
+    monkeypatch.setattr(shared, "SERVER_DIR", str(other))
+    assert shared.publish("runs", df)
+    monkeypatch.setattr(shared, "SERVER_DIR", str(own))
+
+    shared.clear()
+    assert not own.exists()
+    assert os.listdir(other) == ["runs.arrow"]
+    assert shared.attach("runs") is None
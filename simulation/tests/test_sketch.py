@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from analysis.cube import build_sketches, roll_up_quantiles
+from analysis.sketch import QuantileSketch
+
+# Rank error of the default sketch, as claimed in its docstring
+RANK_ERROR = 0.017
+FRACTIONS = np.linspace(0, 1, 101)
+
+
+def rank_errors(estimates, values):
+    """Distance between the rank of each of `FRACTIONS` estimates and the target"""
+    values = np.sort(values)
+    low = np.searchsorted(values, estimates, side="left") / len(values)
+    high = np.searchsorted(values, estimates, side="right") / len(values)
+    # Ties cover a range of ranks, any of them is right
+    return np.maximum(0, np.maximum(low - FRACTIONS, FRACTIONS - high))
+
+
+def test_small_stream_is_exact():
+    values = np.random.default_rng(1).normal(size=150)
+    sketch = QuantileSketch.from_values(values)
+    assert np.allclose(sketch.quantiles(FRACTIONS), np.quantile(values, FRACTIONS))
+
+
+def test_missing_values_are_ignored():
+    sketch = QuantileSketch.from_values([1.0, np.nan, 3.0])
+    assert sketch.count == 2
+    assert np.allclose(sketch.quantiles([0, 0.5, 1]), [1, 2, 3])
+    assert np.isnan(QuantileSketch().quantiles([0.5])).all()
+
+
+def test_rank_error_after_compaction():
+    values = np.random.default_rng(2).lognormal(size=200_000)
+    sketch = QuantileSketch()
+    for chunk in np.array_split(values, 100):
+        sketch.update(chunk)
+
+    assert sketch.count == len(values)
+    assert sum(len(level) for level in sketch.levels) < 2000
+    assert rank_errors(sketch.quantiles(FRACTIONS), values).max() <= RANK_ERROR
+    assert sketch.quantiles([0, 1]).tolist() == [values.min(), values.max()]
+
+
+def test_rank_error_after_merges():
+    values = np.random.default_rng(3).exponential(size=100_000)
+    chunks = np.array_split(values, 400)
+    sketch = QuantileSketch()
+    for (i, chunk) in enumerate(chunks):
+        sketch.merge(QuantileSketch(seed=i).update(chunk))
+
+    assert sketch.count == len(values)
+    assert rank_errors(sketch.quantiles(FRACTIONS), values).max() <= RANK_ERROR
+
+
+def test_merge_of_unequal_sketches():
+    rng = np.random.default_rng(4)
+    large = rng.uniform(size=50_000)
+    small = rng.uniform(10, 11, size=50)
+    sketch = QuantileSketch.from_values(large).merge(QuantileSketch.from_values(small))
+
+    values = np.concatenate([large, small])
+    assert rank_errors(sketch.quantiles(FRACTIONS), values).max() <= RANK_ERROR
+    assert sketch.max == small.max()
+
+
+def test_roll_up_quantiles():
+    rng = np.random.default_rng(5)
+    df = pd.DataFrame(
+        dict(
+            strategy=rng.choice(["A", "B"], size=40_000),
+            depth=rng.choice([3, 4, 5], size=40_000),
+            completeness=rng.normal(80, 10, size=40_000),
+        )
+    )
+    cells = build_sketches(df, metrics=["completeness"])
+    rolled = roll_up_quantiles(cells, ["strategy"], "completeness", q=FRACTIONS)
+
+    assert rolled["strategy"].tolist() == ["A", "B"]
+    for (strategy, row) in rolled.set_index("strategy").iterrows():
+        values = df.loc[df["strategy"] == strategy, "completeness"]
+        assert rank_errors(row.to_numpy(), values).max() <= RANK_ERROR
+
+
+def test_roll_up_quantiles_of_small_cells_is_exact():
+    df = pd.DataFrame(
+        dict(strategy=["A", "A", "A", "B", "B"], completeness=[1, 2, 4, 10, 20])
+    )
+    cells = build_sketches(df, metrics=["completeness"])
+    rolled = roll_up_quantiles(cells, ["strategy"], "completeness", q=[0, 0.5, 1])
+
+    expected = df.groupby("strategy")["completeness"].quantile([0, 0.5, 1]).unstack()
+    assert np.allclose(rolled[[0, 0.5, 1]].to_numpy(), expected.to_numpy())
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+
+from analysis.timelines import TimeIndex, downsample, lttb
+
+
+def series(size, seed=0):
+    rng = np.random.default_rng(seed)
+    return (np.sort(rng.uniform(0, 100, size)), rng.normal(size=size))
+
+
+def test_lttb_keeps_endpoints_and_length():
+    (x, y) = series(10_000)
+    for n in [3, 10, 500, 9999]:
+        kept = lttb(x, y, n)
+        assert len(kept) == n
+        assert kept[0] == 0 and kept[-1] == len(x) - 1
+        # One point per bucket, in order, so x stays sorted
+        assert (np.diff(kept) > 0).all()
+        assert (np.diff(x[kept]) >= 0).all()
+
+
+def test_lttb_keeps_short_series_whole():
+    (x, y) = series(100)
+    assert lttb(x, y, 100).tolist() == list(range(100))
+    assert lttb(x, y, 1000).tolist() == list(range(100))
+    assert lttb(x, y, 2).tolist() == list(range(100))
+
+
+def test_lttb_keeps_spikes():
+    x = np.arange(1000, dtype=np.float64)
+    y = np.zeros(1000)
+    y[[123, 456, 789]] = [10, -10, 10]
+    kept = lttb(x, y, 20)
+    assert {123, 456, 789} <= set(kept)
+
+
+def test_downsample_respects_window_and_budget():
+    (x, y) = series(50_000, seed=1)
+    df = pd.DataFrame(dict(time=x[::-1], value=y, run=np.arange(len(x)) % 2))
+    df.loc[::100, "value"] = np.nan
+
+    drawn = downsample(df, "time", "value", window=(20, 60), max_points=1000)
+    assert len(drawn) == 1000
+    assert drawn["time"].between(20, 60).all()
+    assert drawn["time"].is_monotonic_increasing
+    assert drawn["value"].notna().all()
+
+    per_run = downsample(df, "time", "value", by="run", max_points=1000)
+    assert per_run["time"].is_monotonic_increasing
+    assert per_run.groupby("run").size().between(490, 510).all()
+
+
+def test_downsample_budget_holds_for_many_series():
+    (x, y) = series(20_000, seed=3)
+    for groups in [400, 700, 5000]:
+        df = pd.DataFrame(dict(time=x, value=y, run=np.arange(len(x)) % groups))
+        drawn = downsample(df, "time", "value", by="run", max_points=1000)
+        assert 0 < len(drawn) <= 1000
+        assert drawn["time"].is_monotonic_increasing
+        # Every series is drawn as long as each gets a point
+        assert drawn["run"].nunique() == min(groups, 1000)
+
+
+def test_downsample_keeps_small_frames():
+    (x, y) = series(300, seed=2)
+    df = pd.DataFrame(dict(time=x, value=y))
+    assert len(downsample(df, "time", "value", max_points=1000)) == 300
+
+
+def messages():
+    return pd.DataFrame(
+        dict(
+            run=["a", "a", "a", "a", "b", "b", "a"],
+            type=["ping", "ping", "ping", "pong", "ping", "ping", "ping"],
+            time=[3.0, 1.0, 2.0, 2.0, 5.0, np.nan, 2.0],
+        )
+    )
+
+
+def test_time_index_until_includes_bound():
+    index = TimeIndex(messages(), "time")
+    assert index.until(["a"], ["ping"], 2)["time"].tolist() == [1.0, 2.0, 2.0]
+    assert index.until(["a"], ["ping"], 0.5).empty
+    assert index.until(["a"], ["ping"], np.inf)["time"].tolist() == [1, 2, 2, 3]
+
+
+def test_time_index_between_excludes_start():
+    index = TimeIndex(messages(), "time")
+    assert index.between(["a"], ["ping"], 1, 3)["time"].tolist() == [2.0, 2.0, 3.0]
+    assert index.between(["a"], ["ping"], 3, 10).empty
+    selected = index.between(["a", "b"], ["ping", "pong"], 1.5, 5)
+    assert sorted(zip(selected["run"], selected["time"])) == [
+        ("a", 2.0),
+        ("a", 2.0),
+        ("a", 2.0),
+        ("a", 3.0),
+        ("b", 5.0),
+    ]
+
+
+def test_time_index_skips_missing_times_and_groups():
+    index = TimeIndex(messages(), "time")
+    assert index.until(["b"], ["ping"], np.inf)["time"].tolist() == [5.0]
+    assert index.until(["c"], ["ping"], 10).empty
+    assert index.until(["a"], ["pong"], 10)["time"].tolist() == [2.0]